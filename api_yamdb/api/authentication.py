@@ -0,0 +1,131 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.utils.functional import cached_property
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from reviews.models import User
+
+# Утверждения токена, по которым пользователь восстанавливается без БД.
+USER_CLAIMS = ('username', 'role', 'is_superuser')
+
+_users = {}
+_users_lock = threading.Lock()
+
+
+def get_cached_user(user_id):
+    """
+    Пользователь из кэша процесса, либо из БД, если его нет в кэше
+    или запись старше AUTH_USER_CACHE_TTL секунд.
+    Возвращается копия, чтобы запросы не делили один объект.
+    """
+    now = time.monotonic()
+    with _users_lock:
+        expires, user = _users.get(user_id, (0, None))
+    if expires <= now:
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            return None
+        with _users_lock:
+            if len(_users) >= settings.AUTH_USER_CACHE_SIZE:
+                _users.pop(next(iter(_users)))
+            _users[user_id] = (now + settings.AUTH_USER_CACHE_TTL, user)
+    return copy.copy(user)
+
+
+def forget_user(user_id):
+    with _users_lock:
+        _users.pop(user_id, None)
+
+
+def clear_user_cache():
+    with _users_lock:
+        _users.clear()
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Токен, в который записаны имя, роль и статус пользователя."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь, восстановленный из утверждений токена."""
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', User.USER)
+
+    @property
+    def is_moderator(self):
+        return self.role == User.MODERATOR
+
+    @property
+    def is_admin(self):
+        return self.role == User.ADMIN
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по JWT без запроса к таблице пользователей.
+
+    На чтение пользователь с ролью user строится из утверждений
+    токена, выданного ClaimsRefreshToken. На запись, для токенов
+    модераторов, администраторов и суперпользователей, а также для
+    старых токенов без утверждений пользователь берется из кэша
+    процесса с коротким TTL: отозванные права перестают действовать
+    через AUTH_USER_CACHE_TTL секунд, а не с истечением токена.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if request.method in SAFE_METHODS and self.is_unprivileged(
+            validated_token
+        ):
+            return ClaimsUser(validated_token), validated_token
+        return self.get_user(validated_token), validated_token
+
+    def is_unprivileged(self, validated_token):
+        """Токен с утверждениями о пользователе без особых прав."""
+        return all(
+            claim in validated_token
+            for claim in (api_settings.USER_ID_CLAIM, *USER_CLAIMS)
+        ) and validated_token['role'] == User.USER and not (
+            validated_token['is_superuser']
+        )
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Токен не содержит идентификатор пользователя.'
+            )
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден.', code='user_not_found'
+            )
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'Пользователь неактивен.', code='user_inactive'
+            )
+        return user
@@ -0,0 +1,191 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from api.metrics import API_CACHE_REQUESTS
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'api:version:{group}'
+MODIFIED_KEY = 'api:modified:{group}'
+HITS_KEY = 'api:stats:hits'
+MISSES_KEY = 'api:stats:misses'
+# Группа, от которой зависят все ответы, сбрасывается при массовой загрузке.
+ALL_GROUP = 'all'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_version(cache, group):
+    key = VERSION_KEY.format(group=group)
+    version = cache.get(key)
+    if version is not None:
+        return version
+    # Версия, вытесненная из кэша, не должна совпасть с прежней.
+    cache.add(key, int(time.time() * 1000), None)
+    return cache.get(key)
+
+
+def get_modified(cache, group):
+    key = MODIFIED_KEY.format(group=group)
+    modified = cache.get(key)
+    if modified is not None:
+        return modified
+    cache.add(key, int(time.time()), None)
+    return cache.get(key)
+
+
+def invalidate(*groups):
+    """Делает недействительными все закэшированные ответы групп."""
+    cache = get_cache()
+    for group in groups:
+        key = VERSION_KEY.format(group=group)
+        cache.add(key, int(time.time() * 1000), None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+        cache.set(MODIFIED_KEY.format(group=group), int(time.time()), None)
+
+
+def increment(cache, key):
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def get_stats():
+    cache = get_cache()
+    hits = cache.get(HITS_KEY) or 0
+    misses = cache.get(MISSES_KEY) or 0
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else None,
+    }
+
+
+def request_digest(request, versions):
+    """Хэш адреса, отсортированных параметров запроса и версий групп."""
+    query = urlencode(sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    ))
+    location = f'{request.get_host()}{request.path}?{query}'
+    return hashlib.md5(
+        f'{":".join(map(str, versions))}:{location}'.encode('utf-8')
+    ).hexdigest()
+
+
+class CacheResponseMixin:
+    """
+    Кэширует ответы на GET-запросы к списку и объекту.
+    Ключ строится из адреса и отсортированных параметров запроса
+    и включает версии групп cache_groups, которые увеличиваются
+    сигналами при изменении данных.
+    """
+    cache_groups = ()
+    cache_anonymous_only = False
+
+    def get_cache_groups(self):
+        return self.cache_groups
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method == 'GET' and (
+            not self.cache_anonymous_only
+            or not request.user.is_authenticated
+        ):
+            # dispatch берет обработчик после initial, подменяем его.
+            self.get = self.cache_handler(self.get)
+
+    def get_cache_key(self, cache, request):
+        versions = [
+            get_version(cache, group)
+            for group in (ALL_GROUP, *self.get_cache_groups())
+        ]
+        return f'api:response:{request_digest(request, versions)}'
+
+    def cache_handler(self, handler):
+        def cached_handler(request, *args, **kwargs):
+            cache = get_cache()
+            key = self.get_cache_key(cache, request)
+            cached = cache.get(key)
+            view = f'{type(self).__name__}.{self.action}'
+            if cached is not None:
+                increment(cache, HITS_KEY)
+                API_CACHE_REQUESTS.labels(view, 'hit').inc()
+                response = Response(cached)
+                response['X-Cache'] = 'HIT'
+                return response
+            increment(cache, MISSES_KEY)
+            API_CACHE_REQUESTS.labels(view, 'miss').inc()
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data)
+            response['X-Cache'] = 'MISS'
+            return response
+        return cached_handler
+
+
+class ConditionalResponseMixin:
+    """
+    Отдает слабый ETag и Last-Modified по версиям групп из
+    get_etag_groups и отвечает 304 Not Modified без обращения
+    к БД и сериализации, если данные не менялись. Версии хранятся
+    в кэше API_CACHE_ALIAS, который должен быть общим для всех
+    процессов (проверка api.W001).
+    """
+
+    def get_etag_groups(self):
+        return self.cache_groups
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method == 'GET':
+            self.get = self.conditional_handler(self.get)
+
+    def conditional_handler(self, handler):
+        def conditional_get(request, *args, **kwargs):
+            cache = get_cache()
+            groups = (ALL_GROUP, *self.get_etag_groups())
+            etag = 'W/"{}"'.format(request_digest(
+                request, [get_version(cache, group) for group in groups]
+            ))
+            last_modified = max(get_modified(cache, group) for group in groups)
+            if self.is_not_modified(request, etag, last_modified):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = handler(request, *args, **kwargs)
+            if response.status_code in (
+                status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED
+            ):
+                response['ETag'] = etag
+                response['Last-Modified'] = http_date(last_modified)
+            return response
+        return conditional_get
+
+    def is_not_modified(self, request, etag, last_modified):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            # Слабое сравнение: префикс W/ не учитывается.
+            return '*' in parse_etags(if_none_match) or etag[2:] in (
+                tag[2:] if tag.startswith('W/') else tag
+                for tag in parse_etags(if_none_match)
+            )
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+        )
+        return (
+            if_modified_since is not None
+            and last_modified <= if_modified_since
+        )
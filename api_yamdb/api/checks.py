@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Кэши, содержимое которых видно только одному процессу.
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_shared_caches(app_configs, **kwargs):
+    """
+    Версии кэша ответов, ETag и Last-Modified, а также счетчики
+    ограничения частоты должны быть общими для всех воркеров
+    и менеджмент-команд, иначе каждый процесс видит свои значения.
+    """
+    if settings.DEBUG:
+        return []
+    return [
+        Warning(
+            f'Кэш "{alias}" хранится в памяти процесса.',
+            hint=(
+                'Задайте REDIS_URL, чтобы кэш ответов, ETag и лимиты '
+                'запросов были общими для всех процессов.'
+            ),
+            obj=alias,
+            id='api.W001',
+        )
+        for alias in (settings.API_CACHE_ALIAS, settings.THROTTLE_CACHE_ALIAS)
+        if settings.CACHES[alias]['BACKEND'] in PROCESS_LOCAL_BACKENDS
+    ]
@@ -1,3 +1,6 @@
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, When
 from django_filters import CharFilter, FilterSet, NumberFilter
 from reviews.models import Title
 
@@ -8,7 +11,29 @@ class TitleFilter(FilterSet):
     category = CharFilter(field_name='category__slug')
     year = NumberFilter(field_name='year')
     name = CharFilter(field_name='name', lookup_expr='icontains')
+    search = CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ['genre', 'category', 'year', 'name']
+        fields = ['genre', 'category', 'year', 'name', 'search']
+
+    def filter_search(self, queryset, name, value):
+        """
+        Поиск по названию и описанию с ранжированием.
+        На PostgreSQL условия обслуживаются триграммными GIN-индексами,
+        а результаты сортируются по похожести названия на запрос.
+        """
+        matches = Q(name__icontains=value) | Q(description__icontains=value)
+        if connection.vendor == 'postgresql':
+            return queryset.filter(
+                matches | Q(name__trigram_similar=value)
+            ).annotate(
+                rank=TrigramSimilarity('name', value)
+            ).order_by('-rank', 'pk')
+        return queryset.filter(matches).annotate(
+            rank=Case(
+                When(name__icontains=value, then=1),
+                default=0,
+                output_field=IntegerField()
+            )
+        ).order_by('-rank', 'pk')
@@ -0,0 +1,165 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+
+from api.metrics import EMAIL_SEND_DURATION
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+from reviews.models import OutgoingEmail
+
+_retry_timer = None
+_retry_lock = threading.Lock()
+
+
+def queue_email(subject, body, to_email, expires_at=None):
+    """
+    Ставит письмо в очередь. В режиме EMAIL_QUEUE_MODE='thread'
+    отправка запускается в пуле потоков после фиксации транзакции,
+    в режиме 'worker' письма отправляет команда sendqueuedemails.
+    Письмо с секретом получает expires_at, после которого его удаляет
+    purgeconfirmationcodes; текст письма стирается после отправки.
+    """
+    OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to_email=to_email,
+        expires_at=expires_at
+    )
+    if settings.EMAIL_QUEUE_MODE == 'thread':
+        transaction.on_commit(schedule_delivery)
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.EMAIL_QUEUE_THREADS,
+        thread_name_prefix='email'
+    )
+
+
+def schedule_delivery():
+    get_executor().submit(deliver_in_thread)
+
+
+def deliver_in_thread():
+    try:
+        while deliver_batch():
+            pass
+        retry_at = OutgoingEmail.objects.filter(
+            status__in=[OutgoingEmail.PENDING, OutgoingEmail.SENDING]
+        ).order_by('next_attempt_at').values_list(
+            'next_attempt_at', flat=True
+        ).first()
+    finally:
+        connection.close()
+    if retry_at is not None:
+        schedule_retry(max((retry_at - timezone.now()).total_seconds(), 0))
+
+
+def schedule_retry(delay):
+    """Запускает повторную отправку через delay секунд, один таймер."""
+    global _retry_timer
+    with _retry_lock:
+        if _retry_timer is not None:
+            _retry_timer.cancel()
+        _retry_timer = threading.Timer(delay, schedule_delivery)
+        _retry_timer.daemon = True
+        _retry_timer.start()
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой."""
+    return timedelta(
+        seconds=settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def claim_batch(batch_size=None):
+    """
+    Забирает пачку писем, срок отправки которых наступил, в короткой
+    транзакции: строки блокируются с SKIP LOCKED и помечаются как
+    отправляемые до now + EMAIL_QUEUE_CLAIM_TIMEOUT, поэтому несколько
+    воркеров не отправят одно письмо дважды, а письма завершившегося
+    воркера после этого срока забирает другой.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True).filter(
+                status__in=[OutgoingEmail.PENDING, OutgoingEmail.SENDING],
+                next_attempt_at__lte=now
+            ).order_by('next_attempt_at')[
+                :batch_size or settings.EMAIL_QUEUE_BATCH_SIZE
+            ]
+        )
+        lease_until = now + timedelta(
+            seconds=settings.EMAIL_QUEUE_CLAIM_TIMEOUT
+        )
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(status=OutgoingEmail.SENDING, next_attempt_at=lease_until)
+    return emails
+
+
+def deliver_batch(batch_size=None):
+    """
+    Отправляет забранную пачку писем через одно соединение с почтовым
+    сервером вне транзакции и отмечает каждое письмо по результату.
+    Возвращает количество обработанных писем.
+    """
+    emails = claim_batch(batch_size)
+    if not emails:
+        return 0
+    mail_connection = get_connection()
+    try:
+        mail_connection.open()
+    except Exception as error:
+        for email in emails:
+            fail(email, error)
+        return len(emails)
+    try:
+        for email in emails:
+            start = time.perf_counter()
+            try:
+                EmailMessage(
+                    email.subject,
+                    email.body,
+                    email.from_email,
+                    [email.to_email],
+                    connection=mail_connection
+                ).send()
+            except Exception as error:
+                EMAIL_SEND_DURATION.labels('failed').observe(
+                    time.perf_counter() - start
+                )
+                fail(email, error)
+            else:
+                EMAIL_SEND_DURATION.labels('sent').observe(
+                    time.perf_counter() - start
+                )
+                email.status = OutgoingEmail.SENT
+                email.sent_at = timezone.now()
+                email.body = ''
+                email.save(update_fields=['status', 'sent_at', 'body'])
+    finally:
+        mail_connection.close()
+    return len(emails)
+
+
+def fail(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+        email.status = OutgoingEmail.FAILED
+        email.body = ''
+    else:
+        email.status = OutgoingEmail.PENDING
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+    email.save(update_fields=[
+        'attempts', 'last_error', 'status', 'next_attempt_at', 'body'
+    ])
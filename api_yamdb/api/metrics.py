@@ -0,0 +1,53 @@
+import os
+
+from prometheus_client import (REGISTRY, CollectorRegistry, Counter, Histogram,
+                               multiprocess)
+
+# Переменная окружения prometheus_client: если она задана, каждый
+# процесс пишет значения в свои файлы в этом каталоге, а /metrics
+# суммирует файлы всех воркеров gunicorn.
+MULTIPROC_DIR_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21, 34, 55, 100, float('inf'))
+
+REQUEST_DURATION = Histogram(
+    'yamdb_request_duration_seconds',
+    'Время обработки запроса.',
+    ['view', 'method', 'status']
+)
+REQUEST_DB_QUERIES = Histogram(
+    'yamdb_request_db_queries',
+    'Количество SQL-запросов на запрос.',
+    ['view'],
+    buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_DURATION = Histogram(
+    'yamdb_request_db_duration_seconds',
+    'Время SQL-запросов на запрос.',
+    ['view']
+)
+API_CACHE_REQUESTS = Counter(
+    'yamdb_api_cache_requests',
+    'Обращения к кэшу ответов API: hit или miss.',
+    ['view', 'result']
+)
+EMAIL_SEND_DURATION = Histogram(
+    'yamdb_email_send_duration_seconds',
+    'Время отправки письма: sent или failed.',
+    ['status']
+)
+
+
+def observe_request(view, method, status, duration, queries, db_duration):
+    view = view or 'unresolved'
+    REQUEST_DURATION.labels(view, method, status).observe(duration)
+    REQUEST_DB_QUERIES.labels(view).observe(queries)
+    REQUEST_DB_DURATION.labels(view).observe(db_duration)
+
+
+def get_registry():
+    """Реестр процесса или сумма файлов всех процессов."""
+    if not os.environ.get(MULTIPROC_DIR_ENV):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
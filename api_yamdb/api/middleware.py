@@ -0,0 +1,182 @@
+import cProfile
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from api.authentication import ClaimsJWTAuthentication
+from api.metrics import observe_request
+from api.profiling import StackSampler, save_profile
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.exceptions import APIException
+
+logger = logging.getLogger('api.timing')
+slow_logger = logging.getLogger('api.timing.slow')
+
+
+class QueryTimer:
+    """Обертка выполнения SQL, которая запоминает текст и время запросов."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    @property
+    def duration(self):
+        return sum(duration for _, duration in self.queries)
+
+
+def get_view_name(request, view_func):
+    """Имя обработчика запроса: TitleViewSet.list, AuthView.post."""
+    view_class = getattr(view_func, 'cls', None) or getattr(
+        view_func, 'view_class', None
+    )
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    method = request.method.lower()
+    # У viewset'ов as_view() запоминает соответствие методов действиям.
+    actions = getattr(view_func, 'actions', None) or {}
+    return f'{view_class.__name__}.{actions.get(method, method)}'
+
+
+class TimingMiddleware:
+    """
+    Измеряет время запроса, время и количество SQL-запросов на всех
+    соединениях и время отрисовки ответа DRF. Результат отдается
+    в заголовке Server-Timing и пишется строкой JSON в журнал
+    api.timing; запросы дольше SLOW_REQUEST_MS миллисекунд дополнительно
+    пишутся в api.timing.slow вместе с самыми долгими SQL-запросами.
+    Те же измерения попадают в гистограммы метрик Prometheus.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.timing_view = None
+        request.timing_render = 0
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+        db = timer.duration
+        response['Server-Timing'] = (
+            f'db;dur={db * 1000:.2f};desc="{len(timer.queries)} queries", '
+            f'render;dur={request.timing_render * 1000:.2f}, '
+            f'app;dur={(total - db - request.timing_render) * 1000:.2f}, '
+            f'total;dur={total * 1000:.2f}'
+        )
+        record = {
+            'view': request.timing_view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'db_ms': round(db * 1000, 2),
+            'queries': len(timer.queries),
+            'render_ms': round(request.timing_render * 1000, 2),
+        }
+        observe_request(
+            request.timing_view, request.method, response.status_code,
+            total, len(timer.queries), db
+        )
+        logger.info(json.dumps(record, ensure_ascii=False))
+        if total * 1000 >= settings.SLOW_REQUEST_MS:
+            record['sql'] = [
+                {'ms': round(duration * 1000, 2), 'sql': sql}
+                for sql, duration in sorted(
+                    timer.queries, key=lambda query: query[1], reverse=True
+                )[:settings.SLOW_REQUEST_MAX_QUERIES]
+            ]
+            slow_logger.warning(json.dumps(record, ensure_ascii=False))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.timing_view = get_view_name(request, view_func)
+
+    def process_template_response(self, request, response):
+        # Ответы DRF отрисовываются после всех middleware: время
+        # отрисовки отсчитывается отсюда до post-render callback.
+        start = time.perf_counter()
+
+        def rendered(response):
+            request.timing_render = time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+def is_admin_request(request):
+    """Запрос с токеном администратора: проверка до view DRF."""
+    try:
+        auth = ClaimsJWTAuthentication().authenticate(request)
+    except APIException:
+        return False
+    return auth is not None and (auth[0].is_admin or auth[0].is_superuser)
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует запросы администратора с заголовком X-Profile
+    и долю PROFILING_SAMPLE_RATE всех запросов: cProfile и стеки
+    StackSampler вместе с SQL-запросами сохраняются в PROFILING_DIR,
+    id профиля возвращается в заголовке X-Profile-Id.
+    При выключенном PROFILING_ENABLED Django не включает middleware
+    в цепочку обработки.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() < settings.PROFILING_SAMPLE_RATE or (
+            'HTTP_X_PROFILE' in request.META and is_admin_request(request)
+        ):
+            return self.profile(request)
+        return self.get_response(request)
+
+    def profile(self, request):
+        timer = QueryTimer()
+        profiler = cProfile.Profile()
+        sampler = StackSampler(
+            threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL
+        )
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            stack.enter_context(sampler)
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        response['X-Profile-Id'] = save_profile(profiler, sampler, {
+            'view': getattr(request, 'timing_view', None),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'total_ms': round((time.perf_counter() - start) * 1000, 2),
+            'db_ms': round(timer.duration * 1000, 2),
+            'queries': len(timer.queries),
+            'sql': [
+                {'ms': round(duration * 1000, 2), 'sql': sql}
+                for sql, duration in timer.queries
+            ],
+        })
+        return response
@@ -0,0 +1,128 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict, namedtuple
+from urllib import parse
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+Cursor = namedtuple('Cursor', ['reverse', 'pub_date', 'id'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Постраничный вывод по ключу (pub_date, id).
+
+    Страница выбирается условием WHERE по позиции последней записи,
+    без OFFSET, поэтому дальние страницы не медленнее первой.
+    Общее количество записей считается только по запросу ?count=true.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        self.count = None
+        if request.query_params.get(self.count_query_param) in (
+            '1', 'true', 'True'
+        ):
+            self.count = queryset.count()
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        if self.cursor is not None:
+            lookup = 'lt' if reverse else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'pub_date__{lookup}': self.cursor.pub_date})
+                | Q(pub_date=self.cursor.pub_date,
+                    **{f'id__{lookup}': self.cursor.id})
+            )
+        ordering = ('-pub_date', '-id') if reverse else ('pub_date', 'id')
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return self.page
+
+    def get_paginated_response(self, data):
+        content = [
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]
+        if self.count is not None:
+            content.insert(0, ('count', self.count))
+        return Response(OrderedDict(content))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(False, *self._position(-1)))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(True, *self._position(0)))
+
+    def _position(self, index):
+        obj = self.page[index]
+        return obj.pub_date, obj.id
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            pub_date = parse_datetime(tokens['p'][0])
+            if pub_date is None:
+                raise ValueError
+            return Cursor(
+                reverse=bool(int(tokens.get('r', ['0'])[0])),
+                pub_date=pub_date,
+                id=int(tokens['i'][0])
+            )
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor):
+        tokens = {'p': cursor.pub_date.isoformat(), 'i': cursor.id}
+        if cursor.reverse:
+            tokens['r'] = '1'
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        url = remove_query_param(self.base_url, self.count_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+
+class OptionalKeysetPagination(PageNumberPagination):
+    """
+    Постраничный вывод по номеру страницы, либо по ключу,
+    если клиент передал параметр ?cursor= (пустой для первой страницы).
+    """
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,3 +1,6 @@
+from ipaddress import ip_address, ip_network
+
+from django.conf import settings
 from rest_framework import permissions
 
 
@@ -8,7 +11,7 @@ class IsModeratorOrOwnerOrReadOnly(permissions.BasePermission):
     """
     def has_object_permission(self, request, view, obj):
         if (request.method in permissions.SAFE_METHODS
-                or obj.author == request.user):
+                or obj.author_id == request.user.id):
             return True
         return request.user.is_moderator or request.user.is_admin
 
@@ -36,3 +39,24 @@ class IsAdmin(permissions.BasePermission):
                 request.user.is_admin or request.user.is_superuser
             )
         return False
+
+
+class IsAdminOrInternalNetwork(permissions.BasePermission):
+    """
+    Разрешение для Администратора и для запросов напрямую из сетей
+    METRICS_ALLOWED_NETWORKS. Запросы через прокси с X-Forwarded-For
+    внутренними не считаются: у них адрес прокси, а не клиента.
+    """
+    def has_permission(self, request, view):
+        if IsAdmin().has_permission(request, view):
+            return True
+        if 'HTTP_X_FORWARDED_FOR' in request.META:
+            return False
+        try:
+            address = ip_address(request.META.get('REMOTE_ADDR', ''))
+        except ValueError:
+            return False
+        return any(
+            address in ip_network(network)
+            for network in settings.METRICS_ALLOWED_NETWORKS
+        )
@@ -0,0 +1,122 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+
+PROFILE_ID = re.compile(r'^[0-9a-f]{32}$')
+PSTATS = 'pstats'
+COLLAPSED = 'collapsed'
+METADATA = 'json'
+
+
+class StackSampler:
+    """
+    Статистический профилировщик: фоновый поток раз в interval секунд
+    снимает стек потока запроса и считает одинаковые стеки.
+    Результат - строки collapsed stacks для flamegraph.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append('{}:{}'.format(
+                    frame.f_globals.get('__name__', '?'),
+                    frame.f_code.co_name
+                ))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in self.stacks.items()
+        )
+
+
+def profile_path(profile_id, kind):
+    return os.path.join(settings.PROFILING_DIR, f'{profile_id}.{kind}')
+
+
+def save_profile(profiler, sampler, metadata):
+    """
+    Записывает pstats, collapsed stacks и описание профиля
+    и удаляет самые старые профили сверх PROFILING_MAX_PROFILES.
+    """
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    profile_id = uuid.uuid4().hex
+    profiler.dump_stats(profile_path(profile_id, PSTATS))
+    with open(profile_path(profile_id, COLLAPSED), 'w') as collapsed:
+        collapsed.write(sampler.collapsed())
+    # Описание пишется последним: профиль без него не виден в списке.
+    with open(
+        profile_path(profile_id, METADATA), 'w', encoding='utf-8'
+    ) as output:
+        json.dump(
+            {'id': profile_id, 'created': time.time(), **metadata},
+            output,
+            ensure_ascii=False
+        )
+    for stale in list_profiles()[settings.PROFILING_MAX_PROFILES:]:
+        delete_profile(stale['id'])
+    return profile_id
+
+
+def get_profile(profile_id):
+    """Описание профиля вместе с SQL-запросами или None."""
+    if not PROFILE_ID.match(profile_id):
+        return None
+    try:
+        with open(
+            profile_path(profile_id, METADATA), encoding='utf-8'
+        ) as metadata:
+            return json.load(metadata)
+    except (OSError, ValueError):
+        return None
+
+
+def list_profiles():
+    """Описания профилей без SQL-запросов, новые первыми."""
+    try:
+        names = os.listdir(settings.PROFILING_DIR)
+    except FileNotFoundError:
+        return []
+    profiles = [
+        profile for profile in (
+            get_profile(name[:-len(METADATA) - 1]) for name in names
+            if name.endswith(f'.{METADATA}')
+        ) if profile is not None
+    ]
+    for profile in profiles:
+        profile.pop('sql', None)
+    return sorted(profiles, key=lambda profile: -profile['created'])
+
+
+def delete_profile(profile_id):
+    for kind in (METADATA, PSTATS, COLLAPSED):
+        try:
+            os.remove(profile_path(profile_id, kind))
+        except FileNotFoundError:
+            pass
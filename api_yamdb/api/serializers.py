@@ -1,22 +1,19 @@
 from api.validators import validate_username
 from django.conf import settings
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from rest_framework.validators import UniqueValidator
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (Category, Comment, Genre, Ranking, Review, Title,
+                            User)
 
 
 class UserSerializer(serializers.ModelSerializer):
     """Сериализатор для модели пользователей."""
     username = serializers.CharField(
         max_length=settings.FIELDS_LENGTH['USERNAME'],
-        validators=[
-            validate_username,
-            UniqueValidator(queryset=User.objects.all())
-        ]
+        validators=[validate_username]
     )
     email = serializers.EmailField(
-        max_length=settings.FIELDS_LENGTH['EMAIL'],
-        validators=[UniqueValidator(queryset=User.objects.all())]
+        max_length=settings.FIELDS_LENGTH['EMAIL']
     )
 
     class Meta:
@@ -31,6 +28,40 @@ class UserSerializer(serializers.ModelSerializer):
         ]
         lookup_field = 'username'
 
+    def create(self, validated_data):
+        return self.save_unique(super().create, validated_data)
+
+    def update(self, instance, validated_data):
+        return self.save_unique(super().update, instance, validated_data)
+
+    def save_unique(self, save, *args):
+        """
+        Сохраняет пользователя без предварительных проверок занятости
+        username и email: дубликат распознается по IntegrityError
+        от уникальных индексов БД.
+        """
+        try:
+            with transaction.atomic():
+                return save(*args)
+        except IntegrityError:
+            errors = self.get_duplicate_errors()
+            if not errors:
+                # Нарушено другое ограничение, это не ошибка данных.
+                raise
+            raise serializers.ValidationError(errors)
+
+    def get_duplicate_errors(self):
+        users = User.objects.all()
+        if self.instance is not None:
+            users = users.exclude(pk=self.instance.pk)
+        return {
+            field: ['Пользователь с таким значением уже существует.']
+            for field in ('username', 'email')
+            if field in self.validated_data and users.filter(
+                **{field: self.validated_data[field]}
+            ).exists()
+        }
+
 
 class RegisterSerializer(serializers.Serializer):
     """Сериализатор для регистрации пользователей."""
@@ -123,17 +154,69 @@ class TitleWriteSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        fields = '__all__'
+        fields = ('id', 'name', 'year', 'description', 'genre', 'category')
         model = Title
 
 
+class TitleStatsSerializer(serializers.Serializer):
+    """Сериализатор распределения оценок произведения."""
+    id = serializers.IntegerField()
+    count = serializers.IntegerField()
+    mean = serializers.FloatField(allow_null=True)
+    histogram = serializers.DictField(child=serializers.IntegerField())
+    percentiles = serializers.DictField(
+        child=serializers.IntegerField(allow_null=True)
+    )
+
+
+class TitleStatsQuerySerializer(serializers.Serializer):
+    """Параметры запроса статистики нескольких произведений."""
+    ids = serializers.CharField()
+
+    def validate_ids(self, value):
+        try:
+            ids = [int(title_id) for title_id in value.split(',')]
+        except ValueError:
+            raise serializers.ValidationError(
+                'Укажите id произведений через запятую.'
+            )
+        if len(ids) > settings.TITLE_STATS_MAX_IDS:
+            raise serializers.ValidationError(
+                'Можно запросить не больше '
+                f'{settings.TITLE_STATS_MAX_IDS} произведений.'
+            )
+        return list(dict.fromkeys(ids))
+
+
 class TitleGetSerializer(serializers.ModelSerializer):
     """Сериализатор для просмотра произведений."""
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
-    rating = serializers.FloatField(source='reviews__score__avg',
-                                    read_only=True)
 
     class Meta:
-        fields = '__all__'
+        fields = (
+            'id', 'name', 'year', 'rating', 'description', 'genre', 'category'
+        )
         model = Title
+
+
+class RankingQuerySerializer(serializers.Serializer):
+    """Параметры запроса рейтинга: категория или жанр."""
+    category = serializers.SlugField(required=False)
+    genre = serializers.SlugField(required=False)
+
+    def validate(self, data):
+        if 'category' in data and 'genre' in data:
+            raise serializers.ValidationError(
+                'Укажите категорию или жанр, но не оба параметра.'
+            )
+        return data
+
+
+class RankingSerializer(serializers.ModelSerializer):
+    """Сериализатор места произведения в рейтинге."""
+    title = TitleGetSerializer()
+
+    class Meta:
+        fields = ('position', 'score', 'title')
+        model = Ranking
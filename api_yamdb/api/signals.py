@@ -0,0 +1,58 @@
+from functools import partial
+
+from api.authentication import forget_user
+from api.cache import invalidate
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+# Группы кэша ответов, которые зависят от модели.
+CACHE_GROUPS = {
+    Category: ('categories', 'titles'),
+    Genre: ('genres', 'titles'),
+    Title: ('titles',),
+    GenreTitle: ('titles',),
+    Review: ('titles',),
+    Comment: (),
+}
+# Группы, которые зависят от конкретного объекта.
+INSTANCE_GROUPS = {
+    Review: lambda review: (f'reviews:{review.title_id}',),
+    Comment: lambda comment: (f'comments:{comment.review_id}',),
+}
+# Группы вложенных списков, которые пропадают вместе с объектом:
+# устаревший ETag такого списка должен получить 404, а не 304.
+DELETE_GROUPS = {
+    Title: lambda title: (f'reviews:{title.pk}',),
+    Review: lambda review: (f'comments:{review.pk}',),
+}
+
+
+def invalidate_cache(sender, instance=None, signal=None, **kwargs):
+    """Сбрасывает кэш ответов после фиксации транзакции."""
+    groups = CACHE_GROUPS[sender]
+    if sender in INSTANCE_GROUPS:
+        groups += INSTANCE_GROUPS[sender](instance)
+    if signal is post_delete and sender in DELETE_GROUPS:
+        groups += DELETE_GROUPS[sender](instance)
+    transaction.on_commit(partial(invalidate, *groups))
+
+
+for model in CACHE_GROUPS:
+    post_save.connect(invalidate_cache, sender=model)
+    # Обработчик удаления комментария отключил бы быстрое удаление
+    # комментариев каскадом: их группы сбрасывает удаление отзыва,
+    # а одиночное удаление - CommentViewSet.perform_destroy.
+    if model is not Comment:
+        post_delete.connect(invalidate_cache, sender=model)
+m2m_changed.connect(invalidate_cache, sender=Title.genre.through)
+
+
+def forget_cached_user(sender, instance, **kwargs):
+    """Убирает пользователя из кэша аутентификации этого процесса."""
+    forget_user(instance.pk)
+
+
+post_save.connect(forget_cached_user, sender=User)
+post_delete.connect(forget_cached_user, sender=User)
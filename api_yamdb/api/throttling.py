@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class CounterRateThrottle(SimpleRateThrottle):
+    """
+    Ограничение частоты запросов счетчиком в фиксированном окне.
+
+    Вместо списка времен запросов, который SimpleRateThrottle читает
+    и перезаписывает целиком, в кэше хранится одно число на окно,
+    увеличиваемое атомарным incr. Кэш задается THROTTLE_CACHE_ALIAS:
+    память процесса по умолчанию, memcached или redis для нескольких
+    воркеров.
+    """
+
+    def __init__(self):
+        self.cache = caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{super().get_ident(request)}'
+
+    def get_cache_key(self, request, view):
+        return f'throttle:{self.scope}:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(request, view)
+        self.rate = self.get_rate() if self.scope else None
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.window_end = (window + 1) * self.duration
+        key = f'{self.get_cache_key(request, view)}:{window}'
+        if self.cache.add(key, 1, self.duration):
+            return True
+        try:
+            count = self.cache.incr(key)
+        except ValueError:
+            # Окно истекло между add и incr.
+            self.cache.add(key, 1, self.duration)
+            return True
+        return count <= self.num_requests
+
+    def wait(self):
+        return self.window_end - self.now
+
+
+class RoleRateThrottle(CounterRateThrottle):
+    """Общий лимит запросов: anon, user, moderator или admin."""
+
+    def get_scope(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return 'anon'
+        if user.is_superuser:
+            return 'admin'
+        return user.role
+
+
+class ScopedCounterRateThrottle(CounterRateThrottle):
+    """Лимит отдельной операции из атрибута throttle_scope view."""
+
+    def get_scope(self, request, view):
+        return getattr(view, 'throttle_scope', None)
@@ -1,6 +1,7 @@
-from api.views import (AuthTokenView, AuthView, CategoryViewSet,
-                       CommentViewSet, GenreViewSet, ReviewViewSet,
-                       TitleViewSet, UserViewSet)
+from api.views import (AuthTokenView, AuthView, CacheStatsView,
+                       CategoryViewSet, CommentViewSet, GenreViewSet,
+                       ProfileViewSet, ReviewViewSet, TitleViewSet,
+                       UserViewSet)
 from django.urls import include, path
 from rest_framework.routers import SimpleRouter
 
@@ -19,10 +20,12 @@ v1_router.register('users', UserViewSet, basename='user')
 v1_router.register('categories', CategoryViewSet, basename='category')
 v1_router.register('genres', GenreViewSet, basename='genre')
 v1_router.register('titles', TitleViewSet, basename='title')
+v1_router.register('profiles', ProfileViewSet, basename='profile')
 
 
 urlpatterns = [
     path('v1/auth/signup/', AuthView.as_view()),
     path('v1/auth/token/', AuthTokenView.as_view()),
+    path('v1/cache/stats/', CacheStatsView.as_view()),
     path('v1/', include(v1_router.urls)),
 ]
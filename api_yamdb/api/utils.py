@@ -1,8 +1,8 @@
-import random
+import secrets
 import string
 
 
 def get_random_string(length=12) -> str:
     return ''.join(
-        random.choice(string.ascii_letters) for i in range(length)
+        secrets.choice(string.ascii_letters) for i in range(length)
     )
@@ -9,7 +9,8 @@ def validate_username(value):
         raise ValidationError(
             'username должен соответствовать шаблону ^[\\w.@+-]+\\z'
         )
-    raise ValidationError(
-        'username не может быть me.'
-    )
+    if value == 'me':
+        raise ValidationError(
+            'username не может быть me.'
+        )
     return value
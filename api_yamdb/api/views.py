@@ -1,24 +1,40 @@
+from datetime import timedelta
+from functools import partial
+
+from api.authentication import ClaimsRefreshToken
+from api.cache import (CacheResponseMixin, ConditionalResponseMixin, get_stats,
+                       invalidate)
 from api.filters import TitleFilter
-from api.permissions import (IsAdmin, IsAdminOrReadOnly,
-                             IsModeratorOrOwnerOrReadOnly)
+from api.mail import queue_email
+from api.metrics import get_registry
+from api.pagination import OptionalKeysetPagination
+from api.permissions import (IsAdmin, IsAdminOrInternalNetwork,
+                             IsAdminOrReadOnly, IsModeratorOrOwnerOrReadOnly)
+from api.profiling import (COLLAPSED, PSTATS, get_profile, list_profiles,
+                           profile_path)
+from api.renderers import PlainTextRenderer
 from api.serializers import (AuthTokenSerializer, CategorySerializer,
                              CommentSerializer, GenreSerializer,
+                             RankingQuerySerializer, RankingSerializer,
                              RegisterSerializer, ReviewSerializer,
-                             TitleGetSerializer, TitleWriteSerializer,
+                             TitleGetSerializer, TitleStatsQuerySerializer,
+                             TitleStatsSerializer, TitleWriteSerializer,
                              UserSerializer)
-from api.utils import get_random_string
 from django.conf import settings
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.http import FileResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from rest_framework import filters, mixins, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.models import (Category, ConfirmationCode, Genre, Ranking, Review,
+                            Title, User, ranking_board)
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -29,35 +45,14 @@ class UserViewSet(viewsets.ModelViewSet):
     lookup_field = 'username'
     lookup_value_regex = '[^/.]+'
 
-    def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        username = serializer.validated_data.get('username')
-        email = serializer.validated_data.get('email')
-        if (
-            self.queryset.filter(email=email).exists()
-            or self.queryset.filter(username=username).exists()
-        ):
-            return Response(
-                {'Такой email существует.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        self.perform_create(serializer)
-        headers = self.get_success_headers(serializer.data)
-        return Response(
-            serializer.data,
-            status=status.HTTP_201_CREATED,
-            headers=headers
-        )
-
     @action(
         detail=False,
         methods=['get', 'patch'],
         permission_classes=[permissions.IsAuthenticated]
     )
     def me(self, request):
-        user = get_object_or_404(User, username=request.user)
-        if self.action == 'patch':
+        user = get_object_or_404(User, pk=request.user.pk)
+        if request.method == 'GET':
             serializer = self.get_serializer(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
         serializer = self.get_serializer(
@@ -80,26 +75,25 @@ class UserViewSet(viewsets.ModelViewSet):
 class AuthView(APIView):
     """View класс для создания пользователя."""
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'signup'
 
-    def send_email(self, user: User) -> Response:
+    def send_email(self, user: User, code: str) -> Response:
         email_body = (
-            'Ваш код подтверждения: {code} \n'.format(
-                code=user.confirmation_code
-            )
+            'Ваш код подтверждения: {code} \n'.format(code=code)
             + 'Получить токен можно через POST запрос, с телом запроса:\n'
             + '    {\n'
             + '      "username": "{name}",\n'.format(name=user.username)
-            + '      "confirmation_code": "{code}"\n'.format(
-                code=user.confirmation_code
-            )
+            + '      "confirmation_code": "{code}"\n'.format(code=code)
             + '    }\n'
             + 'на url /api/v1/auth/token/\n'
         )
-        send_mail(
+        queue_email(
             'Confirmation code from Django',
             email_body,
-            settings.DEFAULT_FROM_EMAIL,
-            (user.email,)
+            user.email,
+            expires_at=timezone.now() + timedelta(
+                seconds=settings.CONFIRMATION_CODE_TTL
+            )
         )
         return Response(
             {
@@ -109,36 +103,36 @@ class AuthView(APIView):
             status=status.HTTP_200_OK
         )
 
+    def get_or_create_user(self, username: str, email: str) -> User:
+        """
+        Создает пользователя одним INSERT. Если username или email заняты,
+        уникальный индекс БД вызывает IntegrityError, и тогда одним
+        запросом ищется пользователь с этой же парой username и email.
+        """
+        try:
+            with transaction.atomic():
+                return User.objects.create(username=username, email=email)
+        except IntegrityError:
+            return User.objects.filter(
+                username=username, email=email
+            ).first()
+
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
-            # Предложенный в ревью вариант использования try/except
-            # не проходит тест при использовании уже существующего
-            # email, пользователь успешно создается, оставил свой вариант.
-            user_exists = User.objects.filter(
-                username=serializer.validated_data['username']
-            ).exists()
-            email_exists = User.objects.filter(
-                email=serializer.validated_data['email']
-            ).exists()
-            if user_exists ^ email_exists:
-                return Response(
-                    'Не корректные данные.',
-                    status=status.HTTP_400_BAD_REQUEST
+            with transaction.atomic():
+                user = self.get_or_create_user(
+                    serializer.validated_data['username'],
+                    serializer.validated_data['email']
+                )
+                if user is None:
+                    return Response(
+                        'Не корректные данные.',
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                return self.send_email(
+                    user, ConfirmationCode.objects.issue(user)
                 )
-            user = get_object_or_404(
-                User,
-                username=request.data['username'])
-            return self.send_email(user)
-
-            user = User.objects.create(
-                username=serializer.validated_data['username'],
-                email=serializer.validated_data['email']
-            )
-            confirmation_code = get_random_string()
-            user.confirmation_code = confirmation_code
-            user.save()
-            return self.send_email(user)
 
         if serializer.errors:
             error = serializer.errors
@@ -153,34 +147,44 @@ class AuthView(APIView):
 class AuthTokenView(APIView):
     """View класс для получения токена."""
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'token'
 
     def post(self, request, *args, **kwargs):
         serializer = AuthTokenSerializer(data=request.data)
         if serializer.is_valid():
-            user = get_object_or_404(
-                User, username=serializer.validated_data.get('username')
+            username = serializer.validated_data['username']
+            user = ConfirmationCode.objects.consume(
+                username, serializer.validated_data['confirmation_code']
             )
-            if user.confirmation_code == serializer.validated_data.get(
-                'confirmation_code'
-            ):
-                refresh = RefreshToken.for_user(user)
+            if user is not None:
+                refresh = ClaimsRefreshToken.for_user(user)
                 return Response(
                     {'token': str(refresh.access_token)},
                     status=status.HTTP_200_OK
                 )
+            get_object_or_404(User, username=username)
         return Response(
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalResponseMixin, viewsets.ModelViewSet):
     """
     Возвращает список всех комментариев к ревью.
     """
     serializer_class = CommentSerializer
     permission_classes = (IsModeratorOrOwnerOrReadOnly,
                           permissions.IsAuthenticatedOrReadOnly)
+    pagination_class = OptionalKeysetPagination
+
+    def get_etag_groups(self):
+        return (f"comments:{self.kwargs.get('review_id')}",)
+
+    def get_throttles(self):
+        if self.action == 'create':
+            self.throttle_scope = 'comment_create'
+        return super().get_throttles()
 
     def get_queryset(self):
         review = get_object_or_404(
@@ -188,7 +192,7 @@ class CommentViewSet(viewsets.ModelViewSet):
             id=self.kwargs.get('review_id'),
             title__id=self.kwargs.get('title_id')
         )
-        return review.comments.all()
+        return review.comments.select_related('author')
 
     def perform_create(self, serializer):
         review = get_object_or_404(
@@ -197,21 +201,36 @@ class CommentViewSet(viewsets.ModelViewSet):
         )
         serializer.save(author=self.request.user, review=review)
 
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        transaction.on_commit(
+            partial(invalidate, f'comments:{instance.review_id}')
+        )
 
-class ReviewViewSet(viewsets.ModelViewSet):
+
+class ReviewViewSet(ConditionalResponseMixin, viewsets.ModelViewSet):
     """
     Возвращает список всех отзывов.
     """
     serializer_class = ReviewSerializer
     permission_classes = (IsModeratorOrOwnerOrReadOnly,
                           permissions.IsAuthenticatedOrReadOnly)
+    pagination_class = OptionalKeysetPagination
+
+    def get_etag_groups(self):
+        return (f"reviews:{self.kwargs.get('title_id')}",)
+
+    def get_throttles(self):
+        if self.action == 'create':
+            self.throttle_scope = 'review_create'
+        return super().get_throttles()
 
     def get_queryset(self):
         title = get_object_or_404(
             Title,
             id=self.kwargs.get('title_id')
         )
-        return title.reviews.all()
+        return title.reviews.select_related('author')
 
     def perform_create(self, serializer):
         title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
@@ -225,8 +244,9 @@ class CreateListDestroyViewSet(mixins.CreateModelMixin,
     pass
 
 
-class CategoryViewSet(CreateListDestroyViewSet):
+class CategoryViewSet(CacheResponseMixin, CreateListDestroyViewSet):
     """ViewSet для доступа к категориям."""
+    cache_groups = ('categories',)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -236,8 +256,9 @@ class CategoryViewSet(CreateListDestroyViewSet):
     lookup_field = 'slug'
 
 
-class GenreViewSet(CreateListDestroyViewSet):
+class GenreViewSet(CacheResponseMixin, CreateListDestroyViewSet):
     """ViewSet для доступа к жанрам."""
+    cache_groups = ('genres',)
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -246,10 +267,38 @@ class GenreViewSet(CreateListDestroyViewSet):
     search_fields = ('=name',)
     lookup_field = 'slug'
 
+    def get_cache_groups(self):
+        if self.action == 'titles':
+            return ('genres', 'titles')
+        return self.cache_groups
+
+    @action(
+        detail=True,
+        methods=['get']
+    )
+    def titles(self, request, slug=None):
+        """
+        Произведения жанра. Выбираются по индексу (genre, title)
+        таблицы связей, жанры и категории подгружаются для всей
+        страницы сразу.
+        """
+        genre = get_object_or_404(Genre, slug=slug)
+        queryset = genre.titles.select_related(
+            'category'
+        ).prefetch_related('genre').order_by('id')
+        page = self.paginate_queryset(queryset)
+        serializer = TitleGetSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
-class TitleViewSet(viewsets.ModelViewSet):
+
+class TitleViewSet(ConditionalResponseMixin, CacheResponseMixin,
+                   viewsets.ModelViewSet):
     """ViewSet для доступа к произведениям."""
-    queryset = Title.objects.all().annotate(Avg('reviews__score'))
+    cache_groups = ('titles',)
+    cache_anonymous_only = True
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
     permission_classes = (IsAdminOrReadOnly,)
     pagination_class = LimitOffsetPagination
     filter_backends = [DjangoFilterBackend]
@@ -259,3 +308,127 @@ class TitleViewSet(viewsets.ModelViewSet):
         if self.action == 'retrieve' or self.action == 'list':
             return TitleGetSerializer
         return TitleWriteSerializer
+
+    def get_cache_groups(self):
+        if self.action in ('top', 'trending'):
+            return (*self.cache_groups, 'rankings')
+        return self.cache_groups
+
+    def get_etag_groups(self):
+        return self.get_cache_groups()
+
+    @action(
+        detail=False,
+        methods=['get']
+    )
+    def top(self, request):
+        """Лучшие произведения по рейтингу: ?category= или ?genre=."""
+        query = RankingQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return self.ranking_response(ranking_board(**query.validated_data))
+
+    @action(
+        detail=False,
+        methods=['get']
+    )
+    def trending(self, request):
+        """Произведения с наибольшим числом отзывов за последнее время."""
+        return self.ranking_response(Ranking.TRENDING)
+
+    def ranking_response(self, board):
+        rankings = Ranking.objects.board(board).select_related(
+            'title__category'
+        ).prefetch_related('title__genre')
+        page = self.paginate_queryset(rankings)
+        return self.get_paginated_response(
+            RankingSerializer(page, many=True).data
+        )
+
+    @action(
+        detail=True,
+        methods=['get']
+    )
+    def stats(self, request, pk=None):
+        """Количество, средняя, гистограмма и процентили оценок."""
+        try:
+            stats = Title.objects.filter(pk=pk).score_stats()
+        except (TypeError, ValueError):
+            stats = {}
+        if not stats:
+            raise NotFound('Произведение не найдено.')
+        return Response(TitleStatsSerializer(stats.popitem()[1]).data)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='stats',
+        url_name='bulk-stats'
+    )
+    def bulk_stats(self, request):
+        """Статистика оценок нескольких произведений: ?ids=1,2,3."""
+        query = TitleStatsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        ids = query.validated_data['ids']
+        stats = Title.objects.filter(pk__in=ids).score_stats()
+        return Response({'results': TitleStatsSerializer(
+            [stats[title_id] for title_id in ids if title_id in stats],
+            many=True
+        ).data})
+
+
+class CacheStatsView(APIView):
+    """View класс для статистики кэша ответов."""
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(get_stats(), status=status.HTTP_200_OK)
+
+
+class MetricsView(APIView):
+    """View класс для метрик в формате Prometheus."""
+    permission_classes = [IsAdminOrInternalNetwork]
+    renderer_classes = [PlainTextRenderer]
+    throttle_classes = []
+
+    def get(self, request):
+        return Response(
+            generate_latest(get_registry()),
+            content_type=CONTENT_TYPE_LATEST
+        )
+
+
+class ProfileViewSet(viewsets.ViewSet):
+    """ViewSet для просмотра и скачивания профилей запросов."""
+    permission_classes = [IsAdmin]
+    lookup_value_regex = '[0-9a-f]{32}'
+
+    def list(self, request):
+        return Response({'results': list_profiles()})
+
+    def retrieve(self, request, pk=None):
+        return Response(self.get_profile(pk))
+
+    @action(detail=True, methods=['get'])
+    def pstats(self, request, pk=None):
+        """Файл pstats для pstats.Stats, snakeviz и подобных."""
+        return self.download(pk, PSTATS, 'application/octet-stream')
+
+    @action(detail=True, methods=['get'])
+    def collapsed(self, request, pk=None):
+        """Стеки в формате collapsed для flamegraph.pl и speedscope."""
+        return self.download(pk, COLLAPSED, 'text/plain; charset=utf-8')
+
+    def get_profile(self, pk):
+        profile = get_profile(pk)
+        if profile is None:
+            raise NotFound('Профиль не найден.')
+        return profile
+
+    def download(self, pk, kind, content_type):
+        self.get_profile(pk)
+        return FileResponse(
+            open(profile_path(pk, kind), 'rb'),
+            as_attachment=True,
+            filename=f'{pk}.{kind}',
+            content_type=content_type
+        )
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -19,6 +20,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'django_filters',
     'reviews',
@@ -26,6 +28,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.TimingMiddleware',
+    'api.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,14 +62,33 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication'
+        'api.authentication.ClaimsJWTAuthentication'
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
-    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend']
+    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    # Число прокси перед приложением (nginx из docker-compose): адрес
+    # клиента для лимитов берется из X-Forwarded-For на этой глубине,
+    # а значения, подставленные самим клиентом, пропускаются.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=1)),
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.RoleRateThrottle',
+        'api.throttling.ScopedCounterRateThrottle',
+    ],
+    # Лимит вида "число/период" (s, m, h, d), пустое значение - без лимита.
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': os.getenv('THROTTLE_RATE_ANON', default='60/min') or None,
+        'user': os.getenv('THROTTLE_RATE_USER', default='120/min') or None,
+        'moderator': os.getenv('THROTTLE_RATE_MODERATOR', default='300/min') or None,
+        'admin': os.getenv('THROTTLE_RATE_ADMIN', default='') or None,
+        'signup': os.getenv('THROTTLE_RATE_SIGNUP', default='5/hour') or None,
+        'token': os.getenv('THROTTLE_RATE_TOKEN', default='10/hour') or None,
+        'review_create': os.getenv('THROTTLE_RATE_REVIEW_CREATE', default='20/hour') or None,
+        'comment_create': os.getenv('THROTTLE_RATE_COMMENT_CREATE', default='60/hour') or None,
+    },
 }
 
 SIMPLE_JWT = {
@@ -79,6 +102,26 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 DEFAULT_FROM_EMAIL = 'no_answer@local.net'
 
+# Очередь исходящих писем: 'thread' - отправка в пуле потоков процесса,
+# 'worker' - отправка командой sendqueuedemails.
+EMAIL_QUEUE_MODE = os.getenv('EMAIL_QUEUE_MODE', default='thread')
+EMAIL_QUEUE_THREADS = int(os.getenv('EMAIL_QUEUE_THREADS', default=1))
+EMAIL_QUEUE_BATCH_SIZE = int(os.getenv('EMAIL_QUEUE_BATCH_SIZE', default=100))
+EMAIL_QUEUE_RETRY_DELAY = int(os.getenv('EMAIL_QUEUE_RETRY_DELAY', default=10))
+EMAIL_QUEUE_MAX_ATTEMPTS = int(
+    os.getenv('EMAIL_QUEUE_MAX_ATTEMPTS', default=5)
+)
+# Через сколько секунд письмо, не отмеченное воркером как отправленное,
+# снова попадает в очередь.
+EMAIL_QUEUE_CLAIM_TIMEOUT = int(
+    os.getenv('EMAIL_QUEUE_CLAIM_TIMEOUT', default=300)
+)
+# Сколько секунд хранятся отправленные и неотправленные письма,
+# удаляет их sendqueuedemails --purge.
+EMAIL_QUEUE_RETENTION = int(
+    os.getenv('EMAIL_QUEUE_RETENTION', default=7 * 24 * 60 * 60)
+)
+
 FIELDS_LENGTH = {
     'USERNAME': 150,
     'EMAIL': 254,
@@ -100,6 +143,102 @@ DATABASES = {
 }
 
 
+# Cache
+
+# Общий Redis для кэша ответов API и счетчиков ограничения частоты,
+# например redis://redis:6379/0. Кэш в памяти процесса без него
+# не видит изменений из других воркеров gunicorn и менеджмент-команд,
+# поэтому подходит только для разработки и тестов.
+REDIS_URL = os.getenv('REDIS_URL', default='')
+SHARED_CACHE_BACKEND = (
+    'django_redis.cache.RedisCache' if REDIS_URL
+    else 'django.core.cache.backends.locmem.LocMemCache'
+)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Кэш ответов API.
+    'api': {
+        'BACKEND': os.getenv('API_CACHE_BACKEND', default=SHARED_CACHE_BACKEND),
+        'LOCATION': os.getenv('API_CACHE_LOCATION', default=REDIS_URL or 'api'),
+        'KEY_PREFIX': 'api',
+        'TIMEOUT': int(os.getenv('API_CACHE_TIMEOUT', default=300)),
+    },
+    # Счетчики ограничения частоты запросов, нужен атомарный incr.
+    'throttle': {
+        'BACKEND': os.getenv('THROTTLE_CACHE_BACKEND', default=SHARED_CACHE_BACKEND),
+        'LOCATION': os.getenv('THROTTLE_CACHE_LOCATION', default=REDIS_URL or 'throttle'),
+        'KEY_PREFIX': 'throttle',
+    },
+}
+
+API_CACHE_ALIAS = 'api'
+THROTTLE_CACHE_ALIAS = 'throttle'
+
+# Наибольшее количество произведений в запросе /titles/stats/?ids=.
+TITLE_STATS_MAX_IDS = 100
+
+# Рейтинги произведений: мест в каждом рейтинге, минимум отзывов
+# для рейтинга по оценкам и окно trending в секундах.
+RANKING_SIZE = int(os.getenv('RANKING_SIZE', default=100))
+RANKING_MIN_REVIEWS = int(os.getenv('RANKING_MIN_REVIEWS', default=1))
+RANKING_TRENDING_WINDOW = int(
+    os.getenv('RANKING_TRENDING_WINDOW', default=7 * 24 * 60 * 60)
+)
+
+# Время действия кода подтверждения в секундах.
+CONFIRMATION_CODE_TTL = int(
+    os.getenv('CONFIRMATION_CODE_TTL', default=24 * 60 * 60)
+)
+
+# Запросы дольше SLOW_REQUEST_MS миллисекунд пишутся в журнал
+# api.timing.slow вместе с SLOW_REQUEST_MAX_QUERIES самыми долгими SQL.
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', default=500))
+SLOW_REQUEST_MAX_QUERIES = 20
+
+# Сети, из которых /metrics доступен без токена администратора.
+METRICS_ALLOWED_NETWORKS = [
+    network.strip() for network in os.getenv(
+        'METRICS_ALLOWED_NETWORKS', default='127.0.0.1/32,::1/128'
+    ).split(',') if network.strip()
+]
+
+# Профилирование запросов: администратор с заголовком X-Profile
+# или доля PROFILING_SAMPLE_RATE всех запросов, стек снимается
+# раз в PROFILING_SAMPLE_INTERVAL секунд.
+PROFILING_ENABLED = os.getenv(
+    'PROFILING_ENABLED', default=''
+).lower() in ('1', 'true', 'yes')
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', default=0))
+PROFILING_SAMPLE_INTERVAL = float(
+    os.getenv('PROFILING_SAMPLE_INTERVAL', default=0.005)
+)
+PROFILING_DIR = os.getenv(
+    'PROFILING_DIR', default=os.path.join(tempfile.gettempdir(), 'yamdb-profiles')
+)
+PROFILING_MAX_PROFILES = int(os.getenv('PROFILING_MAX_PROFILES', default=100))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.timing': {
+            'handlers': ['console'],
+            'level': os.getenv('REQUEST_LOG_LEVEL', default='INFO'),
+        },
+    },
+}
+
+# Кэш пользователей для аутентификации запросов на запись.
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', default=30))
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', default=1024))
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
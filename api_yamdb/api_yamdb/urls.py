@@ -1,3 +1,4 @@
+from api.views import MetricsView
 from django.contrib import admin
 from django.urls import include, path
 from django.views.generic import TemplateView
@@ -10,4 +11,5 @@ urlpatterns = [
         name='redoc'
     ),
     path('api/', include('api.urls')),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
@@ -0,0 +1,19 @@
+import os
+import shutil
+
+# Метрики воркеров пишутся в файлы каталога PROMETHEUS_MULTIPROC_DIR
+# и суммируются при запросе /metrics.
+MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+
+def on_starting(server):
+    """Удаляет файлы метрик прошлого запуска."""
+    if MULTIPROC_DIR:
+        shutil.rmtree(MULTIPROC_DIR, ignore_errors=True)
+        os.makedirs(MULTIPROC_DIR)
+
+
+def child_exit(server, worker):
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,274 @@
+import json
+import math
+import time
+import tracemalloc
+from collections import namedtuple
+from itertools import count
+
+from api.authentication import ClaimsRefreshToken
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from reviews.management.routes import get_read_routes
+from reviews.models import Comment, ConfirmationCode, Review, Title, User
+
+DEFAULT_REPEAT: int = 20
+DEFAULT_THRESHOLD: float = 0.2
+DEFAULT_BATCH_SIZE: int = 5000
+METRICS = ('p50_ms', 'p95_ms', 'queries', 'memory_kib')
+
+# Отдельные кэши ответов и счетчиков лимитов: замер не задевает
+# кэш рабочего окружения.
+BENCHMARK_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'api': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmarkapi',
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmarkapi-throttle',
+    },
+}
+
+# Маршрут замера: data - функция, которая готовит тело POST-запроса,
+# None для GET; admin - запрос с токеном администратора.
+Route = namedtuple('Route', ['name', 'url', 'data', 'admin'])
+
+
+def percentile(values, rank):
+    """Процентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(rank * len(ordered) / 100) - 1, 0)]
+
+
+class Command(BaseCommand):
+    """
+    Обработчик менеджмент-команды, которая выполняет запросы ко всем
+    маршрутам API через тестовый клиент и измеряет время ответа,
+    количество запросов к БД и пиковую память на запрос. Результаты
+    можно сохранить как эталон и сравнивать с ним последующие замеры.
+    """
+    help = 'Измеряет время ответа, запросы к БД и память маршрутов API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--generate',
+            action='store_true',
+            help='Перед замером заполнить пустую БД командой generatedata.'
+        )
+        parser.add_argument('--titles', type=int, default=100000)
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=1000000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Начальное значение генератора случайных чисел.'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=DEFAULT_REPEAT,
+            help='Количество замеров времени ответа каждого маршрута.'
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл, в который записываются результаты в формате JSON.'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Файл эталонных результатов для сравнения.'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=DEFAULT_THRESHOLD,
+            help='Допустимый рост времени ответа и памяти, доля от эталона.'
+        )
+        parser.add_argument(
+            '--metrics',
+            nargs='+',
+            choices=METRICS,
+            default=METRICS,
+            help=(
+                'Показатели, которые сравниваются с эталоном. Время '
+                'зависит от машины, поэтому в CI сравниваются только '
+                'запросы к БД.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        if options['generate']:
+            call_command(
+                'generatedata',
+                titles=options['titles'],
+                users=options['users'],
+                reviews=options['reviews'],
+                comments=options['comments'],
+                batch_size=options['batch_size'],
+                seed=options['seed'],
+                stdout=self.stdout
+            )
+        results = {
+            'database': connection.vendor,
+            'rows': {
+                model._meta.model_name: model.objects.count()
+                for model in (Title, Review, Comment, User)
+            },
+            'routes': self.run(options['repeat']),
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            self.compare(
+                results, options['baseline'], options['threshold'],
+                options['metrics']
+            )
+
+    def run(self, repeat):
+        results = {}
+        failures = []
+        rest_framework = {
+            **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}
+        }
+        with override_settings(
+            CACHES=BENCHMARK_CACHES,
+            REST_FRAMEWORK=rest_framework,
+            EMAIL_QUEUE_MODE='worker'
+        ), transaction.atomic():
+            admin = User.objects.create(
+                username='benchmark-admin',
+                email='benchmark-admin@yamdb.fake',
+                role=User.ADMIN
+            )
+            clients = {
+                False: Client(),
+                True: Client(HTTP_AUTHORIZATION='Bearer {}'.format(
+                    ClaimsRefreshToken.for_user(admin).access_token
+                )),
+            }
+            for route in self.get_routes(admin):
+                results[route.name], status = self.measure(
+                    clients[route.admin], route, repeat
+                )
+                if status >= 400:
+                    failures.append(f'{route.name}: статус {status}')
+                self.stdout.write(
+                    '{name:<24} p50 {p50_ms:8.2f} мс  p95 {p95_ms:8.2f} мс  '
+                    'запросов {queries:3}  память {memory_kib:9.1f} КиБ'
+                    .format(name=route.name, **results[route.name])
+                )
+            # Пользователи, коды и письма, созданные замером, не сохраняются.
+            transaction.set_rollback(True)
+        if failures:
+            raise CommandError('\n'.join(failures))
+        return results
+
+    def get_routes(self, admin):
+        """Маршруты на чтение, администрирования, регистрации и токена."""
+        numbers = count()
+
+        def signup_data():
+            number = next(numbers)
+            return {
+                'username': f'benchmark{number}',
+                'email': f'benchmark{number}@yamdb.fake',
+            }
+
+        routes = [
+            Route(name, url, None, False) for name, url in get_read_routes()
+        ]
+        return routes + [
+            Route('users-list', '/api/v1/users/', None, True),
+            Route(
+                'users-detail', f'/api/v1/users/{admin.username}/', None, True
+            ),
+            Route('users-me', '/api/v1/users/me/', None, True),
+            Route('cache-stats', '/api/v1/cache/stats/', None, True),
+            Route('profiles-list', '/api/v1/profiles/', None, True),
+            Route('auth-signup', '/api/v1/auth/signup/', signup_data, False),
+            Route('auth-token', '/api/v1/auth/token/', lambda: {
+                'username': admin.username,
+                'confirmation_code': ConfirmationCode.objects.issue(admin),
+            }, False),
+        ]
+
+    def measure(self, client, route, repeat):
+        """
+        Время ответа по repeat запросам после прогревочного, затем
+        количество запросов к БД и пиковая память по отдельному запросу:
+        трассировка памяти замедляет ответ и не должна влиять на время.
+        Перед каждым запросом кэш ответов очищается.
+        """
+        durations = []
+        self.send(client, route, self.prepare(route))
+        for _ in range(repeat):
+            data = self.prepare(route)
+            start = time.perf_counter()
+            self.send(client, route, data)
+            durations.append(time.perf_counter() - start)
+        data = self.prepare(route)
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as context:
+                response = self.send(client, route, data)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {
+            'p50_ms': round(percentile(durations, 50) * 1000, 3),
+            'p95_ms': round(percentile(durations, 95) * 1000, 3),
+            'queries': len(context.captured_queries),
+            'memory_kib': round(peak / 1024, 1),
+        }, response.status_code
+
+    def prepare(self, route):
+        """Очищает кэш ответов и готовит тело запроса вне замера."""
+        caches[settings.API_CACHE_ALIAS].clear()
+        return route.data() if route.data else None
+
+    def send(self, client, route, data):
+        if data is None:
+            return client.get(route.url)
+        return client.post(route.url, data, content_type='application/json')
+
+    def compare(self, results, path, threshold, compared=METRICS):
+        """
+        Сравнивает показатели compared с эталоном. Количество запросов
+        к БД не должно расти, время ответа и память - больше чем
+        на threshold.
+        """
+        with open(path, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get('rows') != results['rows']:
+            self.stderr.write(
+                'Количество строк отличается от эталона: '
+                f"{baseline.get('rows')} -> {results['rows']}"
+            )
+        baseline = baseline['routes']
+        regressions = [
+            f'{name}: {metric} {baseline[name][metric]} -> {value}'
+            for name, metrics in results['routes'].items()
+            if name in baseline
+            for metric, value in metrics.items()
+            if metric in compared and value > baseline[name][metric] * (
+                1 if metric == 'queries' else 1 + threshold
+            )
+        ]
+        if regressions:
+            raise CommandError(
+                'Результаты хуже эталона:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Результаты не хуже эталона.'
+        ))
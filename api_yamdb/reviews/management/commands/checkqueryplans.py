@@ -0,0 +1,173 @@
+import json
+import re
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from reviews.management.routes import get_read_routes
+
+DEFAULT_MIN_ROWS: int = 1000
+
+# Отдельные пустые кэши ответов и счетчиков лимитов: каждый адрес
+# запрашивается один раз, поэтому все запросы доходят до БД,
+# а лимиты рабочего окружения не расходуются.
+NO_API_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'api': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'checkqueryplans',
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'checkqueryplans-throttle',
+    },
+}
+
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)\b(?! USING)')
+SQLITE_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+# Поиск подстроки (LIKE '%...%') обслуживают триграммные GIN индексы
+# PostgreSQL, в других БД такие маршруты по умолчанию не проверяются.
+SUBSTRING_SEARCH_ROUTES = (
+    'categories-search', 'titles-filter-name', 'titles-search'
+)
+
+
+class Command(BaseCommand):
+    """
+    Обработчик менеджмент-команды, которая выполняет запросы на чтение
+    ко всем viewset'ам API, строит план каждого SQL-запроса и завершается
+    с ошибкой, если найдено последовательное сканирование большой таблицы.
+    """
+    help = 'Проверяет планы SQL-запросов API на последовательные сканы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=DEFAULT_MIN_ROWS,
+            help='Размер таблицы, начиная с которого скан считается ошибкой.'
+        )
+        parser.add_argument(
+            '--exclude',
+            nargs='*',
+            help=(
+                'Имена маршрутов, которые не проверяются. По умолчанию '
+                'без PostgreSQL пропускается поиск подстроки.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        self.min_rows = options['min_rows']
+        exclude = options['exclude']
+        if exclude is None:
+            exclude = (
+                () if connection.vendor == 'postgresql'
+                else SUBSTRING_SEARCH_ROUTES
+            )
+        self.tables = set(connection.introspection.table_names())
+        self.table_sizes = {}
+        failures = []
+        client = Client()
+        with override_settings(CACHES=NO_API_CACHE):
+            caches[settings.API_CACHE_ALIAS].clear()
+            caches[settings.THROTTLE_CACHE_ALIAS].clear()
+            for name, url in get_read_routes():
+                if name in exclude:
+                    continue
+                with CaptureQueriesContext(connection) as context:
+                    response = client.get(url)
+                if response.status_code != 200:
+                    self.stderr.write(f'{url}: статус {response.status_code}')
+                    continue
+                scans = [
+                    (table, query['sql'])
+                    for query in context.captured_queries
+                    for table in self.scanned_tables(query['sql'])
+                    if self.table_size(table) >= self.min_rows
+                ]
+                self.stdout.write(
+                    f'{url}: {len(context.captured_queries)} запросов, '
+                    f'последовательных сканов: {len(scans)}'
+                )
+                failures += [(url, table, sql) for table, sql in scans]
+        if failures:
+            raise CommandError('\n'.join(
+                f'{url}: Seq Scan по {table}\n    {sql}'
+                for url, table, sql in failures
+            ))
+
+    def scanned_tables(self, sql):
+        """
+        Таблицы, которые план запроса читает последовательно, отбрасывая
+        строки по условию или сортируя их целиком для ORDER BY.
+        Скан без условия и сортировки (COUNT(*) для пагинации,
+        первая страница в порядке первичного ключа) ошибкой не считается.
+        """
+        if not sql.lstrip().upper().startswith('SELECT'):
+            return []
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # На маленькой таблице планировщик выбирает Seq Scan
+                # и при наличии индекса, поэтому сканы запрещаются:
+                # оставшиеся означают, что подходящего индекса нет.
+                cursor.execute('SET enable_seqscan = off')
+                try:
+                    cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                    plan = cursor.fetchone()[0]
+                finally:
+                    cursor.execute('RESET enable_seqscan')
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return list(self.walk_plan(plan[0]['Plan']))
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                details = [row[-1] for row in cursor.fetchall()]
+                if ' WHERE ' not in sql and not any(
+                    detail.startswith(SQLITE_SORT) for detail in details
+                ):
+                    return []
+                return [
+                    match.group(1)
+                    for match in map(SQLITE_SCAN.match, details)
+                    if match
+                ]
+        return []
+
+    def walk_plan(self, node, sorted_rows=False):
+        node_type = node.get('Node Type')
+        if node_type == 'Seq Scan' and ('Filter' in node or sorted_rows):
+            yield node['Relation Name']
+        # Без Seq Scan планировщик читает целиком любой индекс таблицы,
+        # отбрасывая строки по условию, - это тот же скан.
+        elif node_type in ('Index Scan', 'Index Only Scan') and (
+            'Filter' in node and 'Index Cond' not in node
+        ):
+            yield node['Relation Name']
+        sorted_rows = sorted_rows or node.get('Node Type') in (
+            'Sort', 'Incremental Sort'
+        )
+        for child in node.get('Plans', ()):
+            yield from self.walk_plan(child, sorted_rows)
+
+    def table_size(self, table):
+        """
+        Количество строк таблицы, но не больше min_rows: точный подсчет
+        с LIMIT не зависит от статистики планировщика (reltuples до
+        ANALYZE равен 0) и не читает большую таблицу целиком.
+        """
+        if table not in self.tables:
+            # Подзапросы и временные структуры планировщика.
+            return 0
+        if table not in self.table_sizes:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT COUNT(*) FROM (SELECT 1 FROM {} LIMIT %s) limited'
+                    .format(connection.ops.quote_name(table)),
+                    [self.min_rows]
+                )
+                self.table_sizes[table] = cursor.fetchone()[0]
+        return self.table_sizes[table]
@@ -0,0 +1,152 @@
+import csv
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+from os.path import join
+from time import monotonic
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from reviews.management.csvdata import TABLES
+
+from api_yamdb.settings import BASE_DIR
+
+DEFAULT_CHUNK_SIZE: int = 2000
+
+
+class Command(BaseCommand):
+    """
+    Обработчик менеджмент-команды по выгрузке данных из БД в csv-файлы
+    в формате, который читает importcsv. Все таблицы выгружаются
+    из одного снимка БД, так что ссылки между файлами согласованы.
+    """
+    help = 'Выгружает данные из БД в csv-файлы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=join(BASE_DIR, 'export'),
+            help='Каталог для csv-файлов.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Количество строк, читаемых из БД за один раз.'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать файлы gzip.'
+        )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            help='Количество таблиц, выгружаемых одновременно, '
+                 'по умолчанию все.'
+        )
+
+    def handle(self, *args, **options):
+        self.chunk_size = options['chunk_size']
+        self.gzip = options['gzip']
+        path = options['path']
+        os.makedirs(path, exist_ok=True)
+        if connection.vendor != 'postgresql':
+            if (options['jobs'] or 1) > 1:
+                self.stderr.write('Снимок БД нельзя разделить между '
+                                  'соединениями, таблицы будут выгружены '
+                                  'последовательно.')
+            # Одна транзакция на все таблицы дает один снимок данных.
+            with transaction.atomic():
+                for table in TABLES:
+                    self.export_table(
+                        self.iterate_table, table, join(path, table.filename)
+                    )
+            return
+        # Транзакция, экспортировавшая снимок, должна оставаться открытой,
+        # пока потоки не подключатся к нему.
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+            cursor.execute('SELECT pg_export_snapshot()')
+            self.snapshot = cursor.fetchone()[0]
+            self.export_parallel(path, options['jobs'] or len(TABLES))
+
+    def export_parallel(self, path, jobs):
+        """Выгружает таблицы в jobs потоках из общего снимка БД."""
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(
+                    self.export_in_thread, self.copy_table, table,
+                    join(path, table.filename)
+                ): table
+                for table in TABLES
+            }
+        for future, table in futures.items():
+            error = future.exception()
+            if error is not None:
+                raise CommandError(
+                    f'Ошибка выгрузки {table.filename}: {error}'
+                ) from error
+
+    def export_in_thread(self, export_table, table, csv_file):
+        try:
+            self.export_table(export_table, table, csv_file)
+        finally:
+            connection.close()
+
+    def export_table(self, export_table, table, csv_file):
+        if self.gzip:
+            csv_file += '.gz'
+            write_file = gzip.open(csv_file, 'wt', encoding='utf-8',
+                                   newline='')
+        else:
+            write_file = open(csv_file, 'w', encoding='utf-8', newline='')
+        started = monotonic()
+        with write_file:
+            rows = export_table(table, write_file)
+        elapsed = monotonic() - started
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(
+            f'{table.filename}: {rows} строк за {elapsed:.2f} с '
+            f'({rate:.0f} строк/с)'
+        )
+
+    def iterate_table(self, table, write_file):
+        """Выгружает таблицу через ORM, читая ее порциями."""
+        writer = csv.writer(write_file)
+        writer.writerow(table.columns)
+        rows = 0
+        # Порции читаются серверным курсором там, где БД его поддерживает.
+        for row in table.model.objects.order_by('pk').values_list(
+            *table.columns.values()
+        ).iterator(chunk_size=self.chunk_size):
+            writer.writerow(row)
+            rows += 1
+        return rows
+
+    def copy_table(self, table, write_file):
+        """
+        Выгружает таблицу через COPY TO STDOUT в транзакции,
+        подключенной к снимку основного соединения.
+        """
+        quote_name = connection.ops.quote_name
+        meta = table.model._meta
+        sql = (
+            'COPY (SELECT {columns} FROM {table} ORDER BY {pk}) '
+            'TO STDOUT WITH (FORMAT csv, HEADER)'
+        ).format(
+            columns=', '.join(
+                '{} AS {}'.format(
+                    quote_name(meta.get_field(attname).column),
+                    quote_name(column)
+                )
+                for column, attname in table.columns.items()
+            ),
+            table=quote_name(meta.db_table),
+            pk=quote_name(meta.pk.column)
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+            cursor.execute('SET TRANSACTION SNAPSHOT %s', [self.snapshot])
+            cursor.copy_expert(sql, write_file)
+            return cursor.rowcount
@@ -0,0 +1,319 @@
+import csv
+import datetime as dt
+import os
+import random
+from array import array
+from itertools import accumulate, islice
+from os.path import join
+
+from api.cache import ALL_GROUP, invalidate
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from reviews.management.commands.importcsv import insert_rows
+from reviews.management.csvdata import TABLES
+from reviews.models import (MAX_SCORE, MIN_SCORE, Category, Comment, Genre,
+                            Ranking, Review, Title, User)
+
+DEFAULT_BATCH_SIZE: int = 5000
+# Наибольшее количество жанров у одного произведения.
+MAX_GENRES_PER_TITLE: int = 5
+# Доля модераторов среди пользователей.
+MODERATORS_SHARE: float = 0.01
+DAY_SECONDS: int = 24 * 60 * 60
+
+
+def zipf_weights(size, exponent):
+    """Накопленные веса рангов 1..size по закону Ципфа."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)
+    ))
+
+
+def zipf_counts(total, size, exponent, cap=None):
+    """
+    Раскладывает total объектов по size корзинам: корзина ранга k
+    получает долю, пропорциональную 1 / k ** exponent, но не больше cap.
+    Каждая корзина получает свою долю от остатка, поэтому сумма
+    равна total, а лишнее сверх cap уходит следующим корзинам.
+    """
+    weights = [1 / rank ** exponent for rank in range(1, size + 1)]
+    remaining_weight = sum(weights)
+    remaining = total
+    counts = []
+    for weight in weights:
+        share = round(remaining * weight / remaining_weight)
+        if cap is not None:
+            share = min(share, cap)
+        counts.append(share)
+        remaining -= share
+        remaining_weight -= weight
+    return counts
+
+
+class Command(BaseCommand):
+    """
+    Обработчик менеджмент-команды, которая генерирует синтетические
+    данные с перекосом, как в рабочей базе: количество отзывов
+    на произведение, комментариев на отзыв и жанров на произведение,
+    а также популярность категорий, жанров и активность комментаторов
+    распределены по закону Ципфа. Данные зависят только от --seed
+    и --end-date и записываются в БД или в csv-файлы для importcsv.
+    """
+    help = 'Генерирует синтетические данные для нагрузочного тестирования.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=100000)
+        parser.add_argument('--reviews', type=int, default=1000000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument(
+            '--exponent',
+            type=float,
+            default=1.0,
+            help='Показатель распределения Ципфа.'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='За сколько дней до --end-date распределены даты отзывов.'
+        )
+        parser.add_argument(
+            '--end-date',
+            type=dt.date.fromisoformat,
+            default=dt.date.today(),
+            help='Дата, до которой генерируются отзывы, по умолчанию сегодня.'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Начальное значение генератора случайных чисел.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество строк в одном INSERT.'
+        )
+        parser.add_argument(
+            '--output-dir',
+            help='Записать csv-файлы в каталог вместо загрузки в БД.'
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.rnd = random.Random(options['seed'])
+        self.end = dt.datetime.combine(
+            options['end_date'], dt.time(), dt.timezone.utc
+        )
+        if options['users'] < 1 or options['titles'] < 1:
+            raise CommandError(
+                'Нужен хотя бы один пользователь и одно произведение.'
+            )
+        if options['reviews'] > options['titles'] * options['users']:
+            raise CommandError('Отзывов больше, чем пар произведение - автор.')
+        output_dir = options['output_dir']
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+            self.user_offset = 0
+        else:
+            self.check_empty()
+            self.user_offset = User.objects.aggregate(
+                last=Max('pk')
+            )['last'] or 0
+        generators = {
+            'users.csv': self.generate_users,
+            'category.csv': self.generate_categories,
+            'genre.csv': self.generate_genres,
+            'titles.csv': self.generate_titles,
+            'genre_title.csv': self.generate_genre_titles,
+            'review.csv': self.generate_reviews,
+            'comments.csv': self.generate_comments,
+        }
+        for table in TABLES:
+            rows = generators[table.filename]()
+            if output_dir:
+                written = self.write_csv(
+                    table, rows, join(output_dir, table.filename)
+                )
+            else:
+                written = self.write_db(table, rows)
+            self.stdout.write(f'{table.filename}: {written} строк')
+        if not output_dir:
+            self.finish_db()
+
+    def check_empty(self):
+        for model in (Category, Genre, Title, Review, Comment):
+            if model.objects.exists():
+                raise CommandError(
+                    f'Таблица {model._meta.db_table} не пуста, данные '
+                    'генерируются в пустую БД или в csv-файлы (--output-dir).'
+                )
+
+    def generate_users(self):
+        for number in range(1, self.options['users'] + 1):
+            user_id = self.user_offset + number
+            yield {
+                'id': user_id,
+                'username': f'user{user_id}',
+                'email': f'user{user_id}@yamdb.fake',
+                'role': (
+                    User.MODERATOR if self.rnd.random() < MODERATORS_SHARE
+                    else User.USER
+                ),
+                'bio': '',
+                'first_name': '',
+                'last_name': '',
+            }
+
+    def generate_categories(self):
+        for category_id in range(1, self.options['categories'] + 1):
+            yield {
+                'id': category_id,
+                'name': f'Категория {category_id}',
+                'slug': f'category-{category_id}',
+            }
+
+    def generate_genres(self):
+        for genre_id in range(1, self.options['genres'] + 1):
+            yield {
+                'id': genre_id,
+                'name': f'Жанр {genre_id}',
+                'slug': f'genre-{genre_id}',
+            }
+
+    def generate_titles(self):
+        categories = range(1, self.options['categories'] + 1)
+        weights = zipf_weights(len(categories), self.options['exponent'])
+        for title_id in range(1, self.options['titles'] + 1):
+            yield {
+                'id': title_id,
+                'name': f'Произведение {title_id}',
+                'year': self.rnd.randint(1900, self.end.year),
+                'category': self.rnd.choices(
+                    categories, cum_weights=weights
+                )[0] if categories else None,
+            }
+
+    def generate_genre_titles(self):
+        genres = range(1, self.options['genres'] + 1)
+        if not genres:
+            return
+        exponent = self.options['exponent']
+        genre_weights = zipf_weights(len(genres), exponent)
+        sizes = range(1, min(MAX_GENRES_PER_TITLE, len(genres)) + 1)
+        size_weights = zipf_weights(len(sizes), exponent)
+        row_id = 0
+        for title_id in range(1, self.options['titles'] + 1):
+            size = self.rnd.choices(sizes, cum_weights=size_weights)[0]
+            title_genres = set()
+            while len(title_genres) < size:
+                title_genres.add(
+                    self.rnd.choices(genres, cum_weights=genre_weights)[0]
+                )
+            for genre_id in sorted(title_genres):
+                row_id += 1
+                yield {
+                    'id': row_id, 'title_id': title_id, 'genre_id': genre_id
+                }
+
+    def generate_reviews(self):
+        """
+        Отзывы по произведениям, ранги популярности которых перемешаны.
+        Авторы у произведения разные, оценки группируются вокруг
+        своей средней для каждого произведения.
+        """
+        titles, users = self.options['titles'], self.options['users']
+        counts = zipf_counts(
+            self.options['reviews'], titles, self.options['exponent'], users
+        )
+        title_ids = list(range(1, titles + 1))
+        self.rnd.shuffle(title_ids)
+        # Смещения дат отзывов нужны для дат комментариев.
+        self.review_offsets = array('l')
+        review_id = 0
+        for title_id, count in zip(title_ids, counts):
+            mean = self.rnd.uniform(MIN_SCORE + 2, MAX_SCORE - 1)
+            for author in self.rnd.sample(range(1, users + 1), count):
+                review_id += 1
+                offset = self.rnd.randrange(
+                    self.options['days'] * DAY_SECONDS + 1
+                )
+                self.review_offsets.append(offset)
+                yield {
+                    'id': review_id,
+                    'title_id': title_id,
+                    'text': f'Отзыв {review_id}',
+                    'author': self.user_offset + author,
+                    'score': min(MAX_SCORE, max(
+                        MIN_SCORE, round(self.rnd.gauss(mean, 2))
+                    )),
+                    'pub_date': self.end - dt.timedelta(seconds=offset),
+                }
+
+    def generate_comments(self):
+        reviews = len(self.review_offsets)
+        if not reviews:
+            return
+        exponent = self.options['exponent']
+        counts = zipf_counts(self.options['comments'], reviews, exponent)
+        review_ids = list(range(1, reviews + 1))
+        self.rnd.shuffle(review_ids)
+        users = range(1, self.options['users'] + 1)
+        # Активные комментаторы тоже распределены по Ципфу.
+        user_weights = zipf_weights(len(users), exponent)
+        comment_id = 0
+        for review_id, count in zip(review_ids, counts):
+            review_offset = self.review_offsets[review_id - 1]
+            for author in self.rnd.choices(
+                users, cum_weights=user_weights, k=count
+            ):
+                comment_id += 1
+                yield {
+                    'id': comment_id,
+                    'review_id': review_id,
+                    'text': f'Комментарий {comment_id}',
+                    'author': self.user_offset + author,
+                    # Комментарий опубликован после своего отзыва.
+                    'pub_date': self.end - dt.timedelta(
+                        seconds=self.rnd.randrange(review_offset + 1)
+                    ),
+                }
+
+    def write_csv(self, table, rows, csv_file):
+        written = 0
+        with open(csv_file, 'w', encoding='utf-8', newline='') as output:
+            writer = csv.DictWriter(output, fieldnames=list(table.columns))
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                written += 1
+        return written
+
+    def write_db(self, table, rows):
+        batch_size = self.options['batch_size']
+        batches = iter(lambda: [
+            {table.columns[column]: value for column, value in row.items()}
+            for row in islice(rows, batch_size)
+        ], [])
+        with transaction.atomic(), connection.cursor() as cursor:
+            return insert_rows(cursor, table, batches)
+
+    def finish_db(self):
+        """
+        Сдвигает последовательности после вставки с явными id,
+        пересчитывает рейтинг и рейтинги произведений, сбрасывает кэш.
+        """
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [table.model for table in TABLES]
+            ):
+                cursor.execute(sql)
+        Title.objects.recalculate_rating()
+        Ranking.objects.refresh(full=True)
+        invalidate(ALL_GROUP)
@@ -1,128 +1,625 @@
 import csv
+import hashlib
+import io
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from itertools import islice
 from os.path import join
+from time import monotonic
 
-from django.core.management.base import BaseCommand
-from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
-                            Title, User)
+from api.cache import ALL_GROUP, invalidate
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from reviews.management.csvdata import TABLES
+from reviews.models import GenreTitle, ImportedFile, Review, Title
 
 from api_yamdb.settings import STATIC_ROOT
 
+DEFAULT_BATCH_SIZE: int = 5000
+# Обозначение NULL в потоке COPY, пустая строка остается пустой строкой.
+COPY_NULL: str = r'\N'
+# Таблицы, изменения которых меняют рейтинг или жанры произведения.
+TITLE_LINKED = (Review, GenreTitle)
+
+
+def file_checksum(csv_file):
+    checksum = hashlib.sha256()
+    with open(csv_file, 'rb') as read_file:
+        for block in iter(lambda: read_file.read(1 << 20), b''):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+
+def auto_timestamp(field):
+    return getattr(field, 'auto_now', False) or getattr(
+        field, 'auto_now_add', False
+    )
+
+
+def default_values(table):
+    """
+    Значения по умолчанию для обязательных полей, которых нет в файле.
+    Поля auto_now и auto_now_add получают текущее время,
+    как при сохранении модели.
+    """
+    now = timezone.now()
+    return {
+        field.column: now if auto_timestamp(field) else field.get_default()
+        for field in table.model._meta.concrete_fields
+        if field.attname not in table.columns.values()
+        and not field.auto_created
+        and (field.has_default() or not field.null)
+    }
+
+
+def insert_rows(cursor, table, chunks):
+    """
+    Вставляет порции словарей атрибутов модели с явными значениями
+    всех колонок, по одному INSERT на порцию, и возвращает число строк.
+    Даты auto_now_add берутся из данных, а не подставляются заново.
+    """
+    meta = table.model._meta
+    attnames = list(table.columns.values())
+    defaults = default_values(table)
+    fields = [meta.get_field(attname) for attname in attnames] + [
+        field for field in meta.concrete_fields if field.column in defaults
+    ]
+    quote_name = connection.ops.quote_name
+    sql = 'INSERT INTO {table} ({columns}) VALUES ({values})'.format(
+        table=quote_name(meta.db_table),
+        columns=', '.join(quote_name(field.column) for field in fields),
+        values=', '.join(['%s'] * len(fields))
+    )
+    rows = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        cursor.executemany(sql, [
+            [
+                field.get_db_prep_save(value, connection)
+                for field, value in zip(fields, (
+                    *(values[attname] for attname in attnames),
+                    *defaults.values()
+                ))
+            ]
+            for values in chunk
+        ])
+        rows += len(chunk)
+    return rows
+
+
+class CopyStream:
+    """
+    Файлоподобный объект, отдающий порции csv для COPY FROM STDIN.
+    Порции передаются парами (текст, количество строк) и хранятся
+    в очереди до чтения, так что каждый символ копируется один раз.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.pending = deque()
+        # Позиция в первой порции очереди и длина непрочитанного текста.
+        self.offset = 0
+        self.available = 0
+        self.rows = 0
+
+    def read(self, size=-1):
+        while size < 0 or self.available < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            text, rows = chunk
+            self.pending.append(text)
+            self.available += len(text)
+            self.rows += rows
+        if size < 0:
+            size = self.available
+        parts = []
+        while size > 0 and self.pending:
+            head = self.pending[0]
+            part = head[self.offset:self.offset + size]
+            parts.append(part)
+            size -= len(part)
+            self.available -= len(part)
+            self.offset += len(part)
+            if self.offset == len(head):
+                self.pending.popleft()
+                self.offset = 0
+        return ''.join(parts)
+
+    readline = read
+
 
 class Command(BaseCommand):
-    """Обработчик менеджмент-команды по импорту csv-данных в БД SQLite."""
+    """Обработчик менеджмент-команды по импорту csv-данных в БД."""
+    help = 'Импортирует тестовые данные из csv-файлов в БД.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=join(STATIC_ROOT, 'data'),
+            help='Каталог с csv-файлами.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество строк в одном INSERT.'
+        )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=1,
+            help='Количество таблиц, загружаемых одновременно.'
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Обновить существующие строки по первичному ключу '
+                 'вместо полной перезагрузки, пропуская неизмененные файлы.'
+        )
+        parser.add_argument(
+            '--delete-missing',
+            action='store_true',
+            help='В режиме --incremental удалить строки, '
+                 'которых нет в файле.'
+        )
+
     def handle(self, *args, **options):
-        data_path = join(STATIC_ROOT, 'data')
-        self.import_users(join(data_path, 'users.csv'))
-        self.import_categories(join(data_path, 'category.csv'))
-        self.import_genres(join(data_path, 'genre.csv'))
-        self.import_titles(join(data_path, 'titles.csv'))
-        self.import_genre_title(join(data_path, 'genre_title.csv'))
-        self.import_review(join(data_path, 'review.csv'))
-        self.import_comments(join(data_path, 'comments.csv'))
-
-    def import_csv_file(self, conn, table_name, csv_file):
-        cur = conn.cursor()
-        header = ''
-        with open(csv_file, 'r', encoding='utf-8') as read_file:
-            reader = csv.reader(read_file)
-            for row in reader:
-                if header == '':
-                    header = ','.join(row)
-                    col_count = len(row)
-                    questions = ['?'] * col_count
-                    questions_str = ','.join(questions)
-                else:
-                    insert_sql_str = (
-                        f'INSERT INTO {table_name} ({header}) '
-                        f'VALUES ({questions_str});'
+        self.batch_size = options['batch_size']
+        self.incremental = options['incremental']
+        self.delete_missing = options['delete_missing']
+        # Загруженные таблицы и произведения, отзывы или жанры которых
+        # добавлены или изменены в режиме --incremental.
+        self.loaded = set()
+        self.changed_titles = set()
+        postgresql = connection.vendor == 'postgresql'
+        if self.incremental:
+            import_table = (
+                self.upsert_copy_table if postgresql
+                else self.upsert_bulk_table
+            )
+            prepared = nullcontext()
+        else:
+            self.clear_tables()
+            import_table = (
+                self.copy_table if postgresql else self.insert_table
+            )
+            prepared = (
+                self.constraints_dropped() if postgresql else nullcontext()
+            )
+        import_table = partial(self.load_table, import_table)
+        jobs = options['jobs']
+        if connection.vendor == 'sqlite' and jobs > 1:
+            self.stderr.write('SQLite допускает одну запись за раз, '
+                              'таблицы будут загружены последовательно.')
+            jobs = 1
+        with prepared:
+            if jobs > 1:
+                self.import_parallel(import_table, options['path'], jobs)
+            else:
+                for table in TABLES:
+                    import_table(table, join(options['path'], table.filename))
+        if not self.loaded:
+            self.stdout.write('Нет изменений')
+            return
+        self.reset_sequences()
+        # Загрузка идет мимо сигналов: после полной загрузки рейтинг
+        # пересчитывается целиком, после инкрементальной - только
+        # у произведений с новыми и измененными отзывами и жанрами,
+        # чтобы refreshrankings увидел их по дате изменения. Удаление
+        # идет через ORM, и рейтинг обновляют сигналы.
+        if self.incremental:
+            self.recalculate_titles(self.changed_titles)
+        else:
+            Title.objects.recalculate_rating()
+        invalidate(ALL_GROUP)
+
+    def recalculate_titles(self, title_ids):
+        title_ids = sorted(title_ids)
+        size = connection.ops.bulk_batch_size(['pk'], title_ids) or 1
+        for start in range(0, len(title_ids), size):
+            Title.objects.filter(
+                pk__in=title_ids[start:start + size]
+            ).recalculate_rating()
+
+    def import_parallel(self, import_table, path, jobs):
+        """
+        Загружает таблицы в jobs потоках, каждый со своим соединением с БД.
+        Таблица запускается, как только загружены все ее зависимости.
+        """
+        pending = list(TABLES)
+        done = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            while pending or running:
+                for table in [
+                    table for table in pending
+                    if done.issuperset(table.depends)
+                ]:
+                    pending.remove(table)
+                    future = executor.submit(
+                        self.import_in_thread, import_table, table,
+                        join(path, table.filename)
                     )
-                    self.stdout.write(insert_sql_str)
-                    cur.execute(insert_sql_str, row)
-        conn.commit()
+                    running[future] = table
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    table = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        for future in running:
+                            future.cancel()
+                        raise CommandError(
+                            f'Ошибка загрузки {table.filename}: {error}'
+                        ) from error
+                    done.add(table.filename)
 
-    def import_users(self, csv_file):
-        User.objects.all().delete()
-        with open(csv_file, 'r', encoding='utf-8') as read_file:
-            reader = csv.DictReader(read_file)
-            for row in reader:
-                User.objects.get_or_create(
-                    id=row['id'],
-                    username=row['username'],
-                    email=row['email'],
-                    role=row['role'],
-                    bio=row['bio'],
-                    first_name=row['first_name'],
-                    last_name=row['last_name']
-                )
+    def load_table(self, import_table, table, csv_file):
+        """
+        Загружает файл и запоминает его контрольную сумму.
+        С --delete-missing неизмененный файл пропускается, только если
+        прошлая загрузка тоже удалила отсутствующие в нем строки.
+        """
+        checksum = file_checksum(csv_file)
+        complete = not self.incremental or self.delete_missing
+        imported = ImportedFile.objects.filter(
+            filename=table.filename, checksum=checksum
+        )
+        if complete:
+            imported = imported.filter(complete=True)
+        if self.incremental and imported.exists():
+            self.stdout.write(f'{table.filename}: файл не изменился')
+            return
+        import_table(table, csv_file)
+        ImportedFile.objects.update_or_create(
+            filename=table.filename,
+            defaults={'checksum': checksum, 'complete': complete}
+        )
+        self.loaded.add(table.filename)
 
-    def import_categories(self, csv_file):
-        Category.objects.all().delete()
-        with open(csv_file, 'r', encoding='utf-8') as read_file:
-            reader = csv.DictReader(read_file)
-            for row in reader:
-                Category.objects.get_or_create(
-                    id=row['id'],
-                    name=row['name'],
-                    slug=row['slug']
-                )
+    def import_in_thread(self, import_table, table, csv_file):
+        try:
+            import_table(table, csv_file)
+        finally:
+            connection.close()
 
-    def import_genres(self, csv_file):
-        Genre.objects.all().delete()
-        with open(csv_file, 'r', encoding='utf-8') as read_file:
-            reader = csv.DictReader(read_file)
-            for row in reader:
-                Genre.objects.get_or_create(
-                    id=row['id'],
-                    name=row['name'],
-                    slug=row['slug']
-                )
+    def clear_tables(self):
+        tables = [table.model._meta.db_table for table in TABLES]
+        with transaction.atomic(), connection.cursor() as cursor:
+            for sql in connection.ops.sql_flush(
+                no_style(), tables, (), allow_cascade=True
+            ):
+                cursor.execute(sql)
 
-    def import_titles(self, csv_file):
-        Title.objects.all().delete()
-        with open(csv_file, 'r', encoding='utf-8') as read_file:
-            reader = csv.DictReader(read_file)
-            for row in reader:
-                Title.objects.get_or_create(
-                    id=row['id'],
-                    name=row['name'],
-                    year=row['year'],
-                    category_id=row['category']
-                )
+    def reset_sequences(self):
+        models = [
+            table.model for table in TABLES if table.filename in self.loaded
+        ]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
 
-    def import_genre_title(self, csv_file):
-        GenreTitle.objects.all().delete()
+    def read_chunks(self, table, csv_file):
+        """Читает файл порциями по batch_size словарей атрибутов модели."""
+        nullable = {
+            field.attname for field in table.model._meta.concrete_fields
+            if field.null
+        }
         with open(csv_file, 'r', encoding='utf-8') as read_file:
             reader = csv.DictReader(read_file)
-            for row in reader:
-                GenreTitle.objects.get_or_create(
-                    id=row['id'],
-                    title_id=row['title_id'],
-                    genre_id=row['genre_id']
+            while True:
+                chunk = [
+                    {
+                        attname: (
+                            None if row[column] == '' and attname in nullable
+                            else row[column]
+                        )
+                        for column, attname in table.columns.items()
+                    }
+                    for row in islice(reader, self.batch_size)
+                ]
+                if not chunk:
+                    return
+                yield chunk
+
+    def insert_table(self, table, csv_file):
+        started = monotonic()
+        with transaction.atomic(), connection.cursor() as cursor:
+            rows = insert_rows(
+                cursor, table, self.read_values(table, csv_file)
+            )
+        self.report(table.filename, rows, monotonic() - started)
+
+    def read_values(self, table, csv_file):
+        """Читает файл порциями с приведением значений к типам модели."""
+        fields = {
+            attname: table.model._meta.get_field(attname)
+            for attname in table.columns.values()
+        }
+        for chunk in self.read_chunks(table, csv_file):
+            yield [
+                {
+                    attname: fields[attname].to_python(value)
+                    for attname, value in values.items()
+                }
+                for values in chunk
+            ]
+
+    def upsert_bulk_table(self, table, csv_file):
+        """Добавляет новые и обновляет измененные строки через ORM."""
+        started = monotonic()
+        model = table.model
+        update_fields = [
+            attname for attname in table.columns.values()
+            if attname != model._meta.pk.attname
+        ]
+        # bulk_update не вызывает pre_save, дату изменения ставим сами.
+        touched_fields = [
+            field.attname for field in model._meta.concrete_fields
+            if getattr(field, 'auto_now', False)
+            and field.attname not in update_fields
+        ]
+        rows = 0
+        seen = set()
+        pk = model._meta.pk.attname
+        with transaction.atomic(), connection.cursor() as cursor:
+            for chunk in self.read_values(table, csv_file):
+                objs = [model(**values) for values in chunk]
+                existing = model.objects.in_bulk([obj.pk for obj in objs])
+                insert_rows(cursor, table, [[
+                    values for values in chunk
+                    if values[pk] not in existing
+                ]])
+                changed = [
+                    obj for obj in objs
+                    if obj.pk in existing and any(
+                        getattr(obj, attname)
+                        != getattr(existing[obj.pk], attname)
+                        for attname in update_fields
+                    )
+                ]
+                if changed:
+                    now = timezone.now()
+                    for obj in changed:
+                        for attname in touched_fields:
+                            setattr(obj, attname, now)
+                    model.objects.bulk_update(
+                        changed, update_fields + touched_fields
+                    )
+                if model in TITLE_LINKED:
+                    self.changed_titles.update(
+                        obj.title_id for obj in objs
+                        if obj.pk not in existing
+                    )
+                    for obj in changed:
+                        self.changed_titles.update(
+                            (obj.title_id, existing[obj.pk].title_id)
+                        )
+                if self.delete_missing:
+                    seen.update(obj.pk for obj in objs)
+                rows += len(objs)
+            if self.delete_missing:
+                self.delete_rows(table, [
+                    pk for pk in model.objects.values_list(
+                        'pk', flat=True
+                    ).iterator()
+                    if pk not in seen
+                ])
+        self.report(table.filename, rows, monotonic() - started)
+
+    def upsert_copy_table(self, table, csv_file):
+        """
+        Загружает файл через COPY во временную таблицу и переносит его
+        в основную одним INSERT ... ON CONFLICT DO UPDATE.
+        Строки, которые не изменились, не перезаписываются.
+        """
+        started = monotonic()
+        quote_name = connection.ops.quote_name
+        meta = table.model._meta
+        target = quote_name(meta.db_table)
+        staging = quote_name(f'import_{meta.db_table}')
+        pk = quote_name(meta.pk.column)
+        columns = list(map(quote_name, self.copy_columns(table)))
+        updated = [
+            quote_name(meta.get_field(attname).column)
+            for attname in table.columns.values()
+            if attname != meta.pk.attname
+        ]
+        # Дата изменения обновляется только у измененных строк.
+        touched = [
+            quote_name(field.column) for field in meta.concrete_fields
+            if getattr(field, 'auto_now', False)
+            and field.attname not in table.columns.values()
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {staging} '
+                f'(LIKE {target} INCLUDING DEFAULTS) ON COMMIT DROP'
+            )
+            rows = self.copy_from_csv(cursor, staging, table, csv_file)
+            if table.model in TITLE_LINKED:
+                # Прежнее и новое произведение добавленных
+                # и измененных отзывов и связей с жанрами.
+                title = quote_name(meta.get_field('title').column)
+                cursor.execute(
+                    'SELECT {target}.{title}, {staging}.{title} '
+                    'FROM {staging} LEFT JOIN {target} '
+                    'ON {target}.{pk} = {staging}.{pk} '
+                    'WHERE ({current}) IS DISTINCT FROM ({staged})'.format(
+                        target=target,
+                        staging=staging,
+                        title=title,
+                        pk=pk,
+                        current=', '.join(
+                            f'{target}.{column}' for column in updated
+                        ),
+                        staged=', '.join(
+                            f'{staging}.{column}' for column in updated
+                        )
+                    )
+                )
+                self.changed_titles.update(
+                    title_id for row in cursor.fetchall()
+                    for title_id in row if title_id is not None
+                )
+            cursor.execute(
+                'INSERT INTO {target} ({columns}) '
+                'SELECT {columns} FROM {staging} '
+                'ON CONFLICT ({pk}) DO UPDATE SET {assignments} '
+                'WHERE ({current}) IS DISTINCT FROM ({excluded})'.format(
+                    target=target,
+                    staging=staging,
+                    pk=pk,
+                    columns=', '.join(columns),
+                    assignments=', '.join(
+                        f'{column} = EXCLUDED.{column}'
+                        for column in updated + touched
+                    ),
+                    current=', '.join(
+                        f'{target}.{column}' for column in updated
+                    ),
+                    excluded=', '.join(
+                        f'EXCLUDED.{column}' for column in updated
+                    )
                 )
+            )
+            if self.delete_missing:
+                cursor.execute(
+                    f'SELECT {pk} FROM {target} WHERE NOT EXISTS '
+                    f'(SELECT 1 FROM {staging} WHERE {staging}.{pk} = '
+                    f'{target}.{pk})'
+                )
+                self.delete_rows(table, [row[0] for row in cursor.fetchall()])
+        self.report(table.filename, rows, monotonic() - started)
 
-    def import_review(self, csv_file):
-        Review.objects.all().delete()
-        with open(csv_file, 'r', encoding='utf-8') as read_file:
-            reader = csv.DictReader(read_file)
-            for row in reader:
-                Review.objects.get_or_create(
-                    id=row['id'],
-                    title_id=row['title_id'],
-                    text=row['text'],
-                    author_id=row['author'],
-                    score=row['score'],
-                    pub_date=row['pub_date']
+    def delete_rows(self, table, pks):
+        """Удаляет строки с каскадом через ORM, порциями по batch_size."""
+        deleted = 0
+        for start in range(0, len(pks), self.batch_size):
+            deleted += table.model.objects.filter(
+                pk__in=pks[start:start + self.batch_size]
+            ).delete()[0]
+        if deleted:
+            self.stdout.write(
+                f'{table.filename}: удалено {deleted} строк, '
+                'отсутствующих в файле'
+            )
+
+    def copy_columns(self, table):
+        return [
+            table.model._meta.get_field(attname).column
+            for attname in table.columns.values()
+        ] + list(default_values(table))
+
+    def copy_from_csv(self, cursor, db_table, table, csv_file):
+        """Передает файл в db_table через COPY, возвращает число строк."""
+        defaults = default_values(table)
+
+        def csv_chunks():
+            for chunk in self.read_chunks(table, csv_file):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(
+                    [
+                        COPY_NULL if value is None else value
+                        for value in (*values.values(), *defaults.values())
+                    ]
+                    for values in chunk
                 )
+                yield buffer.getvalue(), len(chunk)
 
-    def import_comments(self, csv_file):
-        Comment.objects.all().delete()
-        with open(csv_file, 'r', encoding='utf-8') as read_file:
-            reader = csv.DictReader(read_file)
-            for row in reader:
-                Comment.objects.get_or_create(
-                    id=row['id'],
-                    review_id=row['review_id'],
-                    text=row['text'],
-                    author_id=row['author'],
-                    pub_date=row['pub_date']
+        sql = (
+            'COPY {table} ({columns}) FROM STDIN '
+            "WITH (FORMAT csv, NULL '{null}')"
+        ).format(
+            table=connection.ops.quote_name(db_table),
+            columns=', '.join(
+                map(connection.ops.quote_name, self.copy_columns(table))
+            ),
+            null=COPY_NULL
+        )
+        stream = CopyStream(csv_chunks())
+        cursor.copy_expert(sql, stream)
+        return stream.rows
+
+    def copy_table(self, table, csv_file):
+        """Загружает файл через COPY FROM STDIN одним потоком."""
+        started = monotonic()
+        with transaction.atomic(), connection.cursor() as cursor:
+            rows = self.copy_from_csv(
+                cursor, table.model._meta.db_table, table, csv_file
+            )
+        self.report(table.filename, rows, monotonic() - started)
+
+    @contextmanager
+    def constraints_dropped(self):
+        """
+        Снимает внешние ключи и неуникальные индексы загружаемых таблиц
+        на время COPY, затем восстанавливает и проверяет их.
+        """
+        tables = [table.model._meta.db_table for table in TABLES]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT conrelid::regclass::text, conname, '
+                'pg_get_constraintdef(oid) FROM pg_constraint '
+                'WHERE contype = %s AND conrelid::regclass::text = ANY(%s)',
+                ['f', tables]
+            )
+            foreign_keys = cursor.fetchall()
+            cursor.execute(
+                'SELECT indexrelid::regclass::text, '
+                'pg_get_indexdef(indexrelid) FROM pg_index '
+                'WHERE NOT indisunique AND NOT indisprimary '
+                'AND indrelid::regclass::text = ANY(%s)',
+                [tables]
+            )
+            indexes = cursor.fetchall()
+            for table_name, name, _ in foreign_keys:
+                cursor.execute('ALTER TABLE {} DROP CONSTRAINT {}'.format(
+                    connection.ops.quote_name(table_name),
+                    connection.ops.quote_name(name)
+                ))
+            for name, _ in indexes:
+                cursor.execute(f'DROP INDEX {name}')
+        try:
+            yield
+        finally:
+            with transaction.atomic(), connection.cursor() as cursor:
+                for _, definition in indexes:
+                    cursor.execute(definition)
+                for table_name, name, definition in foreign_keys:
+                    cursor.execute(
+                        'ALTER TABLE {} ADD CONSTRAINT {} {} NOT VALID'.format(
+                            connection.ops.quote_name(table_name),
+                            connection.ops.quote_name(name),
+                            definition
+                        )
+                    )
+            self.validate_constraints(foreign_keys)
+
+    def validate_constraints(self, foreign_keys):
+        for table_name, name, _ in foreign_keys:
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute(
+                        'ALTER TABLE {} VALIDATE CONSTRAINT {}'.format(
+                            connection.ops.quote_name(table_name),
+                            connection.ops.quote_name(name)
+                        )
+                    )
+            except DatabaseError as error:
+                raise CommandError(
+                    f'Нарушена ссылочная целостность {table_name}.{name}: '
+                    f'{error}'
                 )
+
+    def report(self, filename, rows, elapsed):
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(
+            f'{filename}: {rows} строк за {elapsed:.2f} с '
+            f'({rate:.0f} строк/с)'
+        )
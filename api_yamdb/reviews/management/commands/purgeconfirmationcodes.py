@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from reviews.models import ConfirmationCode, OutgoingEmail
+
+
+class Command(BaseCommand):
+    """
+    Удаляет использованные и просроченные коды подтверждения
+    и письма с просроченными кодами из очереди в любом статусе.
+    """
+    help = (
+        'Удаляет использованные и просроченные коды подтверждения '
+        'и письма с ними.'
+    )
+
+    def handle(self, *args, **options):
+        deleted = ConfirmationCode.objects.purge()
+        self.stdout.write(
+            self.style.SUCCESS(f'Удалено кодов подтверждения: {deleted}.')
+        )
+        deleted = OutgoingEmail.objects.purge_expired()
+        self.stdout.write(
+            self.style.SUCCESS(f'Удалено писем с кодами: {deleted}.')
+        )
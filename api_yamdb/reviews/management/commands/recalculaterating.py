@@ -0,0 +1,15 @@
+from api.cache import invalidate
+from django.core.management.base import BaseCommand
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    """Пересчитывает рейтинг и количество отзывов всех произведений."""
+    help = 'Пересчитывает рейтинг произведений по отзывам с нуля.'
+
+    def handle(self, *args, **options):
+        updated = Title.objects.recalculate_rating()
+        invalidate('titles')
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитан рейтинг {updated} произведений.')
+        )
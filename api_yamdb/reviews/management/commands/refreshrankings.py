@@ -0,0 +1,26 @@
+from api.cache import invalidate
+from django.core.management.base import BaseCommand
+from reviews.models import Ranking
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает рейтинги произведений, которые отдают адреса
+    /titles/top/ и /titles/trending/. Запускается периодически,
+    например из cron.
+    """
+    help = 'Пересчитывает рейтинги лучших и популярных произведений.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать все рейтинги, а не только изменившиеся.'
+        )
+
+    def handle(self, *args, **options):
+        refreshed = Ranking.objects.refresh(full=options['full'])
+        invalidate('rankings')
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано рейтингов: {refreshed}.')
+        )
@@ -0,0 +1,69 @@
+import time
+
+from api.mail import deliver_batch
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reviews.models import OutgoingEmail
+
+DEFAULT_POLL_INTERVAL: float = 5
+# Как часто воркер с --purge удаляет старые письма, секунды.
+PURGE_INTERVAL: float = 60 * 60
+
+
+class Command(BaseCommand):
+    """
+    Обработчик менеджмент-команды, которая отправляет письма из очереди.
+    Можно запускать несколько экземпляров: письма распределяются
+    между ними блокировкой строк.
+    """
+    help = 'Отправляет письма из очереди исходящих писем.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_QUEUE_BATCH_SIZE,
+            help='Количество писем, отправляемых через одно соединение.'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=DEFAULT_POLL_INTERVAL,
+            help='Пауза в секундах, если очередь пуста.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить все готовые письма и завершиться.'
+        )
+        parser.add_argument(
+            '--purge',
+            action='store_true',
+            help=(
+                'Удалять отправленные и неотправленные письма старше '
+                'EMAIL_QUEUE_RETENTION секунд.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        total = purged = 0
+        purged_at = None
+        while True:
+            if options['purge'] and (
+                purged_at is None
+                or time.monotonic() - purged_at >= PURGE_INTERVAL
+            ):
+                purged += OutgoingEmail.objects.purge_finished()
+                purged_at = time.monotonic()
+            processed = deliver_batch(options['batch_size'])
+            total += processed
+            if processed:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
+        self.stdout.write(self.style.SUCCESS(f'Обработано писем: {total}.'))
+        if options['purge']:
+            self.stdout.write(
+                self.style.SUCCESS(f'Удалено старых писем: {purged}.')
+            )
@@ -0,0 +1,48 @@
+from collections import namedtuple
+
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+# Описание таблицы в csv-выгрузке: имя файла, модель,
+# соответствие колонок файла атрибутам модели и файлы,
+# которые должны быть загружены раньше.
+Table = namedtuple('Table', ['filename', 'model', 'columns', 'depends'])
+
+TABLES = (
+    Table('users.csv', User, {
+        'id': 'id',
+        'username': 'username',
+        'email': 'email',
+        'role': 'role',
+        'bio': 'bio',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+    }, ()),
+    Table('category.csv', Category, {
+        'id': 'id', 'name': 'name', 'slug': 'slug'
+    }, ()),
+    Table('genre.csv', Genre, {
+        'id': 'id', 'name': 'name', 'slug': 'slug'
+    }, ()),
+    Table('titles.csv', Title, {
+        'id': 'id', 'name': 'name', 'year': 'year', 'category': 'category_id'
+    }, ('category.csv',)),
+    Table('genre_title.csv', GenreTitle, {
+        'id': 'id', 'title_id': 'title_id', 'genre_id': 'genre_id'
+    }, ('titles.csv', 'genre.csv')),
+    Table('review.csv', Review, {
+        'id': 'id',
+        'title_id': 'title_id',
+        'text': 'text',
+        'author': 'author_id',
+        'score': 'score',
+        'pub_date': 'pub_date',
+    }, ('titles.csv', 'users.csv')),
+    Table('comments.csv', Comment, {
+        'id': 'id',
+        'review_id': 'review_id',
+        'text': 'text',
+        'author': 'author_id',
+        'pub_date': 'pub_date',
+    }, ('review.csv', 'users.csv')),
+)
@@ -0,0 +1,78 @@
+from urllib.parse import urlencode
+
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+def get_read_routes():
+    """
+    Пары (имя, адрес) GET-маршрутов API, доступных без токена,
+    на данных из БД. Маршруты, для которых нет данных, пропускаются.
+    """
+    title = Title.objects.order_by('pk').first()
+    review = Review.objects.order_by('pk').first()
+    comment = Comment.objects.order_by('pk').first()
+    category = Category.objects.order_by('pk').first()
+    genre = Genre.objects.order_by('pk').first()
+    routes = [
+        ('categories-list', '/api/v1/categories/'),
+        ('genres-list', '/api/v1/genres/'),
+        ('titles-list', '/api/v1/titles/'),
+        ('titles-top', '/api/v1/titles/top/'),
+        ('titles-trending', '/api/v1/titles/trending/'),
+    ]
+    if category is not None:
+        routes += [
+            ('categories-search', '/api/v1/categories/?' + urlencode(
+                {'search': category.name}
+            )),
+            ('titles-filter-category', '/api/v1/titles/?' + urlencode(
+                {'category': category.slug}
+            )),
+            ('titles-top-category', '/api/v1/titles/top/?' + urlencode(
+                {'category': category.slug}
+            )),
+        ]
+    if genre is not None:
+        routes += [
+            ('titles-filter-genre', '/api/v1/titles/?' + urlencode(
+                {'genre': genre.slug}
+            )),
+            ('genres-titles', f'/api/v1/genres/{genre.slug}/titles/'),
+            ('titles-top-genre', '/api/v1/titles/top/?' + urlencode(
+                {'genre': genre.slug}
+            )),
+        ]
+    if title is not None:
+        routes += [
+            ('titles-filter-year', '/api/v1/titles/?' + urlencode(
+                {'year': title.year}
+            )),
+            ('titles-filter-name', '/api/v1/titles/?' + urlencode(
+                {'name': title.name}
+            )),
+            ('titles-search', '/api/v1/titles/?' + urlencode(
+                {'search': title.name}
+            )),
+            ('titles-detail', f'/api/v1/titles/{title.pk}/'),
+            ('titles-stats', f'/api/v1/titles/{title.pk}/stats/'),
+            ('titles-bulk-stats', f'/api/v1/titles/stats/?ids={title.pk}'),
+        ]
+    if review is not None:
+        reviews = f'/api/v1/titles/{review.title_id}/reviews/'
+        routes += [
+            ('reviews-list', reviews),
+            ('reviews-list-cursor', f'{reviews}?cursor='),
+            ('reviews-detail', f'{reviews}{review.pk}/'),
+            ('comments-list', f'{reviews}{review.pk}/comments/'),
+            (
+                'comments-list-cursor',
+                f'{reviews}{review.pk}/comments/?cursor='
+            ),
+        ]
+    if comment is not None:
+        routes.append((
+            'comments-detail',
+            f'/api/v1/titles/{comment.review.title_id}/reviews/'
+            f'{comment.review_id}/comments/{comment.pk}/'
+        ))
+    return routes
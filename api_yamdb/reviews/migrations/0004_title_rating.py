@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-18 16:43
+
+from django.db import migrations, models
+from django.db.models import (Avg, Count, FloatField, OuterRef, Subquery,
+                              Sum)
+from django.db.models.functions import Coalesce
+
+
+def recalculate_rating(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    Title.objects.update(
+        reviews_count=Coalesce(
+            Subquery(reviews.annotate(count=Count('id')).values('count')),
+            0
+        ),
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0
+        ),
+        rating=Subquery(
+            reviews.annotate(avg=Avg('score')).values('avg'),
+            output_field=FloatField()
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_auto_20220906_1718'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(editable=False, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(recalculate_rating, migrations.RunPython.noop),
+    ]
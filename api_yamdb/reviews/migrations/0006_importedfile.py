@@ -0,0 +1,22 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedFile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=255, unique=True, verbose_name='Имя файла')),
+                ('checksum', models.CharField(max_length=64, verbose_name='Контрольная сумма')),
+                ('imported_at', models.DateTimeField(auto_now=True, verbose_name='Дата загрузки')),
+            ],
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:40
+
+from django.db import migrations
+
+# Индексы по UPPER(...) обслуживают icontains, который Django
+# на PostgreSQL переводит в UPPER(поле) LIKE UPPER(%s).
+TRIGRAM_INDEXES = {
+    'title_name_upper_trgm_idx': (
+        'reviews_title', 'UPPER(name) gin_trgm_ops'
+    ),
+    'title_description_upper_trgm_idx': (
+        'reviews_title', 'UPPER(description) gin_trgm_ops'
+    ),
+    'title_name_trgm_idx': ('reviews_title', 'name gin_trgm_ops'),
+    'category_name_upper_trgm_idx': (
+        'reviews_category', 'UPPER(name) gin_trgm_ops'
+    ),
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, (table, expression) in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+            f'USING gin ({expression})'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_importedfile'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
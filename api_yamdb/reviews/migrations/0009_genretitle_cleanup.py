@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:05
+
+from django.db import migrations
+from django.db.models import Min
+
+
+def remove_invalid_links(apps, schema_editor):
+    GenreTitle = apps.get_model('reviews', 'GenreTitle')
+    GenreTitle.objects.filter(title__isnull=True).delete()
+    GenreTitle.objects.filter(genre__isnull=True).delete()
+    first_links = GenreTitle.objects.order_by().values(
+        'title', 'genre'
+    ).annotate(first_id=Min('id')).values('first_id')
+    GenreTitle.objects.exclude(id__in=first_links).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_access_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_invalid_links, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_genretitle_cleanup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='genretitle',
+            name='genre',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='reviews.Genre'),
+        ),
+        migrations.AlterField(
+            model_name='genretitle',
+            name='title',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='reviews.Title'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='genre',
+            field=models.ManyToManyField(related_name='titles', through='reviews.GenreTitle', to='reviews.Genre'),
+        ),
+        migrations.AddConstraint(
+            model_name='genretitle',
+            constraint=models.UniqueConstraint(fields=('title', 'genre'), name='unique_title_genre'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:15
+
+import datetime as dt
+import hashlib
+import hmac
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def hash_existing_codes(apps, schema_editor):
+    User = apps.get_model('reviews', 'User')
+    ConfirmationCode = apps.get_model('reviews', 'ConfirmationCode')
+    expires_at = timezone.now() + dt.timedelta(
+        seconds=settings.CONFIRMATION_CODE_TTL
+    )
+    ConfirmationCode.objects.bulk_create(
+        ConfirmationCode(
+            user_id=user_id,
+            code_hash=hmac.new(
+                settings.SECRET_KEY.encode('utf-8'),
+                f'{username}:{code}'.encode('utf-8'),
+                hashlib.sha256
+            ).hexdigest(),
+            expires_at=expires_at
+        )
+        for user_id, username, code in User.objects.exclude(
+            confirmation_code__isnull=True
+        ).exclude(confirmation_code='').values_list(
+            'id', 'username', 'confirmation_code'
+        ).iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConfirmationCode',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code_hash', models.CharField(max_length=64, unique=True, verbose_name='Хэш кода')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Действует до')),
+                ('used_at', models.DateTimeField(null=True, verbose_name='Дата использования')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='confirmation_codes', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(hash_existing_codes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:15
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_confirmationcode'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='user',
+            name='confirmation_code',
+        ),
+    ]
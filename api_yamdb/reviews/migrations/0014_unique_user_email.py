@@ -0,0 +1,52 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:50
+
+from django.core.management.base import CommandError
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_emails(apps, schema_editor):
+    """
+    Прерывает миграцию, если один адрес указан у нескольких
+    пользователей: какой адрес оставить, решает администратор,
+    миграция адреса не меняет.
+    """
+    User = apps.get_model('reviews', 'User')
+    duplicates = User.objects.exclude(email='').order_by().values(
+        'email'
+    ).annotate(users=Count('id')).filter(users__gt=1).values_list(
+        'email', flat=True
+    )
+    conflicts = []
+    for email in duplicates.order_by('email'):
+        users = ', '.join(
+            f'{username} (id={pk})'
+            for pk, username in User.objects.filter(email=email).order_by(
+                'id'
+            ).values_list('id', 'username')
+        )
+        conflicts.append(f'  {email}: {users}')
+    if conflicts:
+        raise CommandError(
+            'Нельзя создать уникальный индекс на email: адреса указаны '
+            'у нескольких пользователей. Измените или удалите адреса '
+            'лишних пользователей и повторите миграцию.\n'
+            + '\n'.join(conflicts)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0013_remove_user_confirmation_code'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            check_duplicate_emails, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(condition=models.Q(_negated=True, email=''), fields=('email',), name='unique_user_email'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0014_unique_user_email'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['title', 'score'], name='review_title_score_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.16 on 2026-10-18 22:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0015_review_title_score_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now, verbose_name='Дата изменения'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['pub_date'], name='review_pub_date_idx'),
+        ),
+        migrations.CreateModel(
+            name='Ranking',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(max_length=100, verbose_name='Рейтинг')),
+                ('position', models.PositiveIntegerField(verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Значение')),
+                ('refreshed_at', models.DateTimeField(verbose_name='Дата пересчета')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.Title', verbose_name='Произведение')),
+            ],
+            options={
+                'ordering': ['board', 'position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ranking',
+            constraint=models.UniqueConstraint(fields=('board', 'position'), name='unique_ranking_board_position'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0016_ranking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importedfile',
+            name='complete',
+            field=models.BooleanField(default=True, verbose_name='Полная синхронизация'),
+        ),
+    ]
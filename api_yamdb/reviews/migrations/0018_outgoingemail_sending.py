@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-18 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0017_importedfile_complete'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outgoingemail',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Ожидает отправки'), ('sending', 'Отправляется'), ('sent', 'Отправлено'), ('failed', 'Не отправлено')], default='pending', max_length=10, verbose_name='Статус'),
+        ),
+        migrations.RemoveIndex(
+            model_name='outgoingemail',
+            name='outgoingemail_pending_idx',
+        ),
+        migrations.AddIndex(
+            model_name='outgoingemail',
+            index=models.Index(condition=models.Q(status__in=['pending', 'sending']), fields=['next_attempt_at'], name='outgoingemail_queued_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-18 23:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0018_outgoingemail_sending'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ranking',
+            name='title',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rankings', to='reviews.Title', verbose_name='Произведение'),
+        ),
+    ]
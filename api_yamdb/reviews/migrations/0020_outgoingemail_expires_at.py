@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-18 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0019_ranking_title_set_null'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='expires_at',
+            field=models.DateTimeField(
+                db_index=True, null=True, verbose_name='Действует до'
+            ),
+        ),
+    ]
@@ -1,12 +1,23 @@
 import datetime as dt
+import hashlib
+import hmac
 
+from api.utils import get_random_string
 from api.validators import validate_username
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (Avg, Case, Count, ExpressionWrapper, F,
+                              FloatField, Max, OuterRef, Q, Subquery, Sum,
+                              Value, When)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
 
 MAX_STR_LENGTH: int = 30
+MIN_SCORE: int = 0
+MAX_SCORE: int = 10
+STATS_PERCENTILES = (25, 50, 75, 90)
 
 
 class User(AbstractUser):
@@ -33,7 +44,6 @@ class User(AbstractUser):
         unique=True,
         validators=[validate_username]
     )
-    confirmation_code = models.TextField(null=True)
 
     @property
     def is_moderator(self):
@@ -45,6 +55,14 @@ class User(AbstractUser):
 
     class Meta:
         ordering = ['username']
+        constraints = [
+            # Пустой email разрешен суперпользователям, созданным без него.
+            models.UniqueConstraint(
+                fields=['email'],
+                condition=~models.Q(email=''),
+                name='unique_user_email'
+            )
+        ]
 
 
 class Base(models.Model):
@@ -69,6 +87,98 @@ class Genre(Base):
     pass
 
 
+def histogram_stats(title_id, histogram):
+    """Количество, среднее и процентили по гистограмме оценок."""
+    count = sum(histogram.values())
+    percentiles = dict.fromkeys(map(str, STATS_PERCENTILES))
+    if count:
+        cumulative = 0
+        ranks = iter(STATS_PERCENTILES)
+        percentile = next(ranks)
+        for score, score_count in histogram.items():
+            cumulative += score_count
+            # Процентиль по ближайшему рангу: первая оценка, на которой
+            # накопленная доля отзывов достигает процентиля.
+            while percentile is not None and cumulative * 100 >= (
+                percentile * count
+            ):
+                percentiles[str(percentile)] = score
+                percentile = next(ranks, None)
+    return {
+        'id': title_id,
+        'count': count,
+        'mean': sum(
+            score * score_count for score, score_count in histogram.items()
+        ) / count if count else None,
+        'histogram': {str(score): value for score, value in histogram.items()},
+        'percentiles': percentiles,
+    }
+
+
+class TitleQuerySet(models.QuerySet):
+    """QuerySet произведений с поддержкой денормализованного рейтинга."""
+
+    def apply_review_delta(self, title_id, count_delta, score_delta):
+        """Инкрементально обновляет счётчики отзывов и рейтинг одним UPDATE."""
+        new_count = F('reviews_count') + count_delta
+        new_sum = F('score_sum') + score_delta
+        return self.filter(pk=title_id).update(
+            reviews_count=new_count,
+            score_sum=new_sum,
+            rating=Case(
+                When(reviews_count=-count_delta, then=Value(None)),
+                default=ExpressionWrapper(
+                    Cast(new_sum, FloatField()) / new_count,
+                    output_field=FloatField()
+                ),
+                output_field=FloatField()
+            ),
+            updated_at=timezone.now()
+        )
+
+    def recalculate_rating(self):
+        """Пересчитывает счётчики отзывов и рейтинг с нуля."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.update(
+            reviews_count=Coalesce(
+                Subquery(reviews.annotate(count=Count('id')).values('count')),
+                0
+            ),
+            score_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0
+            ),
+            rating=Subquery(
+                reviews.annotate(avg=Avg('score')).values('avg'),
+                output_field=FloatField()
+            ),
+            updated_at=timezone.now()
+        )
+
+    def score_stats(self):
+        """
+        Распределение оценок произведений одним запросом с группировкой
+        по произведению и оценке. Возвращает словарь по id произведения
+        с количеством отзывов, средней оценкой, гистограммой и процентилями.
+        """
+        stats = {}
+        rows = self.order_by().values('id', 'reviews__score').annotate(
+            count=Count('reviews__id')
+        )
+        for row in rows:
+            histogram = stats.setdefault(
+                row['id'], dict.fromkeys(range(MIN_SCORE, MAX_SCORE + 1), 0)
+            )
+            if row['reviews__score'] is not None:
+                histogram[row['reviews__score']] = row['count']
+        return {
+            title_id: histogram_stats(title_id, histogram)
+            for title_id, histogram in stats.items()
+        }
+
+
 class Title(models.Model):
     """Модель для произведений."""
     name = models.CharField(
@@ -97,25 +207,74 @@ class Title(models.Model):
         on_delete=models.SET_NULL
     )
     genre = models.ManyToManyField(
-        Genre, related_name='genres', through='GenreTitle')
+        Genre, related_name='titles', through='GenreTitle')
+    rating = models.FloatField(
+        verbose_name='Рейтинг',
+        null=True,
+        editable=False
+    )
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False
+    )
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    # Время последнего изменения произведения или его рейтинга:
+    # по нему refreshrankings находит рейтинги для пересчета.
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        db_index=True
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['year'], name='title_year_idx'),
+            models.Index(
+                fields=['category', 'year'],
+                name='title_category_year_idx'
+            ),
+        ]
+
 
 class GenreTitle(models.Model):
     """Модель связи произведения и жанра."""
+    # Отдельные индексы по ключам не нужны: (title, genre) обслуживается
+    # ограничением уникальности, (genre, title) - составным индексом.
     title = models.ForeignKey(
         Title,
-        null=True,
+        db_index=False,
         on_delete=models.CASCADE
     )
     genre = models.ForeignKey(
         Genre,
-        null=True,
+        db_index=False,
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'genre'],
+                name='unique_title_genre'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['genre', 'title'],
+                name='genretitle_genre_title_idx'
+            )
+        ]
+
 
 class Review(models.Model):
     """Модель для рецензий."""
@@ -137,8 +296,8 @@ class Review(models.Model):
     )
     score = models.SmallIntegerField(
         validators=[
-            MinValueValidator(limit_value=0),
-            MaxValueValidator(limit_value=10)
+            MinValueValidator(limit_value=MIN_SCORE),
+            MaxValueValidator(limit_value=MAX_SCORE)
         ],
         verbose_name='Оценка'
     )
@@ -147,17 +306,45 @@ class Review(models.Model):
         auto_now_add=True
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = (
+            instance.__dict__.get('title_id'),
+            instance.__dict__.get('score')
+        )
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Рейтинг произведения обновляется в post_save,
+        # поэтому сохранение и пересчёт идут в одной транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return self.text[:MAX_STR_LENGTH]
 
     class Meta:
-        ordering = ['pub_date']
+        ordering = ['pub_date', 'id']
         constraints = [
             models.UniqueConstraint(
                 fields=['title', 'author'],
                 name='unique_title_author'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx'
+            ),
+            # Покрывающий индекс для группировки оценок по произведению.
+            models.Index(
+                fields=['title', 'score'],
+                name='review_title_score_idx'
+            ),
+            # Отзывы за окно популярности для рейтинга trending.
+            models.Index(fields=['pub_date'], name='review_pub_date_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -186,4 +373,359 @@ class Comment(models.Model):
         return self.text[:MAX_STR_LENGTH]
 
     class Meta:
-        ordering = ['pub_date']
+        ordering = ['pub_date', 'id']
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx'
+            )
+        ]
+
+
+def ranking_board(category=None, genre=None):
+    """Ключ рейтинга произведений: общий, категории или жанра."""
+    if category:
+        return f'category:{category}'
+    if genre:
+        return f'genre:{genre}'
+    return Ranking.TOP
+
+
+class RankingQuerySet(models.QuerySet):
+    """QuerySet предрасчитанных рейтингов произведений."""
+
+    def board(self, board):
+        # Места удаленных произведений остаются до пересчета рейтинга.
+        return self.filter(
+            board=board, title__isnull=False
+        ).order_by('position')
+
+    def ranked(self, board, now):
+        """Первые RANKING_SIZE пар (id произведения, значение) рейтинга."""
+        if board == Ranking.TRENDING:
+            since = now - dt.timedelta(
+                seconds=settings.RANKING_TRENDING_WINDOW
+            )
+            return Review.objects.filter(pub_date__gte=since).order_by(
+            ).values('title').annotate(
+                score=Count('id')
+            ).order_by('-score', 'title').values_list(
+                'title', 'score'
+            )[:settings.RANKING_SIZE]
+        titles = Title.objects.filter(
+            rating__isnull=False,
+            reviews_count__gte=settings.RANKING_MIN_REVIEWS
+        )
+        kind, _, slug = board.partition(':')
+        if kind == 'category':
+            titles = titles.filter(category__slug=slug)
+        elif kind == 'genre':
+            titles = titles.filter(genre__slug=slug)
+        return titles.order_by(
+            '-rating', '-reviews_count', 'pk'
+        ).values_list('pk', 'rating')[:settings.RANKING_SIZE]
+
+    def replace(self, board, rows, refreshed_at):
+        self.filter(board=board).delete()
+        self.bulk_create(
+            Ranking(
+                board=board,
+                position=position,
+                title_id=title_id,
+                score=score,
+                refreshed_at=refreshed_at
+            )
+            for position, (title_id, score) in enumerate(rows, 1)
+        )
+
+    def refresh(self, full=False):
+        """
+        Пересчитывает рейтинги. Общий рейтинг и trending пересчитываются
+        всегда, рейтинги категорий и жанров - только если в них входили
+        или входят произведения, изменившиеся после прошлого пересчета,
+        или в них было удаленное произведение.
+        С full, а также при первом запуске пересчитываются все рейтинги.
+        Возвращает количество пересчитанных рейтингов.
+        """
+        now = timezone.now()
+        last = None if full else self.filter(board=Ranking.TOP).aggregate(
+            last=Max('refreshed_at')
+        )['last']
+        categories = Category.objects.values_list('slug', flat=True)
+        genres = Genre.objects.values_list('slug', flat=True)
+        all_boards = {
+            Ranking.TOP,
+            Ranking.TRENDING,
+            *(ranking_board(category=slug) for slug in categories),
+            *(ranking_board(genre=slug) for slug in genres),
+        }
+        boards = all_boards
+        if last is not None:
+            changed = Title.objects.filter(updated_at__gte=last)
+            boards = all_boards & {
+                Ranking.TOP,
+                Ranking.TRENDING,
+                *self.filter(
+                    Q(title__in=changed) | Q(title__isnull=True)
+                ).values_list('board', flat=True),
+                *(
+                    ranking_board(category=slug)
+                    for slug in categories.filter(titles__in=changed)
+                ),
+                *(
+                    ranking_board(genre=slug)
+                    for slug in genres.filter(titles__in=changed)
+                ),
+            }
+        with transaction.atomic():
+            # Рейтинги удаленных категорий и жанров.
+            self.exclude(board__in=all_boards).delete()
+            for board in sorted(boards):
+                self.replace(board, self.ranked(board, now), now)
+        return len(boards)
+
+
+class Ranking(models.Model):
+    """
+    Места произведений в рейтингах, которые пересчитывает команда
+    refreshrankings. Каждый рейтинг хранит не больше RANKING_SIZE мест.
+    """
+    TOP = 'top'
+    TRENDING = 'trending'
+    board = models.CharField(
+        verbose_name='Рейтинг',
+        max_length=100
+    )
+    position = models.PositiveIntegerField(verbose_name='Место')
+    title = models.ForeignKey(
+        Title,
+        related_name='rankings',
+        verbose_name='Произведение',
+        null=True,
+        # Место удаленного произведения отмечает рейтинг для пересчета.
+        on_delete=models.SET_NULL
+    )
+    score = models.FloatField(verbose_name='Значение')
+    refreshed_at = models.DateTimeField(verbose_name='Дата пересчета')
+
+    objects = RankingQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.board}: {self.position}'
+
+    class Meta:
+        ordering = ['board', 'position']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['board', 'position'],
+                name='unique_ranking_board_position'
+            )
+        ]
+
+
+class ImportedFile(models.Model):
+    """Контрольные суммы csv-файлов, загруженных командой importcsv."""
+    filename = models.CharField(
+        verbose_name='Имя файла',
+        max_length=255,
+        unique=True
+    )
+    checksum = models.CharField(
+        verbose_name='Контрольная сумма',
+        max_length=64
+    )
+    # Таблица совпадает с файлом: загрузка была полной или
+    # с удалением отсутствующих в файле строк.
+    complete = models.BooleanField(
+        verbose_name='Полная синхронизация',
+        default=True
+    )
+    imported_at = models.DateTimeField(
+        verbose_name='Дата загрузки',
+        auto_now=True
+    )
+
+    def __str__(self):
+        return self.filename
+
+
+class OutgoingEmailQuerySet(models.QuerySet):
+    """QuerySet очереди исходящих писем."""
+
+    def purge_expired(self):
+        """Удаляет письма с истекшими кодами в любом статусе."""
+        return self.filter(expires_at__lte=timezone.now()).delete()[0]
+
+    def purge_finished(self):
+        """
+        Удаляет отправленные и неотправленные письма старше
+        EMAIL_QUEUE_RETENTION секунд.
+        """
+        return self.filter(
+            status__in=[self.model.SENT, self.model.FAILED],
+            created_at__lt=timezone.now() - dt.timedelta(
+                seconds=settings.EMAIL_QUEUE_RETENTION
+            )
+        ).delete()[0]
+
+
+class OutgoingEmail(models.Model):
+    """Очередь исходящих писем, которые отправляются в фоне."""
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = [
+        (PENDING, 'Ожидает отправки'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    ]
+    subject = models.CharField(
+        verbose_name='Тема',
+        max_length=255
+    )
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.CharField(
+        verbose_name='Отправитель',
+        max_length=settings.FIELDS_LENGTH['EMAIL']
+    )
+    to_email = models.CharField(
+        verbose_name='Получатель',
+        max_length=settings.FIELDS_LENGTH['EMAIL']
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        choices=STATUSES,
+        default=PENDING,
+        max_length=10
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток отправки',
+        default=0
+    )
+    # Для письма, которое отправляется, - срок, после которого
+    # его может забрать другой воркер, если отправивший завершился.
+    next_attempt_at = models.DateTimeField(
+        verbose_name='Следующая попытка',
+        default=timezone.now
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='Дата отправки',
+        null=True
+    )
+    # Срок действия кода в тексте письма: после него письмо удаляет
+    # purgeconfirmationcodes, даже если оно не отправлено.
+    expires_at = models.DateTimeField(
+        verbose_name='Действует до',
+        null=True,
+        db_index=True
+    )
+
+    objects = OutgoingEmailQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.to_email}: {self.subject}'
+
+    class Meta:
+        indexes = [
+            # Воркер выбирает только ожидающие и зависшие при отправке
+            # письма, срок которых наступил, поэтому отправленные
+            # в индекс не попадают.
+            models.Index(
+                fields=['next_attempt_at'],
+                condition=models.Q(status__in=['pending', 'sending']),
+                name='outgoingemail_queued_idx'
+            )
+        ]
+
+
+def hash_confirmation_code(username, code):
+    """HMAC кода подтверждения, привязанный к имени пользователя."""
+    return hmac.new(
+        settings.SECRET_KEY.encode('utf-8'),
+        f'{username}:{code}'.encode('utf-8'),
+        hashlib.sha256
+    ).hexdigest()
+
+
+class ConfirmationCodeQuerySet(models.QuerySet):
+    """QuerySet кодов подтверждения."""
+
+    def issue(self, user):
+        """
+        Создает новый код пользователя вместо прежних
+        и возвращает его в открытом виде.
+        """
+        code = get_random_string()
+        self.filter(user=user).delete()
+        self.create(
+            user=user,
+            code_hash=hash_confirmation_code(user.username, code),
+            expires_at=timezone.now() + dt.timedelta(
+                seconds=settings.CONFIRMATION_CODE_TTL
+            )
+        )
+        return code
+
+    def consume(self, username, code):
+        """
+        Гасит действующий код и возвращает его пользователя,
+        либо None, если код неверный, просрочен или уже использован.
+        """
+        now = timezone.now()
+        confirmation = self.select_related('user').filter(
+            code_hash=hash_confirmation_code(username, code),
+            used_at__isnull=True,
+            expires_at__gt=now
+        ).first()
+        if confirmation is None or confirmation.user.username != username:
+            return None
+        # Условие на used_at не дает двум запросам погасить один код.
+        if not self.filter(
+            pk=confirmation.pk, used_at__isnull=True
+        ).update(used_at=now):
+            return None
+        return confirmation.user
+
+    def purge(self):
+        """Удаляет использованные и просроченные коды."""
+        return self.filter(
+            models.Q(used_at__isnull=False)
+            | models.Q(expires_at__lte=timezone.now())
+        ).delete()[0]
+
+
+class ConfirmationCode(models.Model):
+    """Хэши кодов подтверждения для получения токена."""
+    user = models.ForeignKey(
+        User,
+        related_name='confirmation_codes',
+        on_delete=models.CASCADE
+    )
+    code_hash = models.CharField(
+        verbose_name='Хэш кода',
+        max_length=64,
+        unique=True
+    )
+    expires_at = models.DateTimeField(
+        verbose_name='Действует до',
+        db_index=True
+    )
+    used_at = models.DateTimeField(
+        verbose_name='Дата использования',
+        null=True
+    )
+
+    objects = ConfirmationCodeQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.user_id}: {self.expires_at}'
@@ -0,0 +1,97 @@
+import threading
+
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import GenreTitle, Review, Title
+
+# Произведения, которые удаляются в этом потоке: при каскадном
+# удалении их отзывов и связей с жанрами они не обновляются.
+_deleting = threading.local()
+
+
+def deleting_titles():
+    if not hasattr(_deleting, 'title_ids'):
+        _deleting.title_ids = set()
+    return _deleting.title_ids
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_review_save(sender, instance, created, **kwargs):
+    """Обновляет рейтинг произведения при создании и изменении отзыва."""
+    score = int(instance.score)
+    old_title_id, old_score = getattr(
+        instance, '_loaded_score', (None, None)
+    )
+    if created:
+        Title.objects.apply_review_delta(instance.title_id, 1, score)
+    elif old_title_id is None:
+        # Исходная оценка неизвестна, пересчитываем произведение целиком.
+        Title.objects.filter(pk=instance.title_id).recalculate_rating()
+    elif old_title_id != instance.title_id:
+        Title.objects.apply_review_delta(old_title_id, -1, -int(old_score))
+        Title.objects.apply_review_delta(instance.title_id, 1, score)
+    elif int(old_score) != score:
+        Title.objects.apply_review_delta(
+            instance.title_id, 0, score - int(old_score)
+        )
+    instance._loaded_score = (instance.title_id, score)
+
+
+@receiver(pre_delete, sender=Title)
+def mark_title_deleting(sender, instance, **kwargs):
+    """
+    Collector отправляет pre_delete всех удаляемых объектов до удаления,
+    а post_delete произведения - после удаления его отзывов.
+    """
+    deleting_titles().add(instance.pk)
+
+
+@receiver(post_delete, sender=Title)
+def unmark_title_deleting(sender, instance, **kwargs):
+    deleting_titles().discard(instance.pk)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_review_delete(sender, instance, **kwargs):
+    """
+    Обновляет рейтинг произведения при удалении отзыва, если
+    само произведение не удаляется вместе с ним.
+    """
+    if instance.title_id in deleting_titles():
+        return
+    Title.objects.apply_review_delta(
+        instance.title_id, -1, -int(instance.score)
+    )
+
+
+def touch_titles(title_ids):
+    """
+    Отмечает произведения измененными: по updated_at refreshrankings
+    находит рейтинги жанров, в которые они вошли или из которых вышли.
+    """
+    Title.objects.filter(pk__in=title_ids).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def touch_title_on_genre_link(sender, instance, **kwargs):
+    """Связь создана или удалена напрямую, в том числе каскадно."""
+    if instance.title_id not in deleting_titles():
+        touch_titles([instance.title_id])
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_titles_on_genres_change(sender, instance, action, reverse,
+                                  pk_set, **kwargs):
+    """Жанры изменены через title.genre или genre.titles."""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        touch_titles([instance.pk])
+    elif action == 'pre_clear':
+        touch_titles(Title.objects.filter(genre=instance).values('pk'))
+    else:
+        touch_titles(pk_set)
@@ -0,0 +1,91 @@
+import pytest
+
+
+def create_user(role, **fields):
+    """Пользователь с ролью role и именем, совпадающим с ролью."""
+    from reviews.models import User
+    return User.objects.create(
+        username=role, email=f'{role}@yamdb.fake', role=role, **fields
+    )
+
+
+def auth_client(user, token_class=None):
+    """
+    Клиент с access-токеном пользователя. По умолчанию токен содержит
+    утверждения о пользователе, как токены, которые выдает API.
+    """
+    from api.authentication import ClaimsRefreshToken
+    from django.test import Client
+    token = (token_class or ClaimsRefreshToken).for_user(user).access_token
+    return Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+
+@pytest.fixture
+def categories(db):
+    from reviews.models import Category
+    return [
+        Category.objects.create(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(2)
+    ]
+
+
+@pytest.fixture
+def genres(db):
+    from reviews.models import Genre
+    return [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def titles(db, categories, genres):
+    from reviews.models import Title
+    titles = []
+    for i in range(15):
+        title = Title.objects.create(
+            name=f'Произведение {i}',
+            year=2000 + i % 3,
+            category=categories[i % len(categories)]
+        )
+        title.genre.set(genres[:i % len(genres) + 1])
+        titles.append(title)
+    return titles
+
+
+@pytest.fixture
+def reviews(db, titles):
+    from django.utils import timezone
+    from reviews.models import Review, User
+    pub_date = timezone.now()
+    reviews = []
+    for i in range(25):
+        author = User.objects.create(
+            username=f'user{i}', email=f'user{i}@yamdb.fake'
+        )
+        reviews.append(Review.objects.create(
+            title=titles[0], author=author, text=f'Отзыв {i}', score=i % 11
+        ))
+    # Одинаковые даты у части отзывов проверяют сортировку по id.
+    Review.objects.filter(id__in=[r.id for r in reviews[5:15]]).update(
+        pub_date=pub_date
+    )
+    return reviews
+
+
+@pytest.fixture(autouse=True)
+def clear_api_cache(settings):
+    from django.core.cache import caches
+    caches[settings.API_CACHE_ALIAS].clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    from api.authentication import clear_user_cache
+    clear_user_cache()
+
+
+@pytest.fixture(autouse=True)
+def clear_throttle_cache(settings):
+    from django.core.cache import caches
+    caches[settings.THROTTLE_CACHE_ALIAS].clear()
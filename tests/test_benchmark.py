@@ -0,0 +1,77 @@
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+GENERATE_ARGS = (
+    '--generate', '--titles', '20', '--users', '5', '--reviews', '60',
+    '--comments', '30', '--repeat', '2'
+)
+
+
+@pytest.mark.django_db
+class TestBenchmarkApi:
+
+    def test_generate_and_measure(self, tmp_path):
+        from reviews.models import Comment, Review, Title, User
+        output = tmp_path / 'benchmark.json'
+        call_command('benchmarkapi', *GENERATE_ARGS, '--output', str(output))
+        assert Title.objects.count() == 20
+        assert Review.objects.count() == 60
+        assert Comment.objects.count() == 30
+        assert Title.objects.filter(rating__isnull=False).count() == 20, (
+            'Проверьте, что после генерации пересчитывается рейтинг'
+        )
+        results = json.loads(output.read_text(encoding='utf-8'))
+        routes = results['routes']
+        for name in (
+            'titles-list', 'titles-filter-genre', 'reviews-list',
+            'comments-detail', 'users-list', 'auth-signup', 'auth-token'
+        ):
+            assert name in routes, f'Проверьте, что замеряется {name}'
+            assert set(routes[name]) == {
+                'p50_ms', 'p95_ms', 'queries', 'memory_kib'
+            }
+        assert routes['titles-list']['queries'] > 0
+        assert not User.objects.filter(
+            username__startswith='benchmark'
+        ).exists(), (
+            'Проверьте, что пользователи, созданные замером, не сохраняются'
+        )
+
+    def test_generate_requires_empty_db(self, titles):
+        with pytest.raises(CommandError):
+            call_command('benchmarkapi', *GENERATE_ARGS)
+
+    def test_baseline(self, tmp_path, titles, reviews):
+        output = tmp_path / 'benchmark.json'
+        call_command('benchmarkapi', '--repeat', '1', '--output', str(output))
+        results = json.loads(output.read_text(encoding='utf-8'))
+        for metrics in results['routes'].values():
+            for metric in ('p50_ms', 'p95_ms', 'memory_kib'):
+                metrics[metric] *= 1000
+        output.write_text(json.dumps(results), encoding='utf-8')
+        call_command('benchmarkapi', '--repeat', '1', '--baseline', str(output))
+
+        results['routes']['titles-list']['queries'] -= 1
+        output.write_text(json.dumps(results), encoding='utf-8')
+        with pytest.raises(CommandError, match='titles-list: queries'):
+            call_command(
+                'benchmarkapi', '--repeat', '1', '--baseline', str(output)
+            )
+
+    def test_baseline_metrics(self, tmp_path, titles, reviews):
+        output = tmp_path / 'benchmark.json'
+        call_command('benchmarkapi', '--repeat', '1', '--output', str(output))
+        results = json.loads(output.read_text(encoding='utf-8'))
+        for metrics in results['routes'].values():
+            metrics['p50_ms'] = metrics['p95_ms'] = 0
+        output.write_text(json.dumps(results), encoding='utf-8')
+        call_command(
+            'benchmarkapi', '--repeat', '1', '--baseline', str(output),
+            '--metrics', 'queries'
+        )
+        with pytest.raises(CommandError, match='p95_ms'):
+            call_command(
+                'benchmarkapi', '--repeat', '1', '--baseline', str(output)
+            )
@@ -0,0 +1,112 @@
+import pytest
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from tests.fixtures.fixture_data import auth_client, create_user
+
+USERS_URL = '/api/v1/users/'
+ME_URL = '/api/v1/users/me/'
+CATEGORIES_URL = '/api/v1/categories/'
+# COUNT(*) для пагинации и список категорий.
+CATEGORIES_LIST_QUERIES = 2
+# COUNT(*) для пагинации и список пользователей.
+USERS_LIST_QUERIES = 2
+
+
+@pytest.fixture
+def admin(db):
+    return create_user('admin')
+
+
+@pytest.mark.django_db
+class TestClaimsAuthentication:
+
+    def test_token_contains_claims(self, client, admin):
+        from rest_framework_simplejwt.tokens import AccessToken
+        from reviews.models import ConfirmationCode
+        response = client.post('/api/v1/auth/token/', {
+            'username': admin.username,
+            'confirmation_code': ConfirmationCode.objects.issue(admin)
+        })
+        token = AccessToken(response.json()['token'])
+        assert token['username'] == admin.username
+        assert token['role'] == admin.role, (
+            'Проверьте, что в токен записывается роль пользователя'
+        )
+
+    def test_read_without_user_query(self, client, titles,
+                                     django_assert_num_queries):
+        client = auth_client(create_user('user'))
+        with django_assert_num_queries(CATEGORIES_LIST_QUERIES):
+            response = client.get(CATEGORIES_URL)
+        assert response.status_code == 200, (
+            'Проверьте, что пользователь с токеном читает данные '
+            'без запроса к таблице пользователей'
+        )
+
+    def test_admin_read_checks_user(self, client, admin,
+                                    django_assert_num_queries):
+        from reviews.models import User
+        client = auth_client(admin)
+        with django_assert_num_queries(USERS_LIST_QUERIES + 1):
+            response = client.get(USERS_URL)
+        assert response.status_code == 200
+        with django_assert_num_queries(USERS_LIST_QUERIES):
+            client.get(USERS_URL)
+        admin.role = User.USER
+        admin.save()
+        response = client.get(USERS_URL)
+        assert response.status_code == 403, (
+            'Проверьте, что права администратора на чтение проверяются '
+            'по пользователю, а не по роли в токене'
+        )
+
+    def test_token_without_claims(self, client, admin,
+                                  django_assert_num_queries):
+        client = auth_client(admin, RefreshToken)
+        with django_assert_num_queries(USERS_LIST_QUERIES + 1):
+            response = client.get(USERS_URL)
+        assert response.status_code == 200, (
+            'Проверьте, что токены без утверждений о пользователе '
+            'по-прежнему принимаются'
+        )
+
+    def test_me(self, client, django_assert_num_queries):
+        user = create_user('user')
+        client = auth_client(user)
+        with django_assert_num_queries(1):
+            response = client.get(ME_URL)
+        assert response.json()['email'] == user.email
+        response = client.patch(
+            ME_URL, {'bio': 'Новая биография'},
+            content_type='application/json'
+        )
+        assert response.status_code == 200
+        assert response.json()['bio'] == 'Новая биография'
+
+    def test_write_uses_user_cache(self, admin, django_assert_num_queries):
+        from api.authentication import get_cached_user
+        with django_assert_num_queries(1):
+            first = get_cached_user(admin.pk)
+            second = get_cached_user(admin.pk)
+        assert first == second == admin
+        assert first is not second, (
+            'Проверьте, что из кэша возвращается копия пользователя'
+        )
+
+    def test_user_cache_invalidated_on_save(self, admin):
+        from api.authentication import get_cached_user
+        from reviews.models import User
+        get_cached_user(admin.pk)
+        admin.role = User.USER
+        admin.save()
+        assert get_cached_user(admin.pk).role == User.USER, (
+            'Проверьте, что пользователь удаляется из кэша при сохранении'
+        )
+
+    def test_user_cache_ttl(self, admin, settings,
+                            django_assert_num_queries):
+        from api.authentication import get_cached_user
+        settings.AUTH_USER_CACHE_TTL = 0
+        with django_assert_num_queries(2):
+            get_cached_user(admin.pk)
+            get_cached_user(admin.pk)
@@ -0,0 +1,132 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.fixtures.fixture_data import auth_client
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConditionalGet:
+
+    def test_reviews_not_modified(self, client, titles, reviews,
+                                  django_assert_num_queries):
+        from reviews.models import Review, User
+        url = f'/api/v1/titles/{titles[0].id}/reviews/'
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag.startswith('W/'), (
+            f'Проверьте, что GET запрос на `{url}` возвращает слабый ETag'
+        )
+        assert response.has_header('Last-Modified')
+
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что при совпадении ETag возвращается 304'
+        )
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert response.status_code == 304
+
+        author = User.objects.create(username='late', email='l@yamdb.fake')
+        Review.objects.create(title=titles[0], author=author, score=3)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый отзыв меняет ETag списка отзывов'
+        )
+        assert response['ETag'] != etag
+
+    def test_other_title_reviews_unaffected(self, client, titles, reviews):
+        from reviews.models import Review, User
+        url = f'/api/v1/titles/{titles[1].id}/reviews/'
+        etag = client.get(url)['ETag']
+        author = User.objects.create(username='late', email='l@yamdb.fake')
+        Review.objects.create(title=titles[0], author=author, score=3)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+    def test_comment_update_changes_etag(self, client, titles, reviews):
+        from reviews.models import Comment
+        review = reviews[0]
+        url = f'/api/v1/titles/{titles[0].id}/reviews/{review.id}/comments/'
+        comment = Comment.objects.create(
+            review=review, author=review.author, text='Первый'
+        )
+        etag = client.get(url)['ETag']
+        comment.text = 'Исправленный'
+        comment.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()['results'][0]['text'] == 'Исправленный'
+
+    def test_comment_delete_changes_etag(self, client, titles, reviews):
+        from reviews.models import Comment
+        review = reviews[0]
+        url = f'/api/v1/titles/{titles[0].id}/reviews/{review.id}/comments/'
+        comment = Comment.objects.create(
+            review=review, author=review.author, text='Удаляемый'
+        )
+        etag = client.get(url)['ETag']
+        response = auth_client(review.author).delete(f'{url}{comment.id}/')
+        assert response.status_code == 204
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что удаление комментария меняет ETag списка'
+        )
+        assert response.json()['results'] == []
+
+    def test_review_delete_stale_comments_etag(self, client, titles,
+                                               reviews):
+        from reviews.models import Comment
+        review = reviews[0]
+        url = f'/api/v1/titles/{titles[0].id}/reviews/{review.id}/comments/'
+        Comment.objects.bulk_create(
+            Comment(review=review, author=review.author, text=f'Текст {i}')
+            for i in range(3)
+        )
+        etag = client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as context:
+            review.delete()
+        assert not [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_comment"' in query['sql']
+        ], 'Проверьте, что комментарии удаляются без выборки'
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 404, (
+            'Проверьте, что устаревший ETag комментариев удаленного '
+            'отзыва не получает 304'
+        )
+
+    def test_title_delete_stale_reviews_etag(self, client, titles,
+                                             reviews):
+        url = f'/api/v1/titles/{titles[1].id}/reviews/'
+        etag = client.get(url)['ETag']
+        titles[1].delete()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 404, (
+            'Проверьте, что устаревший ETag отзывов удаленного '
+            'произведения не получает 304'
+        )
+
+
+class TestSharedCacheCheck:
+
+    def test_process_local_cache_warning(self, settings):
+        from api.checks import check_shared_caches
+        settings.DEBUG = False
+        settings.CACHES = {
+            **settings.CACHES,
+            'api': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'throttle': {'BACKEND': 'django_redis.cache.RedisCache'},
+        }
+        warnings = check_shared_caches(None)
+        assert [(warning.id, warning.obj) for warning in warnings] == [
+            ('api.W001', 'api')
+        ], (
+            'Проверьте, что кэш ETag в памяти процесса вызывает '
+            'предупреждение api.W001'
+        )
+        settings.DEBUG = True
+        assert check_shared_caches(None) == []
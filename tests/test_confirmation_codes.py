@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+TOKEN_URL = '/api/v1/auth/token/'
+# Поиск кода с пользователем по индексу и погашение кода.
+TOKEN_QUERIES = 2
+
+
+@pytest.fixture
+def user(db):
+    from reviews.models import User
+    return User.objects.create(username='reader', email='r@yamdb.fake')
+
+
+def get_token(client, username, code):
+    return client.post(
+        TOKEN_URL, {'username': username, 'confirmation_code': code}
+    )
+
+
+@pytest.mark.django_db
+class TestConfirmationCodes:
+
+    def test_code_stored_hashed(self, user):
+        from reviews.models import ConfirmationCode
+        code = ConfirmationCode.objects.issue(user)
+        stored = ConfirmationCode.objects.get(user=user)
+        assert code not in stored.code_hash, (
+            'Проверьте, что код подтверждения хранится в виде хэша'
+        )
+        assert stored.expires_at > timezone.now()
+
+    def test_token_single_use(self, client, user,
+                              django_assert_num_queries):
+        from reviews.models import ConfirmationCode
+        code = ConfirmationCode.objects.issue(user)
+        with django_assert_num_queries(TOKEN_QUERIES):
+            response = get_token(client, user.username, code)
+        assert response.status_code == 200
+        assert 'token' in response.json()
+        response = get_token(client, user.username, code)
+        assert response.status_code == 400, (
+            'Проверьте, что код подтверждения нельзя использовать дважды'
+        )
+
+    def test_reissue_replaces_code(self, client, user):
+        from reviews.models import ConfirmationCode
+        old_code = ConfirmationCode.objects.issue(user)
+        new_code = ConfirmationCode.objects.issue(user)
+        assert get_token(client, user.username, old_code).status_code == 400
+        assert get_token(client, user.username, new_code).status_code == 200
+
+    def test_expired_code(self, client, user):
+        from reviews.models import ConfirmationCode
+        code = ConfirmationCode.objects.issue(user)
+        ConfirmationCode.objects.update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        response = get_token(client, user.username, code)
+        assert response.status_code == 400, (
+            'Проверьте, что просроченный код не принимается'
+        )
+
+    def test_wrong_code_and_user(self, client, user):
+        from reviews.models import ConfirmationCode
+        code = ConfirmationCode.objects.issue(user)
+        assert get_token(client, user.username, 'wrong').status_code == 400
+        assert get_token(client, 'missing', code).status_code == 404
+
+    def test_signup_sends_code(self, client, user, settings):
+        from reviews.models import OutgoingEmail
+        settings.EMAIL_QUEUE_MODE = 'worker'
+        client.post(
+            '/api/v1/auth/signup/',
+            {'username': user.username, 'email': user.email}
+        )
+        body = OutgoingEmail.objects.get().body
+        code = body.split('Ваш код подтверждения: ')[1].split()[0]
+        assert get_token(client, user.username, code).status_code == 200
+
+    def test_purge(self, user):
+        from reviews.models import ConfirmationCode, User
+        other = User.objects.create(username='other', email='o@yamdb.fake')
+        ConfirmationCode.objects.issue(user)
+        ConfirmationCode.objects.consume(
+            other.username, ConfirmationCode.objects.issue(other)
+        )
+        call_command('purgeconfirmationcodes')
+        assert list(
+            ConfirmationCode.objects.values_list('user', flat=True)
+        ) == [user.pk], (
+            'Проверьте, что удаляются только использованные '
+            'и просроченные коды'
+        )
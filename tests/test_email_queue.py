@@ -0,0 +1,239 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+
+
+class FailingBackend(BaseEmailBackend):
+    """Почтовый бэкенд, который не может отправить письмо."""
+
+    def send_messages(self, email_messages):
+        raise ConnectionError('Почтовый сервер недоступен')
+
+
+class RecordingBackend(BaseEmailBackend):
+    """Запоминает статус письма в БД и транзакцию на момент отправки."""
+    sent = []
+
+    def send_messages(self, email_messages):
+        from django.db import connection
+        from reviews.models import OutgoingEmail
+        for message in email_messages:
+            RecordingBackend.sent.append((
+                OutgoingEmail.objects.get(to_email=message.to[0]).status,
+                connection.in_atomic_block
+            ))
+        return len(email_messages)
+
+
+@pytest.fixture
+def queued(db):
+    from reviews.models import OutgoingEmail
+    return [
+        OutgoingEmail.objects.create(
+            subject=f'Тема {i}',
+            body='Текст',
+            from_email='no_answer@local.net',
+            to_email=f'user{i}@yamdb.fake'
+        )
+        for i in range(3)
+    ]
+
+
+@pytest.mark.django_db
+class TestEmailQueue:
+
+    def test_signup_queues_email(self, client, settings):
+        from reviews.models import OutgoingEmail, User
+        settings.EMAIL_QUEUE_MODE = 'worker'
+        user = User.objects.create(username='reader', email='r@yamdb.fake')
+        response = client.post(
+            SIGNUP_URL, {'username': user.username, 'email': user.email}
+        )
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что письмо не отправляется во время запроса'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.to_email == user.email
+        assert email.status == OutgoingEmail.PENDING
+        assert email.expires_at > timezone.now(), (
+            'Проверьте, что письмо с кодом получает срок действия кода'
+        )
+
+    def test_batch_uses_one_connection(self, queued, monkeypatch):
+        from api import mail as mail_queue
+        from reviews.models import OutgoingEmail
+        connections = []
+        get_connection = mail_queue.get_connection
+
+        def counting_connection(*args, **kwargs):
+            connections.append(get_connection(*args, **kwargs))
+            return connections[-1]
+
+        monkeypatch.setattr(mail_queue, 'get_connection', counting_connection)
+        assert mail_queue.deliver_batch() == len(queued)
+        assert len(connections) == 1, (
+            'Проверьте, что пачка писем отправляется через одно соединение'
+        )
+        assert len(mail.outbox) == len(queued)
+        assert not OutgoingEmail.objects.exclude(
+            status=OutgoingEmail.SENT
+        ).exists()
+
+    def test_retry_with_backoff(self, queued, settings):
+        from api.mail import deliver_batch
+        from reviews.models import OutgoingEmail
+        settings.EMAIL_BACKEND = f'{__name__}.FailingBackend'
+        settings.EMAIL_QUEUE_RETRY_DELAY = 10
+        settings.EMAIL_QUEUE_MAX_ATTEMPTS = 2
+        deliver_batch()
+        email = OutgoingEmail.objects.get(pk=queued[0].pk)
+        assert email.status == OutgoingEmail.PENDING
+        assert email.attempts == 1
+        assert email.next_attempt_at > timezone.now(), (
+            'Проверьте, что повторная отправка откладывается'
+        )
+        assert deliver_batch() == 0, (
+            'Проверьте, что письма не отправляются до следующей попытки'
+        )
+        OutgoingEmail.objects.update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        deliver_batch()
+        email.refresh_from_db()
+        assert email.status == OutgoingEmail.FAILED, (
+            'Проверьте, что после последней попытки письмо помечается '
+            'как не отправленное'
+        )
+
+    def test_body_cleared_after_delivery(self, queued, settings):
+        from api.mail import deliver_batch
+        from reviews.models import OutgoingEmail
+        deliver_batch()
+        assert not OutgoingEmail.objects.exclude(body='').exists(), (
+            'Проверьте, что текст отправленного письма стирается'
+        )
+        failed = OutgoingEmail.objects.create(
+            subject='Тема', body='Текст', to_email='failed@yamdb.fake'
+        )
+        settings.EMAIL_BACKEND = f'{__name__}.FailingBackend'
+        settings.EMAIL_QUEUE_MAX_ATTEMPTS = 1
+        deliver_batch()
+        failed.refresh_from_db()
+        assert failed.status == OutgoingEmail.FAILED
+        assert failed.body == '', (
+            'Проверьте, что текст неотправленного письма стирается '
+            'после последней попытки'
+        )
+
+    def test_purge_expired_emails(self, queued, settings):
+        from reviews.models import OutgoingEmail
+        settings.EMAIL_QUEUE_MODE = 'worker'
+        expired = timezone.now() - timedelta(seconds=1)
+        OutgoingEmail.objects.filter(pk=queued[0].pk).update(
+            expires_at=expired
+        )
+        OutgoingEmail.objects.filter(pk=queued[1].pk).update(
+            expires_at=expired, status=OutgoingEmail.SENT
+        )
+        OutgoingEmail.objects.filter(pk=queued[2].pk).update(
+            expires_at=timezone.now() + timedelta(hours=1)
+        )
+        call_command('purgeconfirmationcodes')
+        assert list(
+            OutgoingEmail.objects.values_list('pk', flat=True)
+        ) == [queued[2].pk], (
+            'Проверьте, что purgeconfirmationcodes удаляет письма '
+            'с просроченными кодами в любом статусе'
+        )
+
+    def test_command_sends_queue(self, queued):
+        call_command('sendqueuedemails', '--once', '--batch-size', '2')
+        assert len(mail.outbox) == len(queued)
+
+    def test_command_purges_old_emails(self, queued, settings):
+        from reviews.models import OutgoingEmail
+        settings.EMAIL_QUEUE_RETENTION = 60
+        old = timezone.now() - timedelta(minutes=2)
+        OutgoingEmail.objects.filter(pk=queued[0].pk).update(
+            status=OutgoingEmail.SENT, created_at=old
+        )
+        OutgoingEmail.objects.filter(pk=queued[1].pk).update(
+            status=OutgoingEmail.FAILED, created_at=old
+        )
+        OutgoingEmail.objects.filter(pk=queued[2].pk).update(
+            next_attempt_at=timezone.now() + timedelta(hours=1),
+            created_at=old
+        )
+        call_command('sendqueuedemails', '--once')
+        assert OutgoingEmail.objects.count() == len(queued), (
+            'Проверьте, что без --purge письма не удаляются'
+        )
+        call_command('sendqueuedemails', '--once', '--purge')
+        assert list(
+            OutgoingEmail.objects.values_list('pk', flat=True)
+        ) == [queued[2].pk], (
+            'Проверьте, что --purge удаляет только отправленные '
+            'и неотправленные письма старше EMAIL_QUEUE_RETENTION'
+        )
+
+    def test_filebased_backend(self, queued, settings, tmp_path):
+        from api.mail import deliver_batch
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.filebased.EmailBackend'
+        )
+        settings.EMAIL_FILE_PATH = str(tmp_path)
+        deliver_batch()
+        content = ''.join(path.read_text() for path in tmp_path.iterdir())
+        assert all(email.to_email in content for email in queued)
+
+    def test_stale_claim_reclaimed(self, queued):
+        from api.mail import deliver_batch
+        from reviews.models import OutgoingEmail
+        OutgoingEmail.objects.filter(pk=queued[0].pk).update(
+            status=OutgoingEmail.SENDING,
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        OutgoingEmail.objects.filter(pk=queued[1].pk).update(
+            status=OutgoingEmail.SENDING,
+            next_attempt_at=timezone.now() + timedelta(minutes=5)
+        )
+        assert deliver_batch() == 2
+        assert OutgoingEmail.objects.get(
+            pk=queued[0].pk
+        ).status == OutgoingEmail.SENT, (
+            'Проверьте, что письмо зависшего воркера отправляется повторно '
+            'после EMAIL_QUEUE_CLAIM_TIMEOUT'
+        )
+        assert OutgoingEmail.objects.get(
+            pk=queued[1].pk
+        ).status == OutgoingEmail.SENDING, (
+            'Проверьте, что письмо, которое отправляет другой воркер, '
+            'не забирается до истечения срока'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestEmailQueueClaim:
+
+    def test_send_outside_transaction(self, queued, settings):
+        from api.mail import deliver_batch
+        from reviews.models import OutgoingEmail
+        settings.EMAIL_BACKEND = f'{__name__}.RecordingBackend'
+        RecordingBackend.sent = []
+        assert deliver_batch() == len(queued)
+        assert RecordingBackend.sent == [
+            (OutgoingEmail.SENDING, False)
+        ] * len(queued), (
+            'Проверьте, что письма помечаются как отправляемые и '
+            'отправляются вне транзакции'
+        )
+        assert set(OutgoingEmail.objects.values_list(
+            'status', flat=True
+        )) == {OutgoingEmail.SENT}
@@ -0,0 +1,62 @@
+import gzip
+
+import pytest
+from django.core.management import call_command
+
+
+def table_rows():
+    from reviews.management.csvdata import TABLES
+    return {
+        table.filename: list(table.model.objects.order_by('pk').values_list(
+            *table.columns.values()
+        ))
+        for table in TABLES
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class TestExportCsv:
+
+    def test_round_trip(self, tmp_path, reviews):
+        from reviews.models import Comment
+        Comment.objects.create(
+            review=reviews[0], author=reviews[1].author, text='Согласен'
+        )
+        exported = table_rows()
+        call_command('exportcsv', '--path', tmp_path)
+        call_command('importcsv', '--path', tmp_path)
+        assert table_rows() == exported, (
+            'Проверьте, что выгрузка exportcsv загружается importcsv '
+            'без изменений'
+        )
+
+    def test_gzip(self, tmp_path, titles):
+        call_command('exportcsv', '--path', tmp_path / 'plain')
+        call_command('exportcsv', '--path', tmp_path / 'gzip', '--gzip')
+        plain = (tmp_path / 'plain' / 'titles.csv').read_bytes()
+        with gzip.open(tmp_path / 'gzip' / 'titles.csv.gz') as gzip_file:
+            assert gzip_file.read() == plain
+
+    def test_single_snapshot(self, tmp_path, reviews, monkeypatch):
+        from django.db import connection
+        from reviews.models import Review
+        if connection.vendor != 'postgresql':
+            pytest.skip('Снимок делится между потоками только в PostgreSQL')
+        from reviews.management.commands.exportcsv import Command
+        copy_table = Command.copy_table
+        deleted = []
+
+        def copy_after_delete(command, table, write_file):
+            # Изменение после начала выгрузки не должно попасть в файлы.
+            if not deleted:
+                deleted.append(Review.objects.filter(
+                    pk=reviews[0].pk
+                ).delete())
+            return copy_table(command, table, write_file)
+
+        monkeypatch.setattr(Command, 'copy_table', copy_after_delete)
+        call_command('exportcsv', '--path', tmp_path, '--jobs', 2)
+        exported = (tmp_path / 'review.csv').read_text(encoding='utf-8')
+        assert f'\n{reviews[0].pk},' in exported, (
+            'Проверьте, что все таблицы выгружаются из одного снимка БД'
+        )
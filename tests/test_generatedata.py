@@ -0,0 +1,113 @@
+import csv
+
+import pytest
+from django.core.management import CommandError, call_command
+
+SIZE_ARGS = (
+    '--users', '20', '--titles', '30', '--reviews', '200',
+    '--comments', '100', '--end-date', '2026-01-01'
+)
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8') as csv_file:
+        return list(csv.DictReader(csv_file))
+
+
+class TestGenerateData:
+
+    def test_zipf_counts(self):
+        from reviews.management.commands.generatedata import zipf_counts
+        counts = zipf_counts(1000, 50, 1.0)
+        assert sum(counts) == 1000
+        assert counts == sorted(counts, reverse=True), (
+            'Проверьте, что доля корзины убывает с рангом'
+        )
+        assert counts[0] > 10 * counts[-1]
+        assert max(zipf_counts(1000, 50, 1.0, cap=30)) == 30
+
+    def test_csv_layout(self, tmp_path):
+        from reviews.management.csvdata import TABLES
+        call_command('generatedata', *SIZE_ARGS, '--output-dir', tmp_path)
+        for table in TABLES:
+            with open(tmp_path / table.filename, encoding='utf-8') as file:
+                header = next(csv.reader(file))
+            assert header == list(table.columns), (
+                f'Проверьте, что колонки {table.filename} совпадают '
+                'с форматом importcsv'
+            )
+        reviews = read_csv(tmp_path / 'review.csv')
+        comments = read_csv(tmp_path / 'comments.csv')
+        assert len(reviews) == 200
+        assert len(comments) == 100
+        assert len({(r['title_id'], r['author']) for r in reviews}) == 200, (
+            'Проверьте, что автор пишет один отзыв на произведение'
+        )
+        dates = {review['id']: review['pub_date'] for review in reviews}
+        assert all(
+            comment['pub_date'] >= dates[comment['review_id']]
+            for comment in comments
+        ), 'Проверьте, что комментарий опубликован после отзыва'
+
+    def test_deterministic(self, tmp_path):
+        call_command(
+            'generatedata', *SIZE_ARGS, '--output-dir', tmp_path / 'first'
+        )
+        call_command(
+            'generatedata', *SIZE_ARGS, '--output-dir', tmp_path / 'second'
+        )
+        call_command(
+            'generatedata', *SIZE_ARGS, '--seed', '1',
+            '--output-dir', tmp_path / 'other'
+        )
+        first = read_csv(tmp_path / 'first' / 'review.csv')
+        assert first == read_csv(tmp_path / 'second' / 'review.csv'), (
+            'Проверьте, что данные зависят только от --seed'
+        )
+        assert first != read_csv(tmp_path / 'other' / 'review.csv')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_import_generated_csv(self, tmp_path):
+        from reviews.models import Comment, GenreTitle, Review, Title
+        call_command('generatedata', *SIZE_ARGS, '--output-dir', tmp_path)
+        call_command('importcsv', '--path', tmp_path)
+        assert Title.objects.count() == 30
+        assert Review.objects.count() == 200
+        assert Comment.objects.count() == 100
+        assert GenreTitle.objects.count() == len(
+            read_csv(tmp_path / 'genre_title.csv')
+        )
+
+    @pytest.mark.django_db
+    def test_write_db(self):
+        from django.db.models import Count
+        from reviews.models import Comment, Ranking, Review, Title, User
+        User.objects.create(username='admin', email='admin@yamdb.fake')
+        call_command('generatedata', *SIZE_ARGS)
+        assert User.objects.count() == 21
+        assert Review.objects.count() == 200
+        assert Comment.objects.count() == 100
+        per_title = sorted(
+            Title.objects.annotate(count=Count('reviews')).values_list(
+                'count', flat=True
+            ),
+            reverse=True
+        )
+        assert per_title[0] > 3 * per_title[len(per_title) // 2], (
+            'Проверьте, что отзывы по произведениям распределены с перекосом'
+        )
+        assert Title.objects.filter(rating__isnull=False).exists()
+        assert Ranking.objects.filter(board=Ranking.TOP).exists()
+        review = Review.objects.create(
+            title=Title.objects.first(),
+            author=User.objects.get(username='admin'),
+            score=5
+        )
+        assert review.pk == 201, (
+            'Проверьте, что последовательности id сдвигаются после вставки'
+        )
+
+    @pytest.mark.django_db
+    def test_write_db_requires_empty_tables(self, titles):
+        with pytest.raises(CommandError):
+            call_command('generatedata', *SIZE_ARGS)
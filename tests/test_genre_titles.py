@@ -0,0 +1,64 @@
+import pytest
+from django.db import IntegrityError
+
+GENRE_TITLES_URL = '/api/v1/genres/{slug}/titles/'
+# Жанр, COUNT(*) для пагинации, произведения с категориями
+# и prefetch жанров.
+GENRE_TITLES_QUERIES = 4
+
+
+@pytest.mark.django_db
+class TestGenreTitles:
+
+    @pytest.mark.parametrize('limit', [1, 10, 100])
+    def test_genre_titles_queries(self, client, genres, titles, limit,
+                                  django_assert_num_queries):
+        url = GENRE_TITLES_URL.format(slug=genres[0].slug)
+        with django_assert_num_queries(GENRE_TITLES_QUERIES):
+            response = client.get(url, {'limit': limit})
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос на `{url}` возвращает 200'
+        )
+        assert len(response.json()['results']) == min(
+            limit, genres[0].titles.count()
+        )
+
+    def test_genre_titles_content(self, client, genres, titles):
+        url = GENRE_TITLES_URL.format(slug=genres[-1].slug)
+        response = client.get(url, {'limit': 100})
+        expected = [
+            title.id for title in titles if genres[-1] in title.genre.all()
+        ]
+        data = response.json()
+        assert data['count'] == len(expected), (
+            f'Проверьте, что `{url}` возвращает только произведения жанра'
+        )
+        assert [title['id'] for title in data['results']] == expected
+        assert data['results'][0]['genre'], (
+            'Проверьте, что для произведений жанра выводятся их жанры'
+        )
+
+    def test_genre_titles_not_found(self, client, genres):
+        url = GENRE_TITLES_URL.format(slug='missing')
+        response = client.get(url)
+        assert response.status_code == 404, (
+            f'Проверьте, что GET запрос на `{url}` для несуществующего '
+            'жанра возвращает 404'
+        )
+
+    def test_genre_title_unique(self, genres, titles):
+        from reviews.models import GenreTitle
+        with pytest.raises(IntegrityError):
+            GenreTitle.objects.create(title=titles[0], genre=genres[0])
+
+    @pytest.mark.django_db(transaction=True)
+    def test_genre_titles_cache_invalidated(self, client, genres, titles):
+        from reviews.models import Title
+        url = GENRE_TITLES_URL.format(slug=genres[0].slug)
+        count = client.get(url).json()['count']
+        title = Title.objects.create(name='Новое', year=2020)
+        title.genre.add(genres[0])
+        assert client.get(url).json()['count'] == count + 1, (
+            'Проверьте, что список произведений жанра обновляется '
+            'после изменения произведений'
+        )
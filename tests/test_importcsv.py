@@ -0,0 +1,371 @@
+import csv
+import io
+import shutil
+import threading
+import time
+from os.path import join
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+def data_dir():
+    from django.conf import settings
+    return join(settings.STATIC_ROOT, 'data')
+
+
+def get_table(filename):
+    from reviews.management.csvdata import TABLES
+    return next(table for table in TABLES if table.filename == filename)
+
+
+def skip_unless_postgresql():
+    from django.db import connection
+    if connection.vendor != 'postgresql':
+        pytest.skip('COPY FROM STDIN доступен только в PostgreSQL')
+
+
+class CopyCursor:
+    """Курсор, который принимает поток COPY FROM STDIN без PostgreSQL."""
+
+    def __init__(self, size=8192):
+        self.size = size
+        self.copied = []
+
+    def copy_expert(self, sql, stream):
+        blocks = []
+        for block in iter(lambda: stream.read(self.size), ''):
+            blocks.append(block)
+        self.copied.append((sql, ''.join(blocks)))
+
+
+def rewrite_csv(csv_file, transform):
+    """Перезаписывает файл строками, которые вернула transform."""
+    with open(csv_file, encoding='utf-8') as read_file:
+        reader = csv.DictReader(read_file)
+        fieldnames = reader.fieldnames
+        rows = transform(list(reader))
+    with open(csv_file, 'w', encoding='utf-8', newline='') as write_file:
+        writer = csv.DictWriter(write_file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def rating_fields():
+    from reviews.models import Title
+    return list(Title.objects.order_by('pk').values_list(
+        'pk', 'rating', 'reviews_count', 'score_sum'
+    ))
+
+
+@pytest.fixture
+def data_copy(tmp_path):
+    path = tmp_path / 'data'
+    shutil.copytree(data_dir(), path)
+    return path
+
+
+@pytest.mark.django_db(transaction=True)
+class TestImportCsvBulk:
+
+    def test_batched_inserts(self, data_copy):
+        from django.db import connection
+        from reviews.models import Review
+        if connection.vendor == 'postgresql':
+            pytest.skip('PostgreSQL загружает файлы через COPY')
+        insert = f'INSERT INTO "{Review._meta.db_table}"'
+        batches = []
+
+        def record_inserts(execute, sql, params, many, context):
+            if sql.startswith(insert):
+                batches.append(len(params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record_inserts):
+            call_command('importcsv', '--path', data_copy, '--batch-size', 10)
+        assert batches == [10] * 7 + [2], (
+            'Проверьте, что 72 отзыва загружаются порциями '
+            'по --batch-size строк'
+        )
+        assert Review.objects.count() == 72
+
+    def test_keeps_file_values(self, data_copy):
+        from reviews.models import Review, Title
+        call_command('importcsv', '--path', data_copy, '--batch-size', 7)
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.isoformat() == (
+            '2019-09-24T21:08:21.567000+00:00'
+        ), 'Проверьте, что дата публикации берется из файла'
+        assert review.author_id == 100
+        title = Title.objects.get(pk=1)
+        assert title.reviews_count == title.reviews.count(), (
+            'Проверьте, что после загрузки пересчитывается рейтинг'
+        )
+
+    def test_reload_replaces_rows(self, data_copy):
+        from reviews.models import Category, Title
+        Category.objects.create(name='Лишняя', slug='extra')
+        call_command('importcsv', '--path', data_copy)
+        call_command('importcsv', '--path', data_copy)
+        assert not Category.objects.filter(slug='extra').exists()
+        assert Title.objects.count() == 32
+
+
+@pytest.mark.django_db(transaction=True)
+class TestImportCsvIncremental:
+    OLD_DATE = '2000-01-01T00:00:00Z'
+
+    @pytest.fixture
+    def imported(self, data_copy):
+        from reviews.models import Title
+        call_command('importcsv', '--path', data_copy)
+        Title.objects.update(updated_at=self.OLD_DATE)
+        return data_copy
+
+    def test_upsert_changed_rows(self, imported):
+        from reviews.models import Review, Title
+
+        def change_reviews(rows):
+            for row in rows:
+                if row['id'] == '1':
+                    row['score'] = '2'
+                if row['id'] == '4':
+                    row['title_id'] = '26'
+            return rows + [{
+                'id': '500', 'title_id': '1', 'text': 'Новый отзыв',
+                'author': '102', 'score': '6',
+                'pub_date': '2021-01-01T00:00:00Z'
+            }]
+
+        rewrite_csv(imported / 'review.csv', change_reviews)
+        call_command('importcsv', '--path', imported, '--incremental')
+        assert Review.objects.count() == 73
+        assert Review.objects.get(pk=4).title_id == 26
+        changed = Title.objects.filter(
+            updated_at__gt=self.OLD_DATE
+        ).values_list('pk', flat=True)
+        assert sorted(changed) == [1, 2, 26], (
+            'Проверьте, что пересчитываются прежнее и новое произведение '
+            'измененных отзывов'
+        )
+        assert Title.objects.get(pk=1).rating == 6
+        ratings = rating_fields()
+        Title.objects.recalculate_rating()
+        assert ratings == rating_fields(), (
+            'Проверьте, что после обновления отзывов рейтинг '
+            'произведений совпадает с пересчетом'
+        )
+
+    def test_recalculates_only_changed_titles(self, imported):
+        from reviews.models import Title
+        rewrite_csv(imported / 'review.csv', lambda rows: [
+            {**row, 'score': '1'} if row['id'] == '1' else row
+            for row in rows
+        ])
+        call_command('importcsv', '--path', imported, '--incremental')
+        changed = Title.objects.filter(
+            updated_at__gt=self.OLD_DATE
+        ).values_list('pk', flat=True)
+        assert list(changed) == [1], (
+            'Проверьте, что рейтинг пересчитывается только у произведений '
+            'с измененными отзывами'
+        )
+
+    def test_genre_change_touches_title(self, imported):
+        from reviews.models import Title
+        rewrite_csv(imported / 'genre_title.csv', lambda rows: [
+            {**row, 'genre_id': '2'} if row['id'] == '1' else row
+            for row in rows
+        ])
+        call_command('importcsv', '--path', imported, '--incremental')
+        changed = Title.objects.filter(
+            updated_at__gt=self.OLD_DATE
+        ).values_list('pk', flat=True)
+        assert list(changed) == [1], (
+            'Проверьте, что смена жанра отмечает произведение измененным '
+            'для пересчета рейтингов'
+        )
+
+    def test_unchanged_files_skipped(self, imported):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from reviews.models import Title
+        from api.cache import ALL_GROUP, get_cache, get_version
+        version = get_version(get_cache(), ALL_GROUP)
+        output = io.StringIO()
+        with CaptureQueriesContext(connection) as context:
+            call_command(
+                'importcsv', '--path', imported, '--incremental',
+                stdout=output
+            )
+        assert output.getvalue().count('файл не изменился') == 7
+        writes = [
+            query['sql'] for query in context.captured_queries
+            if not query['sql'].startswith('SELECT')
+        ]
+        assert writes == [], (
+            'Проверьте, что без изменений в файлах команда ничего не пишет '
+            'в БД'
+        )
+        assert not Title.objects.filter(updated_at__gt=self.OLD_DATE).exists()
+        assert get_version(get_cache(), ALL_GROUP) == version, (
+            'Проверьте, что без изменений кэш ответов не сбрасывается'
+        )
+
+    def test_delete_missing(self, imported):
+        from reviews.models import GenreTitle, Review, Title
+        rewrite_csv(imported / 'review.csv', lambda rows: [
+            row for row in rows
+            if row['id'] != '2' and row['title_id'] != '32'
+        ])
+        rewrite_csv(imported / 'genre_title.csv', lambda rows: [
+            row for row in rows if row['title_id'] != '32'
+        ])
+        rewrite_csv(imported / 'titles.csv', lambda rows: [
+            row for row in rows if row['id'] != '32'
+        ])
+        call_command('importcsv', '--path', imported, '--incremental')
+        assert Review.objects.filter(pk=2).exists(), (
+            'Проверьте, что без --delete-missing строки не удаляются'
+        )
+        call_command(
+            'importcsv', '--path', imported, '--incremental',
+            '--delete-missing'
+        )
+        assert not Review.objects.filter(pk=2).exists()
+        assert not Title.objects.filter(pk=32).exists()
+        assert not GenreTitle.objects.filter(title_id=32).exists()
+        assert not Review.objects.filter(title_id=32).exists()
+        title = Title.objects.get(pk=1)
+        assert (title.reviews_count, title.rating) == (1, 10), (
+            'Проверьте, что удаление отзывов обновляет рейтинг'
+        )
+
+
+class TestImportCsvJobs:
+
+    def test_parallel_respects_dependencies(self, tmp_path):
+        from reviews.management.commands.importcsv import Command
+        from reviews.management.csvdata import TABLES
+        lock = threading.Lock()
+        done = set()
+        running = set()
+        concurrent = []
+
+        def import_table(table, csv_file):
+            with lock:
+                assert done.issuperset(table.depends), (
+                    f'{table.filename} запущен до загрузки зависимостей'
+                )
+                running.add(table.filename)
+                concurrent.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.discard(table.filename)
+                done.add(table.filename)
+
+        Command().import_parallel(import_table, tmp_path, 3)
+        assert done == {table.filename for table in TABLES}
+        assert max(concurrent) > 1, (
+            'Проверьте, что независимые таблицы загружаются одновременно'
+        )
+
+    def test_parallel_stops_on_error(self, tmp_path):
+        from reviews.management.commands.importcsv import Command
+        started = []
+
+        def import_table(table, csv_file):
+            started.append(table.filename)
+            if table.filename == 'titles.csv':
+                raise ValueError('битый файл')
+
+        with pytest.raises(CommandError, match='titles.csv'):
+            Command().import_parallel(import_table, tmp_path, 2)
+        assert 'review.csv' not in started, (
+            'Проверьте, что зависимые таблицы не загружаются после ошибки'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_jobs_import_postgresql(self, data_copy):
+        skip_unless_postgresql()
+        from reviews.models import GenreTitle, Review
+        call_command('importcsv', '--path', data_copy, '--jobs', 3)
+        assert Review.objects.count() == 72
+        assert GenreTitle.objects.count() == 41
+
+
+class TestImportCsvCopy:
+
+    @pytest.mark.parametrize('size', [1, 5, 8192, -1])
+    def test_copy_stream(self, size):
+        from reviews.management.commands.importcsv import CopyStream
+        chunks = [('a,b\n' * 3, 3), ('', 0), ('cc,d\n', 1), ('e,f\n' * 7, 7)]
+        stream = CopyStream(iter(chunks))
+        blocks = []
+        for block in iter(lambda: stream.read(size), ''):
+            assert size < 0 or len(block) <= size
+            blocks.append(block)
+        assert ''.join(blocks) == ''.join(text for text, _ in chunks), (
+            'Проверьте, что поток COPY отдает порции без потерь и повторов'
+        )
+        assert stream.rows == 11
+
+    def test_copy_fills_required_columns(self):
+        from reviews.management.commands.importcsv import (
+            COPY_NULL, Command, default_values
+        )
+        table = get_table('titles.csv')
+        command = Command()
+        command.batch_size = 10
+        cursor = CopyCursor()
+        rows = command.copy_from_csv(
+            cursor, table.model._meta.db_table, table,
+            join(data_dir(), table.filename)
+        )
+        _, data = cursor.copied[0]
+        fields = [
+            table.model._meta.get_field(attname)
+            for attname in table.columns.values()
+        ] + [
+            next(
+                field for field in table.model._meta.concrete_fields
+                if field.column == column
+            )
+            for column in default_values(table)
+        ]
+        copied = list(csv.reader(data.splitlines()))
+        assert len(copied) == rows
+        for row in copied:
+            for field, value in zip(fields, row):
+                assert field.null or value != COPY_NULL, (
+                    f'Проверьте, что COPY не передает NULL в обязательное '
+                    f'поле {field.name}'
+                )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_copy_import_postgresql(self, data_copy):
+        skip_unless_postgresql()
+        from reviews.models import Review, Title
+        call_command('importcsv', '--path', data_copy, '--batch-size', 10)
+        assert Title.objects.count() == 32
+        assert Review.objects.count() == 72
+        assert not Title.objects.filter(updated_at__isnull=True).exists()
+        assert Review.objects.get(pk=1).pub_date.year == 2019
+        title = Title.objects.get(pk=1)
+        assert title.reviews_count == title.reviews.count()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_upsert_touches_changed_rows(self, data_copy):
+        from reviews.models import Title
+        call_command('importcsv', '--path', data_copy)
+        Title.objects.update(updated_at='2000-01-01T00:00:00Z')
+        titles_csv = data_copy / 'titles.csv'
+        text = titles_csv.read_text(encoding='utf-8')
+        titles_csv.write_text(
+            text.replace('Побег из Шоушенка', 'Побег'), encoding='utf-8'
+        )
+        call_command('importcsv', '--path', data_copy, '--incremental')
+        assert Title.objects.get(name='Побег').updated_at.year > 2000, (
+            'Проверьте, что при обновлении меняется дата изменения '
+            'произведения'
+        )
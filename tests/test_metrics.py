@@ -0,0 +1,116 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from tests.fixtures.fixture_data import auth_client, create_user
+
+METRICS_URL = '/metrics'
+
+
+def sample_value(text, name, **labels):
+    """Значение метрики с метками из текстового формата Prometheus."""
+    from prometheus_client.parser import text_string_to_metric_families
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            if sample.name == name and all(
+                sample.labels.get(key) == value
+                for key, value in labels.items()
+            ):
+                return sample.value
+    return 0
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_request_and_cache_metrics(self, client, titles):
+        before = client.get(METRICS_URL).content.decode()
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        response = client.get(METRICS_URL)
+        assert response.status_code == 200, (
+            f'Проверьте, что `{METRICS_URL}` доступен из внутренней сети'
+        )
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        view = 'TitleViewSet.list'
+        for name, labels, delta in (
+            ('yamdb_request_duration_seconds_count',
+             {'view': view, 'method': 'GET', 'status': '200'}, 2),
+            ('yamdb_request_db_queries_count', {'view': view}, 2),
+            ('yamdb_api_cache_requests_total',
+             {'view': view, 'result': 'miss'}, 1),
+            ('yamdb_api_cache_requests_total',
+             {'view': view, 'result': 'hit'}, 1),
+        ):
+            assert sample_value(text, name, **labels) - sample_value(
+                before, name, **labels
+            ) == delta, f'Проверьте метрику {name} {labels}'
+        assert sample_value(
+            text, 'yamdb_request_db_queries_sum', view=view
+        ) - sample_value(
+            before, 'yamdb_request_db_queries_sum', view=view
+        ) == 3, 'Проверьте, что считаются SQL-запросы без попадания в кэш'
+
+    def test_email_metrics(self, client, settings):
+        from api.mail import deliver_batch
+        from reviews.models import OutgoingEmail
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+        before = client.get(METRICS_URL).content.decode()
+        OutgoingEmail.objects.create(
+            subject='Тема', body='Текст', from_email='a@yamdb.fake',
+            to_email='b@yamdb.fake'
+        )
+        deliver_batch()
+        text = client.get(METRICS_URL).content.decode()
+        name = 'yamdb_email_send_duration_seconds_count'
+        assert sample_value(text, name, status='sent') - sample_value(
+            before, name, status='sent'
+        ) == 1
+
+    def test_access(self, client, settings):
+        from reviews.models import User
+        settings.METRICS_ALLOWED_NETWORKS = []
+        assert client.get(METRICS_URL).status_code == 401, (
+            'Проверьте, что метрики недоступны анонимным пользователям '
+            'вне внутренней сети'
+        )
+        for role, status in ((User.USER, 403), (User.ADMIN, 200)):
+            assert auth_client(create_user(role)).get(
+                METRICS_URL
+            ).status_code == status
+        settings.METRICS_ALLOWED_NETWORKS = ['127.0.0.0/8']
+        assert client.get(METRICS_URL).status_code == 200
+        assert client.get(
+            METRICS_URL, HTTP_X_FORWARDED_FOR='10.0.0.1'
+        ).status_code == 401, (
+            'Проверьте, что запросы через прокси не считаются внутренними'
+        )
+
+
+def test_multiprocess_aggregation(tmp_path, monkeypatch):
+    """Значения нескольких процессов суммируются из общего каталога."""
+    from prometheus_client import generate_latest
+    env = {
+        **os.environ,
+        'PROMETHEUS_MULTIPROC_DIR': str(tmp_path),
+        'PYTHONPATH': 'api_yamdb',
+    }
+    for _ in range(2):
+        subprocess.run([
+            sys.executable, '-c',
+            'from api.metrics import observe_request; '
+            'observe_request("TitleViewSet.list", "GET", 200, 0.1, 3, 0.01)'
+        ], env=env, check=True)
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+    from api.metrics import get_registry
+    text = generate_latest(get_registry()).decode()
+    assert sample_value(
+        text, 'yamdb_request_duration_seconds_count',
+        view='TitleViewSet.list', status='200'
+    ) == 2, 'Проверьте, что метрики воркеров суммируются'
+    assert sample_value(
+        text, 'yamdb_request_db_queries_sum', view='TitleViewSet.list'
+    ) == 6
@@ -0,0 +1,104 @@
+import pstats
+import re
+
+import pytest
+
+from tests.fixtures.fixture_data import auth_client, create_user
+
+TITLES_URL = '/api/v1/titles/'
+PROFILES_URL = '/api/v1/profiles/'
+
+
+@pytest.fixture
+def profiling(settings, tmp_path):
+    settings.PROFILING_ENABLED = True
+    settings.PROFILING_DIR = str(tmp_path)
+    settings.PROFILING_SAMPLE_INTERVAL = 0.0005
+    return settings
+
+
+@pytest.mark.django_db
+class TestProfiling:
+
+    def test_disabled(self, settings, titles, tmp_path):
+        settings.PROFILING_DIR = str(tmp_path)
+        response = auth_client(create_user('admin')).get(
+            TITLES_URL, HTTP_X_PROFILE='1'
+        )
+        assert 'X-Profile-Id' not in response, (
+            'Проверьте, что без PROFILING_ENABLED запросы не профилируются'
+        )
+        assert not list(tmp_path.iterdir())
+
+    def test_admin_profile(self, profiling, titles):
+        admin = auth_client(create_user('admin'))
+        response = admin.get(TITLES_URL, HTTP_X_PROFILE='1')
+        profile_id = response.get('X-Profile-Id')
+        assert profile_id, (
+            'Проверьте, что запрос администратора с заголовком X-Profile '
+            'профилируется'
+        )
+        assert 'X-Profile-Id' not in admin.get(TITLES_URL)
+        assert 'X-Profile-Id' not in auth_client(create_user('user')).get(
+            TITLES_URL, HTTP_X_PROFILE='1'
+        ), 'Проверьте, что профилировать запросы может только администратор'
+
+        results = admin.get(PROFILES_URL).json()['results']
+        assert [profile['id'] for profile in results] == [profile_id]
+        assert results[0]['view'] == 'TitleViewSet.list'
+        assert 'sql' not in results[0]
+
+        profile = admin.get(f'{PROFILES_URL}{profile_id}/').json()
+        assert profile['queries'] == len(profile['sql']) == 3
+        assert any('reviews_title' in query['sql'] for query in profile['sql'])
+
+    def test_download(self, profiling, titles, tmp_path):
+        admin = auth_client(create_user('admin'))
+        profile_id = admin.get(
+            TITLES_URL, HTTP_X_PROFILE='1'
+        )['X-Profile-Id']
+        response = admin.get(f'{PROFILES_URL}{profile_id}/pstats/')
+        assert response.status_code == 200
+        path = tmp_path / 'downloaded.pstats'
+        path.write_bytes(b''.join(response.streaming_content))
+        functions = {
+            name for _, _, name in pstats.Stats(str(path)).stats
+        }
+        assert 'list' in functions, (
+            'Проверьте, что pstats содержит функции обработчика запроса'
+        )
+        response = admin.get(f'{PROFILES_URL}{profile_id}/collapsed/')
+        assert response.status_code == 200
+        for line in b''.join(response.streaming_content).decode().splitlines():
+            assert re.match(r'^\S[^ ]*(;[^ ;]+)* \d+$', line), (
+                f'Проверьте формат collapsed stacks: {line}'
+            )
+
+    def test_sample_rate(self, profiling, client, titles):
+        profiling.PROFILING_SAMPLE_RATE = 1
+        assert 'X-Profile-Id' in client.get(TITLES_URL)
+        profiling.PROFILING_SAMPLE_RATE = 0
+        assert 'X-Profile-Id' not in client.get(TITLES_URL)
+
+    def test_max_profiles(self, profiling, titles):
+        profiling.PROFILING_MAX_PROFILES = 2
+        admin = auth_client(create_user('admin'))
+        ids = [
+            admin.get(TITLES_URL, HTTP_X_PROFILE='1')['X-Profile-Id']
+            for _ in range(3)
+        ]
+        results = admin.get(PROFILES_URL).json()['results']
+        assert [profile['id'] for profile in results] == ids[:0:-1], (
+            'Проверьте, что старые профили удаляются'
+        )
+
+    def test_access(self, profiling, client):
+        assert client.get(PROFILES_URL).status_code == 401
+        assert auth_client(create_user('user')).get(
+            PROFILES_URL
+        ).status_code == 403
+        admin = auth_client(create_user('admin'))
+        assert admin.get(f'{PROFILES_URL}{"0" * 32}/').status_code == 404
+        assert admin.get(f'{PROFILES_URL}{"0" * 32}/pstats/').status_code == (
+            404
+        )
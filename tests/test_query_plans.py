@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+@contextmanager
+def dropped_index(model, name):
+    """Временно удаляет индекс модели, как будто его забыли создать."""
+    from django.db import connection
+    index = next(index for index in model._meta.indexes if index.name == name)
+    with connection.schema_editor() as editor:
+        editor.remove_index(model, index)
+    try:
+        yield
+    finally:
+        with connection.schema_editor() as editor:
+            editor.add_index(model, index)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCheckQueryPlans:
+
+    def test_indexed_queries_pass(self, titles, reviews):
+        try:
+            call_command('checkqueryplans', '--min-rows', '1')
+        except CommandError as error:
+            assert False, (
+                'Проверьте, что запросы API не сканируют последовательно '
+                f'таблицы с данными: {error}'
+            )
+
+    def test_missing_index_fails(self, titles, reviews):
+        from reviews.models import Title
+        # Составной индекс PostgreSQL тоже использует для условия по year.
+        with dropped_index(Title, 'title_year_idx'), dropped_index(
+            Title, 'title_category_year_idx'
+        ):
+            with pytest.raises(CommandError) as error:
+                call_command('checkqueryplans', '--min-rows', '1')
+        assert 'year=' in str(error.value)
+        assert 'reviews_title' in str(error.value), (
+            'Проверьте, что фильтр без индекса считается сканом таблицы'
+        )
+
+    def test_scan_below_threshold_passes(self, titles, reviews):
+        from reviews.models import Title
+        with dropped_index(Title, 'title_year_idx'):
+            call_command('checkqueryplans', '--min-rows', '1000')
+
+    def test_substring_search(self, titles, reviews):
+        from django.db import connection
+        if connection.vendor == 'postgresql':
+            # Поиск обслуживают триграммные индексы.
+            call_command('checkqueryplans', '--min-rows', '1', '--exclude')
+            return
+        with pytest.raises(CommandError, match='search='):
+            call_command(
+                'checkqueryplans', '--min-rows', '1', '--exclude'
+            )
+
+    def test_order_by_without_index(self, titles, reviews):
+        from django.db import connection
+        from reviews.management.commands.checkqueryplans import Command
+        if connection.vendor != 'sqlite':
+            pytest.skip('Проверяется план SQLite')
+        command = Command()
+        assert command.scanned_tables(
+            'SELECT id FROM reviews_review ORDER BY text LIMIT 10'
+        ) == ['reviews_review'], (
+            'Проверьте, что сортировка без индекса считается сканом'
+        )
+        assert command.scanned_tables(
+            'SELECT id FROM reviews_review ORDER BY id LIMIT 10'
+        ) == []
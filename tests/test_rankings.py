@@ -0,0 +1,165 @@
+import pytest
+
+TOP_URL = '/api/v1/titles/top/'
+TRENDING_URL = '/api/v1/titles/trending/'
+
+
+@pytest.fixture
+def rated_titles(titles):
+    from reviews.models import Review, User
+    authors = [
+        User.objects.create(username=f'critic{i}', email=f'c{i}@yamdb.fake')
+        for i in range(3)
+    ]
+    # Оценка и число отзывов растут с номером произведения.
+    for i, title in enumerate(titles[:6]):
+        for author in authors[:i % 3 + 1]:
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=i + 1
+            )
+    return titles
+
+
+def refresh(*args):
+    from django.core.management import call_command
+    call_command('refreshrankings', *args)
+
+
+def title_ids(response):
+    return [row['title']['id'] for row in response.json()['results']]
+
+
+@pytest.mark.django_db
+class TestRankings:
+
+    def test_top(self, client, rated_titles, django_assert_num_queries):
+        refresh()
+        with django_assert_num_queries(3):
+            response = client.get(TOP_URL)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос на `{TOP_URL}` возвращает 200'
+        )
+        data = response.json()
+        assert title_ids(response) == [
+            title.id for title in reversed(rated_titles[:6])
+        ], (
+            'Проверьте, что рейтинг содержит произведения с отзывами '
+            'по убыванию средней оценки'
+        )
+        assert [row['position'] for row in data['results']] == list(
+            range(1, 7)
+        )
+        assert data['results'][0]['score'] == 6
+        assert data['results'][0]['title']['genre'], (
+            'Проверьте, что в рейтинге произведения отдаются с жанрами'
+        )
+
+    def test_top_by_category_and_genre(self, client, rated_titles, genres,
+                                       categories):
+        refresh()
+        response = client.get(f'{TOP_URL}?category={categories[0].slug}')
+        assert title_ids(response) == [
+            rated_titles[i].id for i in (4, 2, 0)
+        ]
+        response = client.get(f'{TOP_URL}?genre={genres[2].slug}')
+        assert title_ids(response) == [
+            rated_titles[i].id for i in (5, 2)
+        ]
+        response = client.get(
+            f'{TOP_URL}?category={categories[0].slug}&genre={genres[0].slug}'
+        )
+        assert response.status_code == 400
+
+    def test_trending(self, client, rated_titles):
+        from django.utils import timezone
+        from reviews.models import Review
+        Review.objects.filter(title=rated_titles[5]).update(
+            pub_date=timezone.now() - timezone.timedelta(days=30)
+        )
+        refresh()
+        response = client.get(TRENDING_URL)
+        assert response.status_code == 200
+        assert [
+            (row['title']['id'], row['score'])
+            for row in response.json()['results']
+        ] == sorted(
+            [(rated_titles[i].id, i % 3 + 1) for i in range(5)],
+            key=lambda row: (-row[1], row[0])
+        ), (
+            'Проверьте, что trending считает только отзывы за окно '
+            'по убыванию их количества'
+        )
+
+    def test_incremental_refresh(self, client, rated_titles, genres):
+        from reviews.models import Ranking, Review
+        refresh()
+        review = Review.objects.filter(title=rated_titles[0]).first()
+        review.score = 10
+        review.save()
+        # Произведение 0 входит только в жанр 0 и категорию 0.
+        assert Ranking.objects.refresh() == 4
+        response = client.get(f'{TOP_URL}?genre={genres[0].slug}')
+        assert title_ids(response)[0] == rated_titles[0].id, (
+            'Проверьте, что рейтинг жанра пересчитывается '
+            'после изменения оценки'
+        )
+        assert Ranking.objects.refresh(full=True) == 2 + 2 + 3
+
+    def test_refresh_invalidates_cache(self, client, rated_titles):
+        from reviews.models import Review, Title
+        refresh()
+        client.get(TOP_URL)
+        Review.objects.filter(title=rated_titles[0]).update(score=10)
+        Title.objects.filter(pk=rated_titles[0].pk).recalculate_rating()
+        refresh()
+        response = client.get(TOP_URL)
+        assert title_ids(response)[0] == rated_titles[0].id
+
+    def test_deleted_genre(self, client, rated_titles, genres):
+        from reviews.models import Ranking
+        refresh()
+        slug = genres[2].slug
+        genres[2].delete()
+        refresh()
+        assert not Ranking.objects.filter(board=f'genre:{slug}').exists()
+
+    def test_genre_change_refreshes_board(self, client, rated_titles,
+                                          genres):
+        refresh()
+        best = rated_titles[5]
+        best.genre.remove(genres[2])
+        genres[0].titles.remove(best)
+        refresh()
+        for genre in genres[::2]:
+            response = client.get(f'{TOP_URL}?genre={genre.slug}')
+            assert best.id not in title_ids(response), (
+                'Проверьте, что рейтинг жанра пересчитывается после '
+                'удаления произведения из жанра'
+            )
+        genres[2].titles.add(best)
+        refresh()
+        response = client.get(f'{TOP_URL}?genre={genres[2].slug}')
+        assert title_ids(response)[0] == best.id, (
+            'Проверьте, что рейтинг жанра пересчитывается после '
+            'добавления произведения в жанр'
+        )
+
+    def test_deleted_title(self, client, rated_titles, genres):
+        from reviews.models import Ranking
+        refresh()
+        best = rated_titles[5]
+        best.delete()
+        response = client.get(TOP_URL)
+        assert best.id not in title_ids(response), (
+            'Проверьте, что удаленное произведение не попадает в рейтинг'
+        )
+        refresh()
+        for url in (TOP_URL, f'{TOP_URL}?genre={genres[2].slug}'):
+            positions = [
+                row['position'] for row in client.get(url).json()['results']
+            ]
+            assert positions == list(range(1, len(positions) + 1)), (
+                'Проверьте, что после удаления произведения рейтинги '
+                'пересчитываются без пропусков мест'
+            )
+        assert not Ranking.objects.filter(title__isnull=True).exists()
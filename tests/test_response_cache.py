@@ -0,0 +1,85 @@
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class TestResponseCache:
+
+    def test_titles_cached_until_review(self, client, titles,
+                                        django_assert_num_queries):
+        from reviews.models import Review, User
+        url = f'/api/v1/titles/{titles[0].id}/'
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert response['X-Cache'] == 'HIT', (
+            f'Проверьте, что повторный GET запрос на `{url}` '
+            'отдается из кэша'
+        )
+        assert response.json()['rating'] is None
+
+        author = User.objects.create(username='critic', email='c@yamdb.fake')
+        Review.objects.create(title=titles[0], author=author, score=7)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что новый отзыв сбрасывает кэш произведений'
+        )
+        assert response.json()['rating'] == 7
+
+    def test_query_params_normalized(self, client, titles):
+        client.get('/api/v1/titles/', {'year': 2000, 'limit': 5})
+        response = client.get('/api/v1/titles/?limit=5&year=2000')
+        assert response['X-Cache'] == 'HIT'
+
+    @pytest.mark.parametrize('url,change', [
+        ('/api/v1/genres/', 'genre'),
+        ('/api/v1/categories/', 'category'),
+        ('/api/v1/titles/', 'genre'),
+        ('/api/v1/titles/', 'category'),
+    ])
+    def test_invalidated_on_change(self, client, titles, url, change):
+        client.get(url)
+        assert client.get(url)['X-Cache'] == 'HIT'
+        related = getattr(titles[0], change)
+        instance = related.first() if change == 'genre' else related
+        instance.name = 'Новое имя'
+        instance.save()
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert 'Новое имя' in response.content.decode()
+
+    def test_genre_assignment_invalidates_titles(self, client, titles,
+                                                 genres):
+        url = f'/api/v1/titles/{titles[0].id}/'
+        client.get(url)
+        titles[0].genre.set(genres)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert len(response.json()['genre']) == len(genres)
+
+    @pytest.mark.parametrize('url,command', [
+        ('/api/v1/titles/', ('recalculaterating',)),
+        ('/api/v1/titles/top/', ('refreshrankings',)),
+        ('/api/v1/titles/', ('importcsv',)),
+    ])
+    def test_commands_invalidate(self, client, titles, url, command):
+        from django.core.management import call_command
+        client.get(url)
+        assert client.get(url)['X-Cache'] == 'HIT'
+        call_command(*command)
+        assert client.get(url)['X-Cache'] == 'MISS', (
+            f'Проверьте, что команда {command[0]} сбрасывает кэш ответов'
+        )
+
+    def test_generatedata_invalidates(self, client):
+        from django.core.management import call_command
+        url = '/api/v1/genres/'
+        client.get(url)
+        assert client.get(url)['X-Cache'] == 'HIT'
+        call_command(
+            'generatedata', '--users', '5', '--titles', '5',
+            '--reviews', '10', '--comments', '5'
+        )
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['count'] > 0
@@ -0,0 +1,72 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestReviewKeysetPagination:
+
+    def url(self, title):
+        return f'/api/v1/titles/{title.id}/reviews/'
+
+    def walk(self, client, url, key):
+        ids = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что GET запрос на `{url}` возвращает 200'
+            )
+            data = response.json()
+            page = [review['id'] for review in data['results']]
+            ids = page + ids if key == 'previous' else ids + page
+            url = data[key]
+        return ids
+
+    def test_keyset_walk(self, client, titles, reviews):
+        from reviews.models import Review
+        expected = list(
+            Review.objects.filter(title=titles[0]).order_by(
+                'pub_date', 'id'
+            ).values_list('id', flat=True)
+        )
+        forward = self.walk(client, f'{self.url(titles[0])}?cursor=', 'next')
+        assert forward == expected, (
+            'Проверьте, что курсорная пагинация отдаёт все отзывы '
+            'в порядке (pub_date, id)'
+        )
+        first_page = client.get(
+            f'{self.url(titles[0])}?cursor=&count=true'
+        ).json()
+        assert first_page['count'] == len(expected)
+        assert 'count=' not in first_page['next']
+
+        response = client.get(f'{self.url(titles[0])}?cursor=')
+        url = response.json()['next']
+        while True:
+            data = client.get(url).json()
+            if data['next'] is None:
+                break
+            url = data['next']
+        backward = self.walk(client, url, 'previous')
+        assert backward == expected, (
+            'Проверьте, что ссылки previous курсорной пагинации '
+            'возвращают все отзывы'
+        )
+
+    def test_keyset_no_count_query(self, client, titles, reviews,
+                                   django_assert_num_queries):
+        first = client.get(f'{self.url(titles[0])}?cursor=').json()
+        assert 'count' not in first
+        # Произведение и страница отзывов с авторами.
+        with django_assert_num_queries(2):
+            client.get(first['next'])
+        with django_assert_num_queries(3):
+            data = client.get(f"{first['next']}&count=true").json()
+        assert data['count'] == len(reviews)
+
+    def test_invalid_cursor(self, client, titles, reviews):
+        response = client.get(self.url(titles[0]), {'cursor': 'bad'})
+        assert response.status_code == 404
+
+    def test_page_number_by_default(self, client, titles, reviews):
+        data = client.get(self.url(titles[0])).json()
+        assert data['count'] == len(reviews)
+        assert len(data['results']) == 10
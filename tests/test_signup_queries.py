@@ -0,0 +1,152 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.fixtures.fixture_data import auth_client, create_user
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+USERS_URL = '/api/v1/users/'
+# Запросы без учета SAVEPOINT, которые обрамляют INSERT пользователя.
+# Новый пользователь: INSERT пользователя, замена кода (DELETE и INSERT)
+# и письмо в очередь.
+SIGNUP_NEW_QUERIES = 4
+# Повторная регистрация: неудачный INSERT, поиск пользователя,
+# замена кода и письмо в очередь.
+SIGNUP_EXISTING_QUERIES = 5
+# Занятый username или email: неудачный INSERT и поиск пары.
+SIGNUP_CONFLICT_QUERIES = 2
+# Создание администратором: INSERT пользователя.
+CREATE_QUERIES = 1
+# Дубликат: неудачный INSERT и определение занятых полей.
+CREATE_DUPLICATE_QUERIES = 3
+
+
+def count_queries(context):
+    return len([
+        query for query in context.captured_queries
+        if 'SAVEPOINT' not in query['sql']
+    ])
+
+
+@pytest.fixture
+def existing(db):
+    from reviews.models import User
+    return User.objects.create(username='reader', email='r@yamdb.fake')
+
+
+@pytest.fixture
+def admin_client(db):
+    from api.authentication import get_cached_user
+    admin = create_user('admin')
+    # Пользователь уже в кэше аутентификации, как после первого запроса.
+    get_cached_user(admin.pk)
+    return auth_client(admin)
+
+
+@pytest.mark.django_db
+class TestSignupQueries:
+
+    @pytest.fixture(autouse=True)
+    def worker_mode(self, settings):
+        settings.EMAIL_QUEUE_MODE = 'worker'
+
+    @pytest.mark.parametrize('data, status, queries', [
+        ({'username': 'new', 'email': 'new@yamdb.fake'},
+         200, SIGNUP_NEW_QUERIES),
+        ({'username': 'reader', 'email': 'r@yamdb.fake'},
+         200, SIGNUP_EXISTING_QUERIES),
+        ({'username': 'reader', 'email': 'other@yamdb.fake'},
+         400, SIGNUP_CONFLICT_QUERIES),
+        ({'username': 'other', 'email': 'r@yamdb.fake'},
+         400, SIGNUP_CONFLICT_QUERIES),
+    ])
+    def test_signup(self, client, existing, data, status, queries):
+        from reviews.models import User
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(SIGNUP_URL, data)
+        assert response.status_code == status
+        assert count_queries(context) == queries, (
+            f'Проверьте количество запросов к БД при регистрации {data}'
+        )
+        assert User.objects.filter(**data).count() == (status == 200), (
+            'Проверьте, что при конфликте пользователь не создается'
+        )
+
+    def test_create_user(self, admin_client):
+        from reviews.models import User
+        data = {'username': 'new', 'email': 'new@yamdb.fake'}
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(USERS_URL, data)
+        assert response.status_code == 201
+        assert count_queries(context) == CREATE_QUERIES, (
+            'Проверьте, что пользователь создается одним INSERT '
+            'без предварительных проверок'
+        )
+        assert User.objects.filter(**data).exists()
+
+    @pytest.mark.parametrize('data, field', [
+        ({'username': 'reader', 'email': 'new@yamdb.fake'}, 'username'),
+        ({'username': 'new', 'email': 'r@yamdb.fake'}, 'email'),
+    ])
+    def test_create_duplicate(self, admin_client, existing, data, field):
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(USERS_URL, data)
+        assert response.status_code == 400
+        assert list(response.json()) == [field], (
+            'Проверьте, что в ответе указано занятое поле'
+        )
+        assert count_queries(context) == CREATE_DUPLICATE_QUERIES
+
+    def test_other_integrity_error(self, existing):
+        from api.serializers import UserSerializer
+        from django.db import IntegrityError
+        serializer = UserSerializer(
+            data={'username': 'new', 'email': 'new@yamdb.fake'}
+        )
+        assert serializer.is_valid()
+
+        def save(validated_data):
+            raise IntegrityError('NOT NULL constraint failed')
+
+        with pytest.raises(IntegrityError):
+            serializer.save_unique(save, serializer.validated_data)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestUniqueEmailMigration:
+
+    def test_duplicate_emails_abort_migration(self):
+        from importlib import import_module
+
+        from django.apps import apps
+        from django.core.management.base import CommandError
+        from reviews.models import User
+        migration = import_module('reviews.migrations.0014_unique_user_email')
+        constraint = next(
+            constraint for constraint in User._meta.constraints
+            if constraint.name == 'unique_user_email'
+        )
+        with connection.schema_editor() as editor:
+            editor.remove_constraint(User, constraint)
+        try:
+            User.objects.create(username='other', email='other@yamdb.fake')
+            migration.check_duplicate_emails(apps, None)
+            for name in ('first', 'second'):
+                User.objects.create(username=name, email='same@yamdb.fake')
+            with pytest.raises(CommandError) as error:
+                migration.check_duplicate_emails(apps, None)
+            emails = dict(User.objects.values_list('username', 'email'))
+        finally:
+            User.objects.all().delete()
+            with connection.schema_editor() as editor:
+                editor.add_constraint(User, constraint)
+        assert 'same@yamdb.fake: first' in str(error.value)
+        assert 'second' in str(error.value), (
+            'Проверьте, что ошибка перечисляет пользователей '
+            'с одинаковым адресом'
+        )
+        assert 'other' not in str(error.value)
+        assert emails == {
+            'first': 'same@yamdb.fake', 'second': 'same@yamdb.fake',
+            'other': 'other@yamdb.fake',
+        }, 'Проверьте, что миграция не меняет адреса пользователей'
@@ -0,0 +1,101 @@
+import pytest
+
+from tests.fixtures.fixture_data import auth_client, create_user
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+CATEGORIES_URL = '/api/v1/categories/'
+
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {
+                **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+                **rates,
+            },
+        }
+    return set_rates
+
+
+@pytest.mark.django_db
+class TestThrottling:
+
+    def test_signup_scope(self, client, rates, django_assert_num_queries):
+        rates(signup='2/hour')
+        for i in range(2):
+            client.post(SIGNUP_URL, {'username': 'me', 'email': 'me@y.fake'})
+        with django_assert_num_queries(0):
+            response = client.post(
+                SIGNUP_URL, {'username': 'me', 'email': 'me@y.fake'}
+            )
+        assert response.status_code == 429, (
+            f'Проверьте, что частые запросы на `{SIGNUP_URL}` отклоняются '
+            'до обращения к БД'
+        )
+        assert 'Retry-After' in response
+
+    def test_role_tiers(self, client, rates):
+        rates(anon='1/min', admin=None)
+        assert client.get(CATEGORIES_URL).status_code == 200
+        assert client.get(CATEGORIES_URL).status_code == 429, (
+            'Проверьте, что для анонимных пользователей действует лимит anon'
+        )
+        client = auth_client(create_user('admin'))
+        for i in range(3):
+            assert client.get(CATEGORIES_URL).status_code == 200, (
+                'Проверьте, что лимит определяется ролью пользователя'
+            )
+
+    def test_spoofed_forwarded_for(self, client, rates):
+        rates(anon='2/min')
+        # nginx дописывает адрес клиента последним в X-Forwarded-For.
+        for spoofed in ('1.1.1.1', '2.2.2.2'):
+            assert client.get(
+                CATEGORIES_URL,
+                HTTP_X_FORWARDED_FOR=f'{spoofed}, 203.0.113.7'
+            ).status_code == 200
+        response = client.get(
+            CATEGORIES_URL, HTTP_X_FORWARDED_FOR='3.3.3.3, 203.0.113.7'
+        )
+        assert response.status_code == 429, (
+            'Проверьте, что подставленный клиентом X-Forwarded-For '
+            'не обходит лимит'
+        )
+        assert client.get(
+            CATEGORIES_URL, HTTP_X_FORWARDED_FOR='203.0.113.8'
+        ).status_code == 200, (
+            'Проверьте, что клиенты за прокси ограничиваются по отдельности'
+        )
+
+    def test_review_create_scope(self, client, rates, titles):
+        rates(review_create='1/hour')
+        client = auth_client(create_user('user'))
+        for title, expected in zip(titles, (201, 429)):
+            response = client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                {'text': 'Отзыв', 'score': 5}
+            )
+            assert response.status_code == expected, (
+                'Проверьте, что для создания отзывов действует лимит '
+                'review_create'
+            )
+        response = client.get(f'/api/v1/titles/{titles[0].id}/reviews/')
+        assert response.status_code == 200, (
+            'Проверьте, что лимит review_create не действует на чтение'
+        )
+
+    def test_counter_in_cache(self, client, rates, settings):
+        from django.core.cache import caches
+        rates(anon='5/min')
+        for i in range(3):
+            client.get(CATEGORIES_URL)
+        cache = caches[settings.THROTTLE_CACHE_ALIAS]
+        counters = [
+            value for key, value in cache._cache.items()
+            if 'throttle:anon:' in key
+        ]
+        assert len(counters) == 1, (
+            'Проверьте, что на окно хранится один счетчик запросов'
+        )
@@ -0,0 +1,58 @@
+import json
+import re
+
+import pytest
+
+
+def timing_records(caplog, name='api.timing'):
+    return [
+        json.loads(record.getMessage())
+        for record in caplog.records if record.name == name
+    ]
+
+
+@pytest.mark.django_db
+class TestTimingMiddleware:
+
+    def test_server_timing_header(self, client, titles,
+                                  django_assert_num_queries):
+        with django_assert_num_queries(3) as context:
+            response = client.get('/api/v1/titles/')
+        header = response.get('Server-Timing', '')
+        for metric in ('db', 'render', 'app', 'total'):
+            assert re.search(rf'\b{metric};dur=\d+\.\d+', header), (
+                f'Проверьте, что заголовок Server-Timing содержит {metric}'
+            )
+        assert f'desc="{len(context.captured_queries)} queries"' in header
+
+    def test_request_log(self, client, titles, caplog):
+        caplog.set_level('INFO', logger='api.timing')
+        client.get('/api/v1/titles/')
+        client.get(f'/api/v1/genres/{titles[0].genre.first().slug}/titles/')
+        client.post('/api/v1/auth/token/', data={})
+        records = timing_records(caplog)
+        assert [record['view'] for record in records] == [
+            'TitleViewSet.list', 'GenreViewSet.titles', 'AuthTokenView.post'
+        ], 'Проверьте, что в журнал пишется имя viewset и действия'
+        assert records[0]['status'] == 200
+        assert records[0]['queries'] == 3
+        assert records[0]['total_ms'] >= records[0]['db_ms']
+        assert records[0]['render_ms'] > 0, (
+            'Проверьте, что измеряется время отрисовки ответа DRF'
+        )
+        assert records[2]['status'] == 400
+        assert not timing_records(caplog, 'api.timing.slow')
+
+    def test_slow_request_log(self, client, titles, caplog, settings):
+        settings.SLOW_REQUEST_MS = 0
+        caplog.set_level('INFO', logger='api.timing')
+        client.get('/api/v1/titles/')
+        slow = timing_records(caplog, 'api.timing.slow')
+        assert len(slow) == 1, (
+            'Проверьте, что запрос дольше SLOW_REQUEST_MS пишется '
+            'в журнал медленных запросов'
+        )
+        assert len(slow[0]['sql']) == 3
+        assert any('reviews_title' in query['sql'] for query in slow[0]['sql'])
+        durations = [query['ms'] for query in slow[0]['sql']]
+        assert durations == sorted(durations, reverse=True)
@@ -0,0 +1,161 @@
+import pytest
+
+
+def rating_fields(title_ids):
+    from reviews.models import Title
+    return {
+        title['id']: title for title in Title.objects.filter(
+            pk__in=title_ids
+        ).values('id', 'rating', 'reviews_count', 'score_sum')
+    }
+
+
+def assert_matches_recalculation(*titles):
+    """Счётчики после сигналов совпадают с пересчётом с нуля."""
+    from reviews.models import Title
+    title_ids = [title.id for title in titles]
+    incremental = rating_fields(title_ids)
+    Title.objects.filter(pk__in=title_ids).recalculate_rating()
+    assert incremental == rating_fields(title_ids), (
+        'Проверьте, что инкрементальное обновление рейтинга совпадает '
+        'с recalculate_rating()'
+    )
+    return incremental
+
+
+@pytest.fixture
+def authors(db):
+    from reviews.models import User
+    return [
+        User.objects.create(username=f'critic{i}', email=f'c{i}@yamdb.fake')
+        for i in range(3)
+    ]
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def test_review_create(self, titles, authors):
+        from reviews.models import Review
+        for author, score in zip(authors, (4, 7, 10)):
+            Review.objects.create(title=titles[0], author=author, score=score)
+        fields = assert_matches_recalculation(titles[0])[titles[0].id]
+        assert fields['reviews_count'] == 3
+        assert fields['score_sum'] == 21
+        assert fields['rating'] == 7
+
+    def test_score_update(self, titles, authors):
+        from reviews.models import Review
+        review = Review.objects.create(
+            title=titles[0], author=authors[0], score=2
+        )
+        Review.objects.create(title=titles[0], author=authors[1], score=4)
+        review.score = 8
+        review.save()
+        fields = assert_matches_recalculation(titles[0])[titles[0].id]
+        assert fields['score_sum'] == 12
+        assert fields['rating'] == 6, (
+            'Проверьте, что изменение оценки меняет рейтинг произведения'
+        )
+
+    def test_loaded_review_update(self, titles, authors):
+        from reviews.models import Review
+        review_id = Review.objects.create(
+            title=titles[0], author=authors[0], score=3
+        ).id
+        review = Review.objects.get(pk=review_id)
+        review.score = 9
+        review.save()
+        fields = assert_matches_recalculation(titles[0])[titles[0].id]
+        assert fields['rating'] == 9
+
+    def test_move_between_titles(self, titles, authors):
+        from reviews.models import Review
+        review = Review.objects.create(
+            title=titles[0], author=authors[0], score=5
+        )
+        Review.objects.create(title=titles[0], author=authors[1], score=9)
+        review.title = titles[1]
+        review.score = 3
+        review.save()
+        fields = assert_matches_recalculation(titles[0], titles[1])
+        assert fields[titles[0].id]['reviews_count'] == 1
+        assert fields[titles[0].id]['rating'] == 9
+        assert fields[titles[1].id]['reviews_count'] == 1, (
+            'Проверьте, что перенос отзыва учитывается у обоих произведений'
+        )
+        assert fields[titles[1].id]['rating'] == 3
+
+    def test_review_delete(self, titles, authors):
+        from reviews.models import Review
+        review = Review.objects.create(
+            title=titles[0], author=authors[0], score=1
+        )
+        Review.objects.create(title=titles[0], author=authors[1], score=5)
+        review.delete()
+        fields = assert_matches_recalculation(titles[0])[titles[0].id]
+        assert fields['reviews_count'] == 1
+        assert fields['rating'] == 5
+
+    def test_last_review_delete(self, titles, authors):
+        from reviews.models import Review
+        Review.objects.create(
+            title=titles[0], author=authors[0], score=6
+        ).delete()
+        fields = assert_matches_recalculation(titles[0])[titles[0].id]
+        assert fields['reviews_count'] == 0
+        assert fields['score_sum'] == 0
+        assert fields['rating'] is None, (
+            'Проверьте, что без отзывов рейтинг произведения пуст'
+        )
+
+    def test_title_delete_cascade(self, titles, authors):
+        from reviews.models import Review, Title
+        for author in authors:
+            Review.objects.create(title=titles[0], author=author, score=7)
+            Review.objects.create(title=titles[1], author=author, score=2)
+        titles[0].delete()
+        assert not Title.objects.filter(pk=titles[0].id).exists()
+        assert not Review.objects.filter(title_id=titles[0].id).exists()
+        fields = assert_matches_recalculation(titles[1])[titles[1].id]
+        assert fields['reviews_count'] == 3
+        assert fields['rating'] == 2
+
+    def test_title_delete_skips_rating_updates(self, titles, authors):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from reviews.models import Review
+        for author in authors:
+            Review.objects.create(title=titles[0], author=author, score=7)
+        with CaptureQueriesContext(connection) as context:
+            titles[0].delete()
+        assert not [
+            query for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "reviews_title"')
+        ], (
+            'Проверьте, что удаляемое произведение не обновляется '
+            'при каскадном удалении отзывов и связей с жанрами'
+        )
+        review = Review.objects.create(
+            title=titles[1], author=authors[0], score=4
+        )
+        review.delete()
+        fields = assert_matches_recalculation(titles[1])[titles[1].id]
+        assert fields['reviews_count'] == 0, (
+            'Проверьте, что после удаления произведения рейтинг других '
+            'произведений обновляется при удалении отзывов'
+        )
+
+    def test_save_twice(self, titles, authors):
+        from reviews.models import Review
+        review = Review.objects.create(
+            title=titles[0], author=authors[0], score=4
+        )
+        review.save()
+        review.text = 'Новый текст'
+        review.save()
+        fields = assert_matches_recalculation(titles[0])[titles[0].id]
+        assert fields['reviews_count'] == 1, (
+            'Проверьте, что повторное сохранение отзыва не меняет счётчики'
+        )
+        assert fields['score_sum'] == 4
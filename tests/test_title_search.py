@@ -0,0 +1,24 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    def test_search_ranked(self, client, categories):
+        from reviews.models import Title
+        in_description = Title.objects.create(
+            name='Дорога', year=2000, category=categories[0],
+            description='Фильм о путешествии на Марс'
+        )
+        in_name = Title.objects.create(
+            name='Марсианин', year=2015, category=categories[0]
+        )
+        Title.objects.create(name='Другое', year=2001, category=categories[0])
+
+        response = client.get('/api/v1/titles/', {'search': 'Марс'})
+        assert response.status_code == 200
+        ids = [title['id'] for title in response.json()['results']]
+        assert ids == [in_name.id, in_description.id], (
+            'Проверьте, что поиск находит произведения по названию '
+            'и описанию, а совпадения в названии идут первыми'
+        )
@@ -0,0 +1,65 @@
+import pytest
+
+STATS_URL = '/api/v1/titles/{id}/stats/'
+BULK_STATS_URL = '/api/v1/titles/stats/'
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+
+    def test_stats(self, client, titles, reviews, django_assert_num_queries):
+        url = STATS_URL.format(id=titles[0].id)
+        with django_assert_num_queries(1):
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос на `{url}` возвращает 200'
+        )
+        data = response.json()
+        assert data['count'] == len(reviews)
+        assert data['mean'] == pytest.approx(
+            sum(review.score for review in reviews) / len(reviews)
+        )
+        assert data['histogram'] == {
+            str(score): len([r for r in reviews if r.score == score])
+            for score in range(11)
+        }, 'Проверьте, что гистограмма содержит все оценки от 0 до 10'
+        assert data['percentiles'] == {'25': 2, '50': 4, '75': 7, '90': 9}
+
+    def test_stats_without_reviews(self, client, titles):
+        data = client.get(STATS_URL.format(id=titles[1].id)).json()
+        assert data['count'] == 0
+        assert data['mean'] is None
+        assert set(data['histogram'].values()) == {0}
+
+    def test_stats_not_found(self, client, titles):
+        assert client.get(STATS_URL.format(id=0)).status_code == 404
+
+    def test_bulk_stats(self, client, titles, reviews,
+                        django_assert_num_queries):
+        ids = [titles[2].id, 0, titles[0].id]
+        with django_assert_num_queries(1):
+            response = client.get(
+                f'{BULK_STATS_URL}?ids={",".join(map(str, ids))}'
+            )
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert [stats['id'] for stats in results] == [
+            titles[2].id, titles[0].id
+        ], (
+            'Проверьте, что статистика возвращается в порядке id запроса '
+            'без отсутствующих произведений'
+        )
+        assert results[1]['count'] == len(reviews)
+
+    def test_stats_url_names(self):
+        from django.urls import reverse
+        assert reverse('title-stats', args=[1]) == STATS_URL.format(id=1)
+        assert reverse('title-bulk-stats') == BULK_STATS_URL, (
+            'Проверьте, что у статистики списка и произведения разные '
+            'имена маршрутов'
+        )
+
+    @pytest.mark.parametrize('ids', ['', 'a,b', ','.join(['1'] * 101)])
+    def test_bulk_stats_invalid(self, client, ids):
+        response = client.get(f'{BULK_STATS_URL}?ids={ids}')
+        assert response.status_code == 400
@@ -0,0 +1,55 @@
+from itertools import combinations
+
+import pytest
+
+TITLES_URL = '/api/v1/titles/'
+# COUNT(*) для пагинации, произведения с категориями и prefetch жанров.
+LIST_QUERIES = 3
+# Произведение с категорией и prefetch жанров.
+RETRIEVE_QUERIES = 2
+
+FILTERS = {
+    'genre': 'genre-0',
+    'category': 'category-0',
+    'year': 2000,
+    'name': 'Произведение',
+    'search': 'Произведение 1',
+}
+
+
+@pytest.mark.django_db
+class TestTitleQueries:
+
+    @pytest.mark.parametrize('limit', [1, 10, 100])
+    def test_list_queries(self, client, titles, limit,
+                          django_assert_num_queries):
+        with django_assert_num_queries(LIST_QUERIES):
+            response = client.get(TITLES_URL, {'limit': limit})
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос на `{TITLES_URL}` возвращает 200'
+        )
+        assert len(response.json()['results']) == min(limit, len(titles))
+
+    def test_retrieve_queries(self, client, titles,
+                              django_assert_num_queries):
+        url = f'{TITLES_URL}{titles[-1].id}/'
+        with django_assert_num_queries(RETRIEVE_QUERIES):
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос на `{url}` возвращает 200'
+        )
+        assert len(response.json()['genre']) == titles[-1].genre.count()
+
+    @pytest.mark.parametrize('filters', [
+        dict(combination)
+        for size in range(1, len(FILTERS) + 1)
+        for combination in combinations(FILTERS.items(), size)
+    ])
+    def test_filter_queries(self, client, titles, filters,
+                            django_assert_num_queries):
+        with django_assert_num_queries(LIST_QUERIES):
+            response = client.get(TITLES_URL, {**filters, 'limit': 100})
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос на `{TITLES_URL}` с фильтрами '
+            f'{filters} возвращает 200'
+        )